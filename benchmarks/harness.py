@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import gc
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from tabulate import tabulate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+
+@dataclass
+class PhaseResult:
+    scenario: str
+    phase: str
+    wall_time_secs: float
+    peak_rss_mib: float
+    alloc_peak_mib: float | None = None
+    alloc_blocks: int | None = None
+
+
+@dataclass
+class BenchmarkReport:
+    results: list[PhaseResult] = field(default_factory=list)
+
+    def add(self, result: PhaseResult) -> None:
+        self.results.append(result)
+
+    def to_table(self) -> str:
+        return tabulate(
+            [
+                [
+                    r.scenario,
+                    r.phase,
+                    f"{r.wall_time_secs:.3f}",
+                    f"{r.peak_rss_mib:.1f}",
+                    "-" if r.alloc_peak_mib is None else f"{r.alloc_peak_mib:.1f}",
+                    "-" if r.alloc_blocks is None else r.alloc_blocks,
+                ]
+                for r in self.results
+            ],
+            headers=[
+                "scenario",
+                "phase",
+                "wall time (s)",
+                "peak RSS (MiB)",
+                "alloc peak (MiB)",
+                "alloc blocks",
+            ],
+        )
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        return [r.__dict__ for r in self.results]
+
+
+def peak_rss_mib() -> float:
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Phase:
+    """Measures one phase of a benchmark scenario.
+
+    Wall time is always measured. Allocation tracking uses tracemalloc, which
+    slows down execution considerably, so it is only enabled on request. The
+    peak RSS is the high-water mark of the whole process at the end of the
+    phase, so phases should be run from the cheapest to the most expensive
+    scenario to get meaningful numbers.
+    """
+
+    def __init__(
+        self,
+        report: BenchmarkReport,
+        scenario: str,
+        trace_allocations: bool = False,
+    ) -> None:
+        self.report = report
+        self.scenario = scenario
+        self.trace_allocations = trace_allocations
+
+    @contextmanager
+    def __call__(self, phase: str) -> Iterator[None]:
+        gc.collect()
+        if self.trace_allocations:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            alloc_peak_mib = alloc_blocks = None
+            if self.trace_allocations:
+                _, peak = tracemalloc.get_traced_memory()
+                alloc_peak_mib = peak / 1024 / 1024
+                alloc_blocks = sum(
+                    s.count for s in tracemalloc.take_snapshot().statistics("filename")
+                )
+                tracemalloc.stop()
+            self.report.add(
+                PhaseResult(
+                    scenario=self.scenario,
+                    phase=phase,
+                    wall_time_secs=wall_time,
+                    peak_rss_mib=peak_rss_mib(),
+                    alloc_peak_mib=alloc_peak_mib,
+                    alloc_blocks=alloc_blocks,
+                )
+            )
+
+
+def run_scenarios(
+    sizes: Iterable[int],
+    scenario: Callable[[int, Phase], None],
+    name: str,
+    trace_allocations: bool = False,
+) -> BenchmarkReport:
+    report = BenchmarkReport()
+    for size in sorted(sizes):
+        scenario(size, Phase(report, f"{name}[{size}]", trace_allocations))
+    return report
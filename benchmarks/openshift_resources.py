@@ -0,0 +1,488 @@
+"""Benchmark for the openshift-resources pipeline.
+
+Exercises ``openshift_resources_base.fetch_data`` -> ``ResourceInventory`` ->
+``openshift_base.realize_data`` against synthetic namespaces, resource
+templates, vault secrets and a fake cluster client:
+
+    python -m benchmarks.openshift_resources --objects 1000 --objects 10000
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import random
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+from unittest.mock import patch
+
+import click
+import yaml
+from sretoolbox.utils import threaded
+
+import reconcile.openshift_base as ob
+import reconcile.openshift_resources_base as orb
+from benchmarks.harness import Phase, run_scenarios
+from reconcile.utils.jinja2 import render_pool
+from reconcile.utils.jinja2.utils import Jinja2TemplateCache
+from reconcile.utils.oc import KindNotFoundError, OCCliApiResource, OCLogMsg
+from reconcile.utils.openshift_resource import OpenshiftResource as OR
+from reconcile.utils.openshift_resource import (
+    ResourceInventory,
+    base64_encode_secret_field_value,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+
+MANAGED_TYPES = ["ConfigMap", "Secret", "Deployment"]
+SETTINGS = {"vault": True}
+
+# share of objects per provider, the remainder uses the plain resource provider
+TEMPLATE_SHARE = 0.3
+# share of objects rendered from templates that do not depend on the namespace
+# and are referenced with the same variables from many namespaces
+SHARED_TEMPLATE_SHARE = 0.15
+VAULT_SECRET_SHARE = 0.2
+
+# share of desired objects whose current state differs from the desired state
+CHANGED_SHARE = 0.1
+# share of desired objects missing on the cluster
+MISSING_SHARE = 0.05
+# share of extra, qontract-managed objects on the cluster that are not desired
+ORPHANED_SHARE = 0.05
+
+TEMPLATE = """
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: {{ name }}
+  labels:
+    app: {{ name }}
+    namespace: {{ resource.namespace.name }}
+spec:
+  replicas: {{ replicas }}
+  selector:
+    matchLabels:
+      app: {{ name }}
+  template:
+    metadata:
+      labels:
+        app: {{ name }}
+    spec:
+      containers:
+      {%- for c in containers %}
+      - name: {{ c }}
+        image: quay.io/app-sre/{{ c }}:{{ image_tag }}
+        env:
+        {%- for i in range(env_count) %}
+        - name: VAR_{{ i }}
+          value: "{{ c }}-{{ i }}"
+        {%- endfor %}
+      {%- endfor %}
+"""
+
+
+SHARED_TEMPLATE = """
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: {{ name }}
+data:
+{%- for key, value in settings.items() %}
+  {{ key }}: "{{ value }}"
+{%- endfor %}
+"""
+
+
+def secret_data(path: str) -> dict[str, str]:
+    return {f"key_{i}": f"{path}-value-{i}" for i in range(5)}
+
+
+def deployment_body(name: str, namespace: str, variables: Mapping) -> dict:
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {"name": name, "labels": {"app": name, "namespace": namespace}},
+        "spec": {
+            "replicas": variables["replicas"],
+            "selector": {"matchLabels": {"app": name}},
+            "template": {
+                "metadata": {"labels": {"app": name}},
+                "spec": {
+                    "containers": [
+                        {
+                            "name": c,
+                            "image": f"quay.io/app-sre/{c}:{variables['image_tag']}",
+                            "env": [
+                                {"name": f"VAR_{i}", "value": f"{c}-{i}"}
+                                for i in range(variables["env_count"])
+                            ],
+                        }
+                        for c in variables["containers"]
+                    ]
+                },
+            },
+        },
+    }
+
+
+@dataclass
+class SyntheticData:
+    namespaces: list[dict[str, Any]] = field(default_factory=list)
+    # rendered bodies per (cluster, namespace, kind)
+    expected: dict[tuple[str, str, str], list[dict[str, Any]]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+
+
+def generate(
+    objects: int,
+    objects_per_namespace: int,
+    namespaces_per_cluster: int,
+    seed: int = 0,
+) -> SyntheticData:
+    rnd = random.Random(seed)
+    data = SyntheticData()
+    for ns_idx in range((objects + objects_per_namespace - 1) // objects_per_namespace):
+        cluster = f"cluster-{ns_idx // namespaces_per_cluster:03d}"
+        namespace = f"namespace-{ns_idx:05d}"
+        resources: list[dict[str, Any]] = []
+        count = min(objects_per_namespace, objects - ns_idx * objects_per_namespace)
+        for idx in range(count):
+            name = f"object-{idx:04d}"
+            dice = rnd.random()
+            if dice < SHARED_TEMPLATE_SHARE:
+                variables = {
+                    "name": name,
+                    "settings": {f"setting_{i}": f"{idx}-{i}" for i in range(20)},
+                }
+                resources.append({
+                    "provider": "resource-template",
+                    "type": "jinja2",
+                    "variables": json.dumps(variables),
+                    "resource": {
+                        "path": f"/templates/shared-{idx}.yaml",
+                        "content": SHARED_TEMPLATE,
+                        "schema": None,
+                    },
+                })
+                body = {
+                    "apiVersion": "v1",
+                    "kind": "ConfigMap",
+                    "metadata": {"name": name},
+                    "data": variables["settings"],
+                }
+            elif dice < TEMPLATE_SHARE:
+                variables = {
+                    "name": name,
+                    "replicas": rnd.randint(1, 5),
+                    "image_tag": f"{rnd.getrandbits(40):010x}",
+                    "containers": [f"container-{c}" for c in range(rnd.randint(1, 3))],
+                    "env_count": rnd.randint(5, 20),
+                }
+                resources.append({
+                    "provider": "resource-template",
+                    "type": "jinja2",
+                    "variables": json.dumps(variables),
+                    "resource": {
+                        # templates are shared between namespaces
+                        "path": f"/templates/deployment-{idx % 10}.yaml",
+                        "content": TEMPLATE,
+                        "schema": None,
+                    },
+                })
+                body = deployment_body(name, namespace, variables)
+            elif dice < TEMPLATE_SHARE + VAULT_SECRET_SHARE:
+                path = f"app-sre/{cluster}/{namespace}/{name}"
+                resources.append({
+                    "provider": "vault-secret",
+                    "path": path,
+                    "version": 1,
+                    "name": name,
+                    "labels": None,
+                    "annotations": None,
+                    "type": None,
+                })
+                body = {
+                    "apiVersion": "v1",
+                    "kind": "Secret",
+                    "type": "Opaque",
+                    "metadata": {"name": name, "annotations": {}},
+                    "data": {
+                        k: base64_encode_secret_field_value(v)
+                        for k, v in secret_data(path).items()
+                    },
+                }
+            else:
+                body = {
+                    "apiVersion": "v1",
+                    "kind": "ConfigMap",
+                    "metadata": {"name": name},
+                    "data": {
+                        f"key-{i}": f"{namespace}-{name}-{rnd.getrandbits(64):x}"
+                        for i in range(rnd.randint(2, 30))
+                    },
+                }
+                resources.append({
+                    "provider": "resource",
+                    "resource": {
+                        "path": f"/resources/{namespace}/{name}.yml",
+                        "content": yaml.safe_dump(body),
+                        "schema": None,
+                    },
+                })
+            data.expected[cluster, namespace, body["kind"]].append(body)
+        data.namespaces.append({
+            "name": namespace,
+            "cluster": {"name": cluster},
+            "clusterAdmin": None,
+            "managedResourceTypes": MANAGED_TYPES,
+            "managedResourceTypeOverrides": None,
+            "managedResourceNames": None,
+            "openshiftResources": resources,
+        })
+    return data
+
+
+def build_cluster_state(
+    data: SyntheticData, seed: int = 0
+) -> dict[tuple[str, str, str], list[dict[str, Any]]]:
+    """Derive the current state from the desired state.
+
+    Most objects are identical to what the integration applied last time, a
+    share of them changed in app-interface since then, some are missing on the
+    cluster and some are orphaned on the cluster.
+    """
+    rnd = random.Random(seed)
+    items: dict[tuple[str, str, str], list[dict[str, Any]]] = defaultdict(list)
+    for key, bodies in data.expected.items():
+        for body in bodies:
+            dice = rnd.random()
+            if dice < MISSING_SHARE:
+                continue
+            applied = copy.deepcopy(body)
+            if dice < MISSING_SHARE + CHANGED_SHARE:
+                applied["metadata"].setdefault("labels", {})["changed"] = "true"
+            if dice > 1 - ORPHANED_SHARE:
+                orphan = copy.deepcopy(applied)
+                orphan["metadata"]["name"] += "-orphaned"
+                items[key].append(annotated_cluster_body(orphan))
+            items[key].append(annotated_cluster_body(applied))
+    return items
+
+
+def annotated_cluster_body(body: dict[str, Any]) -> dict[str, Any]:
+    cluster_body = OR(
+        body, orb.QONTRACT_INTEGRATION, orb.QONTRACT_INTEGRATION_VERSION
+    ).annotate()
+    # fields added by the API server
+    cluster_body.body["metadata"] |= {
+        "uid": "00000000-0000-0000-0000-000000000000",
+        "resourceVersion": "12345",
+        "creationTimestamp": "2024-01-01T00:00:00Z",
+        "managedFields": [{"manager": "kubectl", "operation": "Apply"}],
+    }
+    return cluster_body.body
+
+
+class FakeSecretReader:
+    def __init__(self, settings: Mapping | None = None) -> None:
+        pass
+
+    def read_all(self, params: Mapping[str, Any]) -> dict[str, str]:
+        return secret_data(params["path"])
+
+
+class FakeOC:
+    def __init__(
+        self,
+        cluster: str,
+        items: Mapping[tuple[str, str, str], list[dict[str, Any]]],
+    ) -> None:
+        self.cluster = cluster
+        self.items = items
+
+    def get_api_resource(self, kind: str) -> OCCliApiResource:
+        if kind not in MANAGED_TYPES:
+            raise KindNotFoundError(f"Unsupported resource type: {kind}")
+        return OCCliApiResource(
+            kind=kind,
+            group="apps" if kind == "Deployment" else "",
+            api_version="v1",
+            namespaced=True,
+        )
+
+    def is_kind_supported(self, kind: str) -> bool:
+        return kind in MANAGED_TYPES
+
+    def is_kind_namespaced(self, kind: str) -> bool:
+        return True
+
+    def get_items(self, kind: str, **kwargs: Any) -> list[dict[str, Any]]:
+        # the cluster returns fresh objects on every call
+        return copy.deepcopy(
+            self.items.get((self.cluster, kwargs["namespace"], kind), [])
+        )
+
+    def recycle_pods(self, dry_run: bool, namespace: str, resource: OR) -> None:
+        pass
+
+
+class FakeOCMap:
+    def __init__(
+        self,
+        clusters: list[str],
+        items: Mapping[tuple[str, str, str], list[dict[str, Any]]],
+    ) -> None:
+        self._clusters = {c: FakeOC(c, items) for c in clusters}
+
+    def get(self, cluster: str, privileged: bool = False) -> FakeOC | OCLogMsg:
+        return self._clusters[cluster]
+
+    def get_cluster(self, cluster: str, privileged: bool = False) -> FakeOC:
+        return self._clusters[cluster]
+
+    def clusters(
+        self, include_errors: bool = False, privileged: bool = False
+    ) -> list[str]:
+        return list(self._clusters)
+
+    def cleanup(self) -> None:
+        pass
+
+
+@contextmanager
+def fake_environment(oc_map: FakeOCMap) -> Iterator[None]:
+    with (
+        patch.object(orb, "OC_Map", return_value=oc_map),
+        patch.object(orb.queries, "get_app_interface_settings", return_value=SETTINGS),
+        patch.object(orb, "SecretReader", FakeSecretReader),
+    ):
+        yield
+
+
+def openshift_resources_scenario(
+    objects: int,
+    phase: Phase,
+    objects_per_namespace: int,
+    namespaces_per_cluster: int,
+    thread_pool_size: int,
+) -> None:
+    data = generate(objects, objects_per_namespace, namespaces_per_cluster)
+    items = build_cluster_state(data)
+    oc_map = FakeOCMap(sorted({ns["cluster"]["name"] for ns in data.namespaces}), items)
+
+    with fake_environment(oc_map):
+        # the real pipeline end to end
+        with phase("fetch_data"):
+            _, ri = orb.fetch_data(
+                copy.deepcopy(data.namespaces),
+                thread_pool_size,
+                internal=None,
+                cache=Jinja2TemplateCache(),
+            )
+
+        # the same work split up into desired and current state
+        split_ri = ResourceInventory()
+        specs = ob.init_specs_to_fetch(
+            split_ri, oc_map, namespaces=copy.deepcopy(data.namespaces)
+        )
+        desired_specs = [s for s in specs if isinstance(s, ob.DesiredStateSpec)]
+        current_specs = [s for s in specs if isinstance(s, ob.CurrentStateSpec)]
+        cache = Jinja2TemplateCache()
+        with phase("desired_state"):
+            threaded.run(
+                orb.fetch_states,
+                desired_specs,
+                thread_pool_size,
+                ri=split_ri,
+                settings=SETTINGS,
+                cache=cache,
+            )
+        with phase("current_state"):
+            threaded.run(
+                orb.fetch_states,
+                current_specs,
+                thread_pool_size,
+                ri=split_ri,
+                settings=SETTINGS,
+                cache=cache,
+            )
+        del split_ri, specs, desired_specs, current_specs
+
+        with phase("canonicalize_hash"):
+            for _, _, _, resources in ri:
+                for desired in resources["desired"].values():
+                    desired.sha256sum()
+
+        with phase("realize_data"):
+            actions = ob.realize_data(True, oc_map, ri, thread_pool_size)
+
+    if ri.has_error_registered():
+        raise RuntimeError(f"{phase.scenario}: errors registered in inventory")
+    logging.debug(f"{phase.scenario}: {len(actions)} actions")
+
+
+@click.command()
+@click.option(
+    "--objects",
+    multiple=True,
+    type=int,
+    default=[1000, 10000, 50000],
+    show_default=True,
+    help="Number of desired objects. Can be specified multiple times.",
+)
+@click.option("--objects-per-namespace", default=50, show_default=True)
+@click.option("--namespaces-per-cluster", default=20, show_default=True)
+@click.option("--thread-pool-size", default=10, show_default=True)
+@click.option(
+    "--render-processes",
+    default=0,
+    show_default=True,
+    help="Size of the template render process pool (RENDER_PROCESS_POOL_SIZE).",
+)
+@click.option(
+    "--trace-allocations",
+    is_flag=True,
+    help="Track allocations with tracemalloc (slows down all phases).",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print results as JSON.")
+@click.option("--log-level", default="WARNING", show_default=True)
+def main(
+    objects: list[int],
+    objects_per_namespace: int,
+    namespaces_per_cluster: int,
+    thread_pool_size: int,
+    render_processes: int,
+    trace_allocations: bool,
+    as_json: bool,
+    log_level: str,
+) -> None:
+    logging.basicConfig(level=log_level)
+    render_pool.RENDER_PROCESS_POOL_SIZE = render_processes
+    report = run_scenarios(
+        objects,
+        lambda size, phase: openshift_resources_scenario(
+            size,
+            phase,
+            objects_per_namespace=objects_per_namespace,
+            namespaces_per_cluster=namespaces_per_cluster,
+            thread_pool_size=thread_pool_size,
+        ),
+        name="openshift-resources",
+        trace_allocations=trace_allocations,
+    )
+    if as_json:
+        json.dump(report.to_dicts(), sys.stdout, indent=2)
+        print()
+    else:
+        print(report.to_table())
+
+
+if __name__ == "__main__":
+    main()
@@ -36,15 +36,17 @@ def get_keys_to_delete(accounts: Iterable[dict[str, Any]]) -> dict[str, list[str
 
 
 def should_run(state: State, keys_to_delete: dict[str, list[str]]) -> bool:
-    for account_name, keys in keys_to_delete.items():
-        if state.get(account_name, []) != keys:
-            return True
-    return False
+    current_keys = state.get_many(keys_to_delete)
+    return any(
+        current_keys.get(account_name, []) != keys
+        for account_name, keys in keys_to_delete.items()
+    )
 
 
 def update_state(state: State, keys_to_update: dict[str, list[str]]) -> None:
+    current_keys = state.get_many(keys_to_update)
     for account_name, keys in keys_to_update.items():
-        if state.get(account_name, []) != keys:
+        if current_keys.get(account_name, []) != keys:
             state.add(account_name, keys, force=True)
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 from dataclasses import dataclass
 from enum import Enum
 from functools import reduce
@@ -277,6 +278,204 @@ def extract_diffs(old_file_content: Any, new_file_content: Any) -> list[Diff]:
     return diffs
 
 
+class HashTree:
+    """
+    Structural hashes of the subtrees of JSON like documents. The hash of each
+    dict and list is calculated once and remembered. Lists are hashed
+    independent of their order, like DeepHash does.
+    """
+
+    def __init__(self) -> None:
+        # the documents are not modified while diffing, so ids are stable
+        self._hashes: dict[int, bytes] = {}
+
+    def hash(self, obj: Any) -> bytes:
+        """
+        Returns a token that is equal for structurally equal objects. Scalars
+        are represented by themselves, dicts and lists by a digest of the tokens
+        of their children. Tokens are self-delimiting, so concatenations of
+        them are unambiguous.
+        """
+        if not isinstance(obj, dict | list):
+            return f"\x02{type(obj).__name__}:{obj!r}\x00".encode()
+        if (h := self._hashes.get(id(obj))) is not None:
+            return h
+        digest = hashlib.blake2b(digest_size=16)
+        if isinstance(obj, dict):
+            digest.update(b"d")
+            for k, v in sorted((f"{k!r}\x00", v) for k, v in obj.items()):
+                digest.update(k.encode())
+                digest.update(self.hash(v))
+        else:
+            digest.update(b"l")
+            for token in sorted(self.hash(i) for i in obj):
+                digest.update(token)
+        h = b"\x01" + digest.digest()
+        self._hashes[id(obj)] = h
+        return h
+
+
+def _child_path(
+    path: jsonpath_ng.JSONPath, part: jsonpath_ng.JSONPath
+) -> jsonpath_ng.JSONPath:
+    return part if path == jsonpath_ng.Root() else path.child(part)
+
+
+def _diff_subtrees(
+    tree: HashTree,
+    path: jsonpath_ng.JSONPath,
+    old: Any,
+    new: Any,
+    diffs: list[Diff],
+) -> None:
+    if tree.hash(old) == tree.hash(new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k, v in old.items():
+            if k not in new:
+                diffs.append(
+                    Diff(
+                        path=_child_path(path, jsonpath_ng.Fields(k)),
+                        diff_type=DiffType.REMOVED,
+                        old=v,
+                        new=None,
+                    )
+                )
+            else:
+                _diff_subtrees(
+                    tree, _child_path(path, jsonpath_ng.Fields(k)), v, new[k], diffs
+                )
+        diffs.extend(
+            Diff(
+                path=_child_path(path, jsonpath_ng.Fields(k)),
+                diff_type=DiffType.ADDED,
+                old=None,
+                new=v,
+            )
+            for k, v in new.items()
+            if k not in old
+        )
+    elif isinstance(old, list) and isinstance(new, list):
+        _diff_lists(tree, path, old, new, diffs)
+    else:
+        diffs.append(Diff(path=path, diff_type=DiffType.CHANGED, old=old, new=new))
+
+
+def _diff_lists(
+    tree: HashTree,
+    path: jsonpath_ng.JSONPath,
+    old: list[Any],
+    new: list[Any],
+    diffs: list[Diff],
+) -> None:
+    """
+    Pairs the items of two lists, ignoring their order. Items are paired by
+    their identifier (see `compare_object_ctx_identifier`), by being equal or,
+    for items without identifier, by their position. Paired items at the same
+    position are diffed, all others are reported as removed and added, so the
+    index of each diff path is valid in the list it was found in.
+    """
+    unpaired_old = dict(enumerate(old))
+    unpaired_new = dict(enumerate(new))
+
+    old_by_identifier: dict[str, int] = {}
+    for i, item in enumerate(old):
+        if (identifier := _extract_identifier_from_object(item)) is not None:
+            old_by_identifier.setdefault(identifier, i)
+    for j, item in enumerate(new):
+        identifier = _extract_identifier_from_object(item)
+        i = old_by_identifier.pop(identifier, -1) if identifier is not None else -1
+        if i < 0:
+            continue
+        if i == j or tree.hash(old[i]) == tree.hash(item):
+            del unpaired_old[i], unpaired_new[j]
+            if i == j:
+                _diff_subtrees(
+                    tree, _child_path(path, jsonpath_ng.Index(j)), old[i], item, diffs
+                )
+
+    old_by_hash: dict[bytes, list[int]] = {}
+    for i, item in unpaired_old.items():
+        old_by_hash.setdefault(tree.hash(item), []).append(i)
+    for j, item in list(unpaired_new.items()):
+        if indexes := old_by_hash.get(tree.hash(item)):
+            del unpaired_old[indexes.pop(0)], unpaired_new[j]
+
+    for j, item in list(unpaired_new.items()):
+        if (
+            j in unpaired_old
+            and _extract_identifier_from_object(item) is None
+            and _extract_identifier_from_object(unpaired_old[j]) is None
+        ):
+            _diff_subtrees(
+                tree,
+                _child_path(path, jsonpath_ng.Index(j)),
+                unpaired_old.pop(j),
+                unpaired_new.pop(j),
+                diffs,
+            )
+
+    diffs.extend(
+        Diff(
+            path=_child_path(path, jsonpath_ng.Index(i)),
+            diff_type=DiffType.REMOVED,
+            old=item,
+            new=None,
+        )
+        for i, item in unpaired_old.items()
+    )
+    diffs.extend(
+        Diff(
+            path=_child_path(path, jsonpath_ng.Index(j)),
+            diff_type=DiffType.ADDED,
+            old=None,
+            new=item,
+        )
+        for j, item in unpaired_new.items()
+    )
+
+
+def extract_diffs_by_hash_tree(
+    old_file_content: Any, new_file_content: Any
+) -> list[Diff]:
+    """
+    Same as `extract_diffs`, but compares structural hashes of the subtrees
+    top-down and only descends into subtrees that differ. The runtime is linear
+    in the size of the documents, which makes it suitable for large documents
+    like desired states.
+
+    Items of lists are compared ignoring their order. Unlike with DeepDiff,
+    items that can not be paired by identifier, equality or position are not
+    matched by similarity, they are reported as removed and added.
+    """
+    diffs: list[Diff] = []
+    if old_file_content and new_file_content:
+        _diff_subtrees(
+            HashTree(), jsonpath_ng.Root(), old_file_content, new_file_content, diffs
+        )
+    elif old_file_content:
+        # file was deleted
+        diffs.append(
+            Diff(
+                path=jsonpath_ng.Root(),
+                diff_type=DiffType.REMOVED,
+                old=old_file_content,
+                new=None,
+            )
+        )
+    elif new_file_content:
+        # file was added
+        diffs.append(
+            Diff(
+                path=jsonpath_ng.Root(),
+                diff_type=DiffType.ADDED,
+                old=None,
+                new=new_file_content,
+            )
+        )
+    return diffs
+
+
 def deepdiff_path_to_jsonpath(deep_diff_path: str) -> jsonpath_ng.JSONPath:
     """
     deepdiff's way to describe a path within a data structure differs from jsonpath.
@@ -395,15 +395,16 @@ def realize(
     """
     Apply the changes in the state store and on the namespaces
     """
-    for cluster, namespace, types in inventory:
-        if inventory.errors(cluster, namespace):
-            continue
-        upd_managed = types.get(UPDATED_MANAGED, [])
-        if upd_managed:
-            key = state_key(cluster, namespace)
-            _LOG.debug(f"Updating state store: {key}: {upd_managed}")
-            if not dry_run:
-                state.add(key, upd_managed, force=True)
+    with state.batch():
+        for cluster, namespace, types in inventory:
+            if inventory.errors(cluster, namespace):
+                continue
+            upd_managed = types.get(UPDATED_MANAGED, [])
+            if upd_managed:
+                key = state_key(cluster, namespace)
+                _LOG.debug(f"Updating state store: {key}: {upd_managed}")
+                if not dry_run:
+                    state.add(key, upd_managed, force=True)
 
     # Potential exceptions will get raised up
     threaded.run(
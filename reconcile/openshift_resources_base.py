@@ -4,6 +4,7 @@ import hashlib
 import itertools
 import json
 import logging
+import os
 import re
 import sys
 from collections import defaultdict
@@ -44,12 +45,20 @@ from reconcile.utils import (
 from reconcile.utils.constants import DEFAULT_THREAD_POOL_SIZE
 from reconcile.utils.defer import defer
 from reconcile.utils.exceptions import FetchResourceError
+from reconcile.utils.jinja2.render_cache import (
+    VARIABLE_RENDERING_TEMPLATE_FUNCTIONS,
+    render_with_cache,
+)
+from reconcile.utils.jinja2.render_pool import pooled_template_function
 from reconcile.utils.jinja2.utils import (
     FetchSecretError,
     Jinja2TemplateCache,
+    jinja2_template_variables,
     process_extracurlyjinja2_template,
     process_jinja2_template,
+    vault_secret_cache_key,
 )
+from reconcile.utils.namespace_fingerprints import NamespaceFingerprints
 from reconcile.utils.oc import (
     OC_Map,
     OCClient,
@@ -68,6 +77,7 @@ from reconcile.utils.runtime.integration import DesiredStateShardConfig
 from reconcile.utils.secret_reader import SecretReader, SecretReaderBase
 from reconcile.utils.semver_helper import make_semver
 from reconcile.utils.sharding import is_in_shard
+from reconcile.utils.state import init_state
 from reconcile.utils.vault import (
     SecretVersionIsNoneError,
     SecretVersionNotFoundError,
@@ -237,6 +247,18 @@ KUBERNETES_SECRET_DATA_KEY_RE = "^[-._a-zA-Z0-9]+$"
 # Keys in vault secrets that do not need to land
 # into K8S secrets.
 VAULT_SECRETS_EXCLUDED_KEYS = {SECRET_UPDATED_AT}
+# must not exceed the connection pool of the VaultClient
+VAULT_SECRETS_PREFETCH_THREAD_POOL_SIZE = 20
+
+# only reconcile namespaces whose desired state changed since the last run,
+# see NamespaceFingerprints. all namespaces are reconciled at least once
+# per full sweep interval to detect drift on the clusters.
+INCREMENTAL_NAMESPACES_ENABLED = os.environ.get(
+    "OPENSHIFT_RESOURCES_INCREMENTAL_NAMESPACES", ""
+).lower() in {"true", "1", "yes"}
+INCREMENTAL_NAMESPACES_FULL_SWEEP_INTERVAL = int(
+    os.environ.get("OPENSHIFT_RESOURCES_FULL_SWEEP_INTERVAL", "3600")
+)
 _log_lock = Lock()
 
 
@@ -390,6 +412,26 @@ def fetch_provider_resource(
         raise FetchResourceError(str(e)) from None
 
 
+def _read_vault_secret(
+    secret_reader: SecretReaderBase,
+    path: str,
+    version: Any,
+    cache: Jinja2TemplateCache | None,
+) -> dict[str, str]:
+    if cache is None:
+        return secret_reader.read_all({"path": path, "version": version})
+    secret_data = cache.get_or_set(
+        Jinja2TemplateCache.VAULT,
+        vault_secret_cache_key(path, version),
+        lambda: secret_reader.read_all({"path": path, "version": version}),
+    )
+    if secret_data is None:
+        # a template lookup cached the secret as not found,
+        # read it again to raise the actual error
+        return secret_reader.read_all({"path": path, "version": version})
+    return secret_data
+
+
 def fetch_provider_vault_secret(
     path: str,
     version: str,
@@ -403,6 +445,7 @@ def fetch_provider_vault_secret(
     alertmanager_config_key: str = "alertmanager.yaml",
     settings: Mapping[str, Any] | None = None,
     secret_reader: SecretReaderBase | None = None,
+    cache: Jinja2TemplateCache | None = None,
 ) -> OR:
     if not secret_reader and not settings:
         raise Exception(
@@ -414,7 +457,7 @@ def fetch_provider_vault_secret(
         secret_reader = SecretReader(settings)
     raw_data = {
         k: v
-        for k, v in secret_reader.read_all({"path": path, "version": version}).items()
+        for k, v in _read_vault_secret(secret_reader, path, version, cache).items()
         if k not in VAULT_SECRETS_EXCLUDED_KEYS
     }
 
@@ -466,6 +509,7 @@ def fetch_provider_route(
     tls_path: str | None,
     tls_version: str | None,
     settings: Mapping | None = None,
+    cache: Jinja2TemplateCache | None = None,
 ) -> OR:
     path = resource["path"]
     openshift_resource = fetch_provider_resource(resource)
@@ -478,7 +522,7 @@ def fetch_provider_route(
     tls = openshift_resource.body["spec"]["tls"]
     # get tls fields from vault
     secret_reader = SecretReader(settings)
-    raw_data = secret_reader.read_all({"path": tls_path, "version": tls_version})
+    raw_data = _read_vault_secret(secret_reader, tls_path, tls_version, cache)
     valid_keys = [
         "termination",
         "insecureEdgeTerminationPolicy",
@@ -506,6 +550,97 @@ def fetch_provider_route(
     return openshift_resource
 
 
+def _sha256(data: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _render_cache_key(
+    resource: Mapping[str, Any],
+    parent: Mapping[str, Any],
+    body: str,
+    tvars: Mapping[str, Any],
+    extra_curly: bool,
+    template_variables: frozenset[str],
+) -> tuple[Any, ...]:
+    scope = None
+    if template_variables & ({"resource"} | VARIABLE_RENDERING_TEMPLATE_FUNCTIONS):
+        # the output depends on the resource and the namespace it is rendered for
+        scope = (
+            (parent.get("cluster") or {}).get("name"),
+            parent.get("name"),
+            _sha256({k: v for k, v in resource.items() if k != "namespace"}),
+        )
+    return (
+        resource["provider"],
+        resource["resource"]["path"],
+        extra_curly,
+        hashlib.sha256(body.encode("utf-8")).hexdigest(),
+        _sha256({k: v for k, v in tvars.items() if k != "resource"}),
+        scope,
+    )
+
+
+def cached_template_function(
+    tfunc: Callable[..., Any],
+    resource: Mapping[str, Any],
+    parent: Mapping[str, Any],
+    extra_curly: bool,
+    cache: Jinja2TemplateCache | None,
+) -> Callable[..., Any]:
+    """Wraps a template function with the render cache.
+
+    The same template with the same variables is often referenced from many
+    namespaces. Its output only depends on the resource and its namespace if the
+    template refers to them, so such templates are rendered once per run.
+    """
+    if cache is None:
+        return tfunc
+
+    def render(
+        body: str,
+        vars: dict[str, Any],
+        settings: Mapping[str, Any] | None = None,
+    ) -> Any:
+        try:
+            template_variables = jinja2_template_variables(body, extra_curly)
+            key = _render_cache_key(
+                resource, parent, body, vars, extra_curly, template_variables
+            )
+        except Exception:
+            # let the template function report invalid templates
+            return tfunc(body=body, vars=vars, settings=settings)
+        return render_with_cache(
+            cache,
+            key,
+            template_variables,
+            lambda: tfunc(body=body, vars=vars, settings=settings),
+        )
+
+    return render
+
+
+def resource_template_function(
+    resource: Mapping[str, Any],
+    parent: Mapping[str, Any],
+    extra_curly: bool,
+    cache: Jinja2TemplateCache | None,
+) -> Callable[..., Any]:
+    process_template = (
+        process_extracurlyjinja2_template if extra_curly else process_jinja2_template
+    )
+    return cached_template_function(
+        pooled_template_function(
+            functools.partial(process_template, cache=cache), extra_curly
+        ),
+        resource,
+        parent,
+        extra_curly=extra_curly,
+        cache=cache,
+    )
+
+
 def fetch_openshift_resource(
     resource: Mapping,
     parent: Mapping[str, Any],
@@ -552,9 +687,13 @@ def fetch_openshift_resource(
         tt = resource["type"]
         tt = "jinja2" if tt is None else tt
         if tt == "jinja2":
-            tfunc = functools.partial(process_jinja2_template, cache=cache)
+            tfunc = resource_template_function(
+                resource, parent, extra_curly=False, cache=cache
+            )
         elif tt == "extracurlyjinja2":
-            tfunc = functools.partial(process_extracurlyjinja2_template, cache=cache)
+            tfunc = resource_template_function(
+                resource, parent, extra_curly=True, cache=cache
+            )
         else:
             raise UnknownTemplateTypeError(tt)
         try:
@@ -602,6 +741,7 @@ def fetch_openshift_resource(
                 validate_alertmanager_config=validate_alertmanager_config,
                 alertmanager_config_key=alertmanager_config_key,
                 settings=settings,
+                cache=cache,
             )
         except (SecretVersionNotFoundError, SecretVersionIsNoneError) as e:
             raise FetchSecretError(e) from None
@@ -611,7 +751,7 @@ def fetch_openshift_resource(
         tls_path = resource["vault_tls_secret_path"]
         tls_version = resource["vault_tls_secret_version"]
         openshift_resource = fetch_provider_route(
-            resource["resource"], tls_path, tls_version, settings
+            resource["resource"], tls_path, tls_version, settings, cache=cache
         )
     elif provider == "prometheus-rule":
         path = resource["resource"]["path"]
@@ -628,9 +768,13 @@ def fetch_openshift_resource(
             tfunc = None
             tv = None
         elif tt == "resource-template-jinja2":
-            tfunc = functools.partial(process_jinja2_template, cache=cache)
+            tfunc = resource_template_function(
+                resource, parent, extra_curly=False, cache=cache
+            )
         elif tt == "resource-template-extracurlyjinja2":
-            tfunc = functools.partial(process_extracurlyjinja2_template, cache=cache)
+            tfunc = resource_template_function(
+                resource, parent, extra_curly=True, cache=cache
+            )
         else:
             raise UnknownTemplateTypeError(tt)
         try:
@@ -789,6 +933,55 @@ def fetch_states(
         logging.error(f"{spec} - exception: {e!s}")
 
 
+def _vault_secrets_to_prefetch(
+    specs: Iterable[ob.DesiredStateSpec],
+) -> set[tuple[str, Any]]:
+    secrets: set[tuple[str, Any]] = set()
+    for spec in specs:
+        provider = spec.resource["provider"]
+        if provider == "vault-secret":
+            secrets.add((spec.resource["path"], spec.resource["version"]))
+        elif provider == "route":
+            tls_path = spec.resource["vault_tls_secret_path"]
+            tls_version = spec.resource["vault_tls_secret_version"]
+            if tls_path is not None and tls_version is not None:
+                secrets.add((tls_path, tls_version))
+    return secrets
+
+
+def prefetch_vault_secrets(
+    specs: Iterable[ob.DesiredStateSpec],
+    cache: Jinja2TemplateCache,
+    settings: Mapping[str, Any] | None = None,
+    thread_pool_size: int = VAULT_SECRETS_PREFETCH_THREAD_POOL_SIZE,
+) -> None:
+    """Reads the vault secrets of all vault-secret and route providers into the
+    VAULT namespace of the Jinja2TemplateCache.
+
+    Reading the secrets one by one while rendering the desired state makes Vault
+    round trips the bottleneck of fetch_data. Failed reads are not cached, the
+    error is raised when the resource is fetched.
+    """
+    secrets = _vault_secrets_to_prefetch(specs)
+    if not secrets:
+        return
+    secret_reader = SecretReader(settings)
+
+    def _prefetch(secret: tuple[str, Any]) -> None:
+        path, version = secret
+        try:
+            cache.get_or_set(
+                Jinja2TemplateCache.VAULT,
+                vault_secret_cache_key(path, version),
+                lambda: secret_reader.read_all({"path": path, "version": version}),
+            )
+        except Exception as e:
+            _locked_debug_log(f"Prefetching vault secret {path} failed: {e}")
+
+    _locked_debug_log(f"Prefetching {len(secrets)} vault secrets")
+    threaded.run(_prefetch, sorted(secrets, key=str), thread_pool_size)
+
+
 def fetch_data(
     namespaces: Iterable[Mapping[str, Any]],
     thread_pool_size: int,
@@ -796,6 +989,7 @@ def fetch_data(
     cache: Jinja2TemplateCache,
     init_api_resources: bool = False,
     overrides: Iterable[str] | None = None,
+    fingerprints: NamespaceFingerprints | None = None,
 ) -> tuple[OC_Map, ResourceInventory]:
     ri = ResourceInventory()
     settings = queries.get_app_interface_settings()
@@ -815,6 +1009,37 @@ def fetch_data(
         override_managed_types=overrides,
         cluster_scope_resource_validation=True,
     )
+    desired_specs = [s for s in state_specs if isinstance(s, ob.DesiredStateSpec)]
+    prefetch_vault_secrets(desired_specs, cache=cache, settings=settings)
+    if fingerprints is not None:
+        # fetch the desired state first to only fetch the current state of
+        # namespaces whose desired state changed
+        threaded.run(
+            fetch_states,
+            desired_specs,
+            thread_pool_size,
+            ri=ri,
+            settings=settings,
+            cache=cache,
+        )
+        changed = fingerprints.changed_namespaces(ri)
+        unchanged = {
+            (s.cluster, s.namespace)
+            for s in state_specs
+            if (s.cluster, s.namespace) not in changed
+        }
+        logging.info(
+            f"Reconciling {len(changed)} namespaces with changed desired state, "
+            f"skipping {len(unchanged)} unchanged namespaces"
+        )
+        for cluster, namespace in unchanged:
+            ri.remove_namespace(cluster, namespace)
+        state_specs = [
+            s
+            for s in state_specs
+            if isinstance(s, ob.CurrentStateSpec)
+            and (s.cluster, s.namespace) in changed
+        ]
     threaded.run(
         fetch_states,
         state_specs,
@@ -955,6 +1180,16 @@ def run(
             "Exiting."
         )
         return None
+    fingerprints = None
+    if INCREMENTAL_NAMESPACES_ENABLED and not dry_run:
+        state = init_state(integration=QONTRACT_INTEGRATION)
+        if defer:
+            defer(state.cleanup)
+        fingerprints = NamespaceFingerprints(
+            state,
+            full_sweep_interval=INCREMENTAL_NAMESPACES_FULL_SWEEP_INTERVAL,
+            version=QONTRACT_INTEGRATION_VERSION,
+        )
     oc_map, ri = fetch_data(
         namespaces,
         thread_pool_size,
@@ -962,6 +1197,7 @@ def run(
         init_api_resources=init_api_resources,
         overrides=overrides,
         cache=Jinja2TemplateCache(),
+        fingerprints=fingerprints,
     )
     if defer:
         defer(oc_map.cleanup)
@@ -976,6 +1212,9 @@ def run(
     if ri.has_error_registered():
         sys.exit(1)
 
+    if fingerprints:
+        fingerprints.commit()
+
     return ri
 
 
@@ -1307,4 +1546,5 @@ def desired_state_shard_config() -> DesiredStateShardConfig:
         shard_arg_is_collection=True,
         shard_path_selectors={"state.*.shard"},
         sharded_run_review=lambda proposal: len(proposal.proposed_shards) <= 2,
+        detect_shards_by_fingerprint=True,
     )
@@ -4,13 +4,15 @@ from __future__ import annotations
 
 import contextlib
 import cProfile
+import json
 import logging
 import os
 import shlex
 import sys
 import time
+from dataclasses import dataclass
 from importlib import metadata
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NoReturn
 
 import click
 from prometheus_client import (
@@ -20,6 +22,7 @@ from prometheus_client import (
 from prometheus_client.exposition import basic_auth_handler
 
 from reconcile.status import ExitCodes
+from reconcile.utils import config, gql
 from reconcile.utils.metrics import (
     execution_counter,
     pushgateway_registry,
@@ -32,6 +35,7 @@ from reconcile.utils.runtime.environment import (
     LOG_DATEFMT,
     log_fmt,
 )
+from reconcile.utils.runtime.process_context import get_process_context
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -58,6 +62,9 @@ LOG_FILE = os.environ.get("LOG_FILE")
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 SLEEP_DURATION_SECS = int(os.environ.get("SLEEP_DURATION_SECS", "600"))
 SLEEP_ON_ERROR = int(os.environ.get("SLEEP_ON_ERROR", "10"))
+DAEMON_MODE = os.environ.get("DAEMON_MODE", "").lower() in {"true", "1", "yes"}
+BUNDLE_POLL_INTERVAL_SECS = int(os.environ.get("BUNDLE_POLL_INTERVAL_SECS", "0"))
+WORKER_INTEGRATIONS = os.environ.get("WORKER_INTEGRATIONS")
 
 PUSHGATEWAY_ENABLED = bool(os.environ.get("PUSHGATEWAY_ENABLED"))
 
@@ -194,6 +201,212 @@ def _push_gateway_basic_auth_handler(
     return basic_auth_handler(url, method, timeout, headers, data, username, password)
 
 
+def _current_bundle_sha() -> str | None:
+    try:
+        return gql.get_current_sha()
+    except Exception as e:
+        LOG.warning(f"Failed to get the current bundle sha: {e}")
+        return None
+
+
+def wait_for_bundle_change(
+    sha: str | None,
+    max_wait: int,
+    poll_interval: int,
+    get_sha: Callable[[], str | None] = _current_bundle_sha,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> None:
+    """
+    Waits up to `max_wait` seconds and returns early once the bundle sha,
+    polled every `poll_interval` seconds, differs from `sha`.
+    """
+    deadline = clock() + max_wait
+    while (remaining := deadline - clock()) > 0:
+        sleep(min(poll_interval, remaining))
+        current = get_sha()
+        if current is None:
+            continue
+        if sha is None:
+            sha = current
+        elif current != sha:
+            LOG.info(f"Bundle changed from {sha} to {current}")
+            return
+
+
+def run_integration_once(
+    command: click.Command, integration_name: str, extra_args: str | None
+) -> tuple[int, bool]:
+    """
+    Runs an integration once and records its metrics.
+
+    Returns the return code of the integration and whether it failed with an
+    unexpected exception.
+    """
+    args = build_entry_point_args(
+        command, CONFIG, DRY_RUN, integration_name, extra_args
+    )
+    failed = False
+    start_time = time.monotonic()
+    # Running the integration via Click, so we don't have to replicate
+    # the CLI logic here
+    execution_counter.labels(
+        integration=integration_name, shards=SHARDS, shard_id=SHARD_ID_LABEL
+    ).inc()
+    try:
+        with command.make_context(info_name=COMMAND_NAME, args=args) as ctx:  # type: ignore
+            ctx.ensure_object(dict)
+            with profiler as pr:
+                command.invoke(ctx)
+                if pr:
+                    LOG.info(f"Profiling data written to {PROFILE_DUMP_FILE}")
+                    pr.dump_stats(PROFILE_DUMP_FILE)
+            return_code = 0
+    # This is for when the integration explicitly
+    # calls sys.exit(N)
+    except SystemExit as exc_obj:
+        return_code = int(exc_obj.code)  # type: ignore[arg-type]
+    # We have to be generic since we don't know what can happen
+    # in the integrations, but we want to continue the loop anyway
+    except Exception:
+        failed = True
+        LOG.exception(f"Error running {COMMAND_NAME} {integration_name}")
+        return_code = ExitCodes.ERROR
+
+    time_spent = time.monotonic() - start_time
+
+    if not DAEMON_MODE or return_code == ExitCodes.ERROR:
+        get_process_context().invalidate()
+
+    run_time.labels(
+        integration=integration_name, shards=SHARDS, shard_id=SHARD_ID_LABEL
+    ).set(time_spent)
+    run_status.labels(
+        integration=integration_name, shards=SHARDS, shard_id=SHARD_ID_LABEL
+    ).set(return_code)
+
+    if PUSHGATEWAY_ENABLED:
+        try:
+            env = _get_pushgateway_env_vars()
+            pushgateway_run_time.labels(
+                integration=integration_name, shards=SHARDS, shard_id=SHARD_ID_LABEL
+            ).set(time_spent)
+            pushgateway_run_status.labels(
+                integration=integration_name, shards=SHARDS, shard_id=SHARD_ID_LABEL
+            ).set(return_code)
+
+            grouping_key = {
+                "integration": integration_name,
+                "shards": SHARDS,
+                "shard_id": SHARD_ID_LABEL,
+            }
+            push_to_gateway(
+                gateway=env["PUSHGATEWAY_URL"],
+                job="qontract-reconcile",
+                registry=pushgateway_registry,
+                handler=_push_gateway_basic_auth_handler,
+                grouping_key=grouping_key,
+            )
+        except PushgatewayBadConfigError:
+            LOG.exception("Error pushing to PushGateway:")
+            return_code = ExitCodes.ERROR
+
+    return return_code, failed
+
+
+@dataclass
+class WorkerIntegration:
+    name: str
+    extra_args: str | None = None
+    sleep_duration_secs: int = SLEEP_DURATION_SECS
+    sleep_on_error: int = SLEEP_ON_ERROR
+    next_run: float = 0.0
+    bundle_sha: str | None = None
+
+
+WORKER_INTEGRATION_KEYS = {
+    "name",
+    "extra_args",
+    "sleep_duration_secs",
+    "sleep_on_error",
+}
+
+
+def parse_worker_integrations(spec: str) -> list[WorkerIntegration]:
+    """
+    Parses WORKER_INTEGRATIONS, a JSON list of integration names or objects
+    with the keys name, extra_args, sleep_duration_secs and sleep_on_error.
+    """
+    integrations = []
+    for item in json.loads(spec):
+        if isinstance(item, str):
+            item = {"name": item}
+        if not isinstance(item, dict):
+            raise TypeError(f"WORKER_INTEGRATIONS: invalid integration {item!r}")
+        if unknown := item.keys() - WORKER_INTEGRATION_KEYS:
+            raise ValueError(
+                f"WORKER_INTEGRATIONS: unknown keys {sorted(unknown)} "
+                f"in {item!r}, allowed are {sorted(WORKER_INTEGRATION_KEYS)}"
+            )
+        if "name" not in item:
+            raise ValueError(f"WORKER_INTEGRATIONS: name missing in {item!r}")
+        integrations.append(WorkerIntegration(**item))
+    names = [i.name for i in integrations]
+    if not names:
+        raise ValueError("WORKER_INTEGRATIONS must list at least one integration")
+    if len(set(names)) != len(names):
+        raise ValueError(f"WORKER_INTEGRATIONS lists integrations twice: {names}")
+    return integrations
+
+
+def run_worker(
+    command: click.Command,
+    integrations: list[WorkerIntegration],
+    run: Callable[
+        [click.Command, str, str | None], tuple[int, bool]
+    ] = run_integration_once,
+    get_sha: Callable[[], str | None] = _current_bundle_sha,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> NoReturn:
+    """
+    Runs several integrations in this process, each on its own schedule.
+
+    Integrations run one at a time, whichever is due first. A failing
+    integration only delays its own next run by its sleep_on_error. With
+    BUNDLE_POLL_INTERVAL_SECS set, an integration is also due as soon as the
+    bundle changed since its last run. With RUN_ONCE set, every integration
+    runs once and the worker exits with the highest return code.
+    """
+    if RUN_ONCE:
+        sys.exit(max(run(command, i.name, i.extra_args)[0] for i in integrations))
+    sha: str | None = None
+    next_poll = 0.0
+    while True:
+        now = clock()
+        if BUNDLE_POLL_INTERVAL_SECS and now >= next_poll:
+            sha = get_sha() or sha
+            next_poll = clock() + BUNDLE_POLL_INTERVAL_SECS
+            now = clock()
+        due = [
+            i
+            for i in integrations
+            if i.next_run <= now or (sha and i.bundle_sha not in {None, sha})
+        ]
+        if not due:
+            wait = min(i.next_run for i in integrations) - now
+            if BUNDLE_POLL_INTERVAL_SECS:
+                wait = min(wait, next_poll - now)
+            sleep(max(wait, 0))
+            continue
+        integration = min(due, key=lambda i: i.next_run)
+        integration.bundle_sha = sha
+        _, failed = run(command, integration.name, integration.extra_args)
+        integration.next_run = clock() + (
+            integration.sleep_on_error if failed else integration.sleep_duration_secs
+        )
+
+
 def main() -> None:
     """
     This entry point script expects certain env variables
@@ -223,6 +436,22 @@ def main() -> None:
       amount of seconds to sleep between successful integration runs
     * SLEEP_ON_ERROR (default 10)
       amount of seconds to sleep before another integration run is started
+    * BUNDLE_POLL_INTERVAL_SECS (defaults to 0, disabled)
+      poll the sha of the bundle served by qontract-server every N seconds
+      while sleeping between runs, and start the next run as soon as it
+      changes. SLEEP_DURATION_SECS and SLEEP_ON_ERROR become the maximum time
+      between runs.
+    * DAEMON_MODE (defaults to false)
+      keep long-lived resources registered in the process context (clients,
+      settings) across integration runs, instead of releasing them after
+      each run. they are always released after a failed run.
+    * WORKER_INTEGRATIONS (optional)
+      run several integrations in this process instead of INTEGRATION_NAME,
+      each on its own schedule, sharing the process, its clients and, with
+      DAEMON_MODE, the process context. a JSON list of integration names or
+      objects with the keys name, extra_args, sleep_duration_secs and
+      sleep_on_error, e.g.
+      '["ldap-users", {"name": "github-owners", "sleep_duration_secs": 300}]'
     * PUSHGATEWAY_ENABLED (defaults to false)
       send metrics to a Prometheus Pushgateway after the run. In expects
       "PUSHGATEWAY_USERNAME", "PUSHGATEWAY_PASSWORD" and "PUSHGATEWAY_URL" to be defined.
@@ -236,82 +465,31 @@ def main() -> None:
         print(main.__doc__)
         sys.exit(0)
 
-    if not INTEGRATION_NAME:
-        raise ValueError("INTEGRATION_NAME env variable is required")
-
     start_http_server(int(PROMETHEUS_PORT))
 
     command = build_entry_point_func(COMMAND_NAME)
+    if BUNDLE_POLL_INTERVAL_SECS:
+        config.init_from_toml(CONFIG)
+    process_context = get_process_context()
+    process_context.active = True
+    if WORKER_INTEGRATIONS:
+        run_worker(command, parse_worker_integrations(WORKER_INTEGRATIONS))
+    if not INTEGRATION_NAME:
+        raise ValueError("INTEGRATION_NAME env variable is required")
     while True:
-        args = build_entry_point_args(
-            command, CONFIG, DRY_RUN, INTEGRATION_NAME, INTEGRATION_EXTRA_ARGS
+        bundle_sha = _current_bundle_sha() if BUNDLE_POLL_INTERVAL_SECS else None
+        return_code, failed = run_integration_once(
+            command, INTEGRATION_NAME, INTEGRATION_EXTRA_ARGS
         )
-        sleep = SLEEP_DURATION_SECS
-        start_time = time.monotonic()
-        # Running the integration via Click, so we don't have to replicate
-        # the CLI logic here
-        execution_counter.labels(
-            integration=INTEGRATION_NAME, shards=SHARDS, shard_id=SHARD_ID_LABEL
-        ).inc()
-        try:
-            with command.make_context(info_name=COMMAND_NAME, args=args) as ctx:  # type: ignore
-                ctx.ensure_object(dict)
-                with profiler as pr:
-                    command.invoke(ctx)
-                    if pr:
-                        LOG.info(f"Profiling data written to {PROFILE_DUMP_FILE}")
-                        pr.dump_stats(PROFILE_DUMP_FILE)
-                return_code = 0
-        # This is for when the integration explicitly
-        # calls sys.exit(N)
-        except SystemExit as exc_obj:
-            return_code = int(exc_obj.code)  # type: ignore[arg-type]
-        # We have to be generic since we don't know what can happen
-        # in the integrations, but we want to continue the loop anyway
-        except Exception:
-            sleep = SLEEP_ON_ERROR
-            LOG.exception(f"Error running {COMMAND_NAME}")
-            return_code = ExitCodes.ERROR
-
-        time_spent = time.monotonic() - start_time
-
-        run_time.labels(
-            integration=INTEGRATION_NAME, shards=SHARDS, shard_id=SHARD_ID_LABEL
-        ).set(time_spent)
-        run_status.labels(
-            integration=INTEGRATION_NAME, shards=SHARDS, shard_id=SHARD_ID_LABEL
-        ).set(return_code)
-
-        if PUSHGATEWAY_ENABLED:
-            try:
-                env = _get_pushgateway_env_vars()
-                pushgateway_run_time.labels(
-                    integration=INTEGRATION_NAME, shards=SHARDS, shard_id=SHARD_ID_LABEL
-                ).set(time_spent)
-                pushgateway_run_status.labels(
-                    integration=INTEGRATION_NAME, shards=SHARDS, shard_id=SHARD_ID_LABEL
-                ).set(return_code)
-
-                grouping_key = {
-                    "integration": INTEGRATION_NAME,
-                    "shards": SHARDS,
-                    "shard_id": SHARD_ID_LABEL,
-                }
-                push_to_gateway(
-                    gateway=env["PUSHGATEWAY_URL"],
-                    job="qontract-reconcile",
-                    registry=pushgateway_registry,
-                    handler=_push_gateway_basic_auth_handler,
-                    grouping_key=grouping_key,
-                )
-            except PushgatewayBadConfigError:
-                LOG.exception("Error pushing to PushGateway:")
-                return_code = ExitCodes.ERROR
 
         if RUN_ONCE:
             sys.exit(return_code)
 
-        time.sleep(int(sleep))
+        sleep = SLEEP_ON_ERROR if failed else SLEEP_DURATION_SECS
+        if BUNDLE_POLL_INTERVAL_SECS:
+            wait_for_bundle_change(bundle_sha, sleep, BUNDLE_POLL_INTERVAL_SECS)
+        else:
+            time.sleep(sleep)
 
 
 if __name__ == "__main__":
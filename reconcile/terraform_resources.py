@@ -601,4 +601,5 @@ def desired_state_shard_config() -> DesiredStateShardConfig:
         shard_arg_is_collection=True,
         shard_path_selectors={"state.*.shard"},
         sharded_run_review=lambda proposal: len(proposal.proposed_shards) <= 2,
+        detect_shards_by_fingerprint=True,
     )
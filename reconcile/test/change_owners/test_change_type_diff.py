@@ -1,3 +1,5 @@
+from typing import Any
+
 import jsonpath_ng
 import pytest
 
@@ -6,6 +8,7 @@ from reconcile.change_owners.diff import (
     Diff,
     DiffType,
     deepdiff_path_to_jsonpath,
+    extract_diffs_by_hash_tree,
 )
 from reconcile.test.change_owners.fixtures import (
     build_bundle_datafile_change,
@@ -801,3 +804,81 @@ def test_bundle_change_resource_file_dict_value_added() -> None:
     assert bundle_change.diff_coverage[0].diff.diff_type == DiffType.ADDED
     assert bundle_change.diff_coverage[0].diff.old is None
     assert bundle_change.diff_coverage[0].diff.new == "new_value"
+
+
+#
+# hash tree diff
+#
+
+
+def _diff_summary(diffs: list[Diff]) -> list[str]:
+    return sorted(repr((d.path_str(), d.diff_type, d.old, d.new)) for d in diffs)
+
+
+@pytest.mark.parametrize(
+    "old,new,expected",
+    [
+        ({"a": 1, "b": [1, 2]}, {"b": [2, 1], "a": 1}, []),
+        (
+            {"a": {"b": 1, "c": 2}},
+            {"a": {"b": 2, "d": 3}},
+            [
+                ("a.b", DiffType.CHANGED, 1, 2),
+                ("a.c", DiffType.REMOVED, 2, None),
+                ("a.d", DiffType.ADDED, None, 3),
+            ],
+        ),
+        ({"a": 1}, {"a": "1"}, [("a", DiffType.CHANGED, 1, "1")]),
+        ({"a": 1}, {"a": True}, [("a", DiffType.CHANGED, 1, True)]),
+        (
+            {"l": [{"v": 1}, {"v": 2}]},
+            {"l": [{"v": 1}, {"v": 3}]},
+            [("l.[1].v", DiffType.CHANGED, 2, 3)],
+        ),
+        (
+            {"l": [1, 2]},
+            {"l": [3, 1, 4]},
+            [
+                ("l.[1]", DiffType.REMOVED, 2, None),
+                ("l.[0]", DiffType.ADDED, None, 3),
+                ("l.[2]", DiffType.ADDED, None, 4),
+            ],
+        ),
+        (
+            {"l": [{"__identifier": "a", "v": 1}, {"__identifier": "b", "v": 1}]},
+            {"l": [{"__identifier": "a", "v": 2}, {"__identifier": "c", "v": 1}]},
+            [
+                ("l.[0].v", DiffType.CHANGED, 1, 2),
+                ("l.[1]", DiffType.REMOVED, {"__identifier": "b", "v": 1}, None),
+                ("l.[1]", DiffType.ADDED, None, {"__identifier": "c", "v": 1}),
+            ],
+        ),
+        (
+            {"l": [{"__identifier": "a", "v": 1}, {"__identifier": "b", "v": 1}]},
+            {"l": [{"__identifier": "b", "v": 2}]},
+            [
+                ("l.[0]", DiffType.REMOVED, {"__identifier": "a", "v": 1}, None),
+                ("l.[1]", DiffType.REMOVED, {"__identifier": "b", "v": 1}, None),
+                ("l.[0]", DiffType.ADDED, None, {"__identifier": "b", "v": 2}),
+            ],
+        ),
+        ({}, {"a": 1}, [("$", DiffType.ADDED, None, {"a": 1})]),
+        ({"a": 1}, {}, [("$", DiffType.REMOVED, {"a": 1}, None)]),
+    ],
+)
+def test_extract_diffs_by_hash_tree(
+    old: Any, new: Any, expected: list[tuple[str, DiffType, Any, Any]]
+) -> None:
+    assert _diff_summary(extract_diffs_by_hash_tree(old, new)) == sorted(
+        map(repr, expected)
+    )
+
+
+def test_extract_diffs_by_hash_tree_paths_are_valid() -> None:
+    old = {"l": [{"__identifier": "a", "v": 1}, {"__identifier": "b", "v": 1}]}
+    new = {"l": [{"__identifier": "b", "v": 2}, {"__identifier": "a", "v": 1}]}
+
+    for d in extract_diffs_by_hash_tree(old, new):
+        data = old if d.diff_type == DiffType.REMOVED else new
+        value = d.old if d.diff_type == DiffType.REMOVED else d.new
+        assert d.path.find(data)[0].value == value
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from reconcile.utils.runtime.process_context import ProcessContext
+
+
+@pytest.fixture
+def context() -> ProcessContext:
+    context = ProcessContext()
+    context.active = True
+    return context
+
+
+def test_inactive_context_creates_resources() -> None:
+    context = ProcessContext()
+    factory = MagicMock(side_effect=object)
+
+    assert context.get_or_create("r", factory) is not context.get_or_create(
+        "r", factory
+    )
+
+
+def test_get_or_create_reuses_resource(context: ProcessContext) -> None:
+    factory = MagicMock(side_effect=object)
+
+    assert context.get_or_create("r", factory) is context.get_or_create("r", factory)
+    factory.assert_called_once_with()
+
+
+def test_get_or_create_key_changed(context: ProcessContext) -> None:
+    close = MagicMock()
+    first = context.get_or_create("r", object, key="creds-1", close=close)
+
+    second = context.get_or_create("r", object, key="creds-2", close=close)
+
+    assert first is not second
+    close.assert_called_once_with(first)
+
+
+def test_set_bundle(context: ProcessContext) -> None:
+    context.set_bundle("sha-1")
+    per_bundle = context.get_or_create("per-bundle", object, per_bundle=True)
+    other = context.get_or_create("other", object)
+
+    context.set_bundle("sha-1")
+    assert context.get_or_create("per-bundle", object, per_bundle=True) is per_bundle
+
+    context.set_bundle("sha-2")
+    assert (
+        context.get_or_create("per-bundle", object, per_bundle=True) is not per_bundle
+    )
+    assert context.get_or_create("other", object) is other
+
+
+def test_invalidate(context: ProcessContext) -> None:
+    close = MagicMock(side_effect=Exception("already closed"))
+    first = context.get_or_create("r", object, close=close)
+
+    context.invalidate()
+
+    assert context.get_or_create("r", object) is not first
+    close.assert_called_once_with(first)
+
+
+def test_slow_factory_does_not_block_other_resources(context: ProcessContext) -> None:
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow() -> object:
+        started.set()
+        release.wait(5)
+        return object()
+
+    thread = threading.Thread(target=context.get_or_create, args=("slow", slow))
+    thread.start()
+    started.wait(5)
+
+    assert context.get_or_create("other", lambda: "value") == "value"
+    # the slow resource is still being created
+    assert thread.is_alive()
+
+    release.set()
+    thread.join()
+
+
+def test_ttl() -> None:
+    now = 0.0
+    context = ProcessContext(now=lambda: now)
+    context.active = True
+    first = context.get_or_create("r", object, ttl=10)
+
+    now = 9
+    assert context.get_or_create("r", object, ttl=10) is first
+    now = 10
+    assert context.get_or_create("r", object, ttl=10) is not first
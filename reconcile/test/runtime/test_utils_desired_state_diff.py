@@ -1,27 +1,22 @@
 from __future__ import annotations
 
-from time import sleep
+import dataclasses
 from typing import TYPE_CHECKING, Any
 
-import jsonpath_ng
 import pytest
 
 from reconcile.change_owners.diff import (
     IDENTIFIER_FIELD_NAME,
-    Diff,
-    DiffType,
 )
 from reconcile.utils.runtime import desired_state_diff
 from reconcile.utils.runtime.desired_state_diff import (
-    DiffDetectionFailureError,
-    DiffDetectionTimeoutError,
     build_desired_state_diff,
-    extract_diffs_with_timeout,
+    find_changed_shards_by_fingerprint,
 )
 from reconcile.utils.runtime.integration import DesiredStateShardConfig
 
 if TYPE_CHECKING:
-    from pytest_mock.plugin import MockerFixture
+    from pytest_mock import MockerFixture
 
     from reconcile.test.runtime.fixtures import (
         ShardableTestIntegration,
@@ -99,41 +94,14 @@ def test_desired_state_diff_building_shardable_integration(
     assert desired_state_diff.affected_shards == {"b"}
 
 
-def diff_extration_with_3_second_sleep(
-    old_file_content: Any, new_file_content: Any
-) -> list[Diff]:
-    sleep(3)
-    return [
-        Diff(
-            diff_type=DiffType.CHANGED,
-            path=jsonpath_ng.parse("shards[1].value"),
-            old="old",
-            new="new",
-        )
-    ]
-
-
-def diff_extration_with_endless_recursion(
-    old_file_content: Any, new_file_content: Any
-) -> list[Diff]:
-    return diff_extration_with_endless_recursion(old_file_content, new_file_content)
-
-
-def diff_extration_with_exception(
-    old_file_content: Any, new_file_content: Any
-) -> list[Diff]:
-    raise Exception("something went wrong")
-
-
-def test_desired_state_diff_building_time(
-    mocker: MockerFixture, shardable_test_integration: ShardableTestIntegration
+def test_desired_state_diff_building_shardable_integration_by_fingerprint(
+    shardable_test_integration: ShardableTestIntegration,
 ) -> None:
-    extract_diffs_with_timeout_mock = mocker.patch.object(
-        desired_state_diff, "extract_diffs_with_timeout"
-    )
-    extract_diffs_with_timeout_mock.side_effect = DiffDetectionTimeoutError()
     diff = build_desired_state_diff(
-        shardable_test_integration.get_desired_state_shard_config(),
+        dataclasses.replace(
+            shardable_test_integration.get_desired_state_shard_config(),
+            detect_shards_by_fingerprint=True,
+        ),
         previous_desired_state={
             "shards": [
                 {"shard": "a", "value": "old"},
@@ -147,75 +115,38 @@ def test_desired_state_diff_building_time(
             ]
         },
     )
-    assert diff.affected_shards == set()
-
-
-#
-# extract diffs
-#
+    assert diff.affected_shards == {"b"}
 
 
-def test_extract_diffs_with_timeout() -> None:
-    """
-    test timeout behaviour of diff extraction
-    """
-    previous_desired_state = {
-        "shards": [
-            {"shard": "a", "value": "old"},
-            {"shard": "b", "value": "old"},
-        ]
-    }
-    current_desired_state = {
-        "shards": [
-            {"shard": "a", "value": "old"},
-            {"shard": "b", "value": "new"},
-        ]
-    }
-
-    # the timeout is lower than the extraction duration -> TIMEOUT
-    with pytest.raises(DiffDetectionTimeoutError):
-        extract_diffs_with_timeout(
-            diff_extration_with_3_second_sleep,
-            previous_desired_state=previous_desired_state,
-            current_desired_state=current_desired_state,
-            timeout_seconds=1,
-        )
-
-    # the timeout is higher than the extraction duration -> NO TIMEOUT
-    diffs = extract_diffs_with_timeout(
-        diff_extration_with_3_second_sleep,
-        previous_desired_state=previous_desired_state,
-        current_desired_state=current_desired_state,
-        timeout_seconds=5,
+@pytest.mark.parametrize(
+    "detect_shards_by_fingerprint, failing_function",
+    [
+        (False, "extract_diffs_by_hash_tree"),
+        (False, "find_changed_shards"),
+        (True, "HashTree"),
+        (True, "find_changed_shards_by_fingerprint"),
+    ],
+)
+def test_desired_state_diff_building_shard_detection_failure(
+    shardable_test_integration: ShardableTestIntegration,
+    mocker: MockerFixture,
+    failing_function: str,
+    detect_shards_by_fingerprint: bool,
+) -> None:
+    mocker.patch.object(
+        desired_state_diff, failing_function, side_effect=RecursionError()
     )
-    assert diffs
-    assert isinstance(diffs[0], Diff)
-
-
-def test_extract_diffs_with_recursion_issue() -> None:
-    """
-    test if a max recursion issue is caught properly
-    """
-    with pytest.raises(DiffDetectionFailureError):
-        extract_diffs_with_timeout(
-            diff_extration_with_endless_recursion,
-            previous_desired_state={},
-            current_desired_state={},
-            timeout_seconds=100,
-        )
-
-
-def test_extract_diffs_with_exception() -> None:
-    """
-    test with exception
-    """
-    with pytest.raises(DiffDetectionFailureError):
-        extract_diffs_with_timeout(
-            diff_extration_with_exception,
-            previous_desired_state={},
-            current_desired_state={},
-            timeout_seconds=100,
-        )
+    diff = build_desired_state_diff(
+        dataclasses.replace(
+            shardable_test_integration.get_desired_state_shard_config(),
+            detect_shards_by_fingerprint=detect_shards_by_fingerprint,
+        ),
+        previous_desired_state={"shards": [{"shard": "a", "value": "old"}]},
+        current_desired_state={"shards": [{"shard": "a", "value": "new"}]},
+    )
+    # continue without sharding
+    assert diff.diff_found
+    assert diff.affected_shards == set()
 
 
 #
@@ -373,3 +304,68 @@ def test_find_changed_shards_no_diff() -> None:
         ).affected_shards
         == set()
     )
+
+
+#
+# find changed shards by fingerprint
+#
+
+
+@pytest.mark.parametrize(
+    "shard_path_selectors,previous,current,expected",
+    [
+        # removed, changed, added
+        (
+            {"data[*].shard"},
+            {"data": [{"shard": "a", "v": 1}, {"shard": "b", "v": 1}]},
+            {"data": [{"shard": "b", "v": 2}, {"shard": "c", "v": 1}]},
+            {"a", "b", "c"},
+        ),
+        # moved to another shard
+        (
+            {"state.*.shard"},
+            {"state": {"x": {"shard": "a"}, "y": {"shard": "b"}}},
+            {"state": {"x": {"shard": "a"}, "y": {"shard": "c"}}},
+            {"b", "c"},
+        ),
+        # reordered
+        (
+            {"data[*].shard"},
+            {"data": [{"shard": "a"}, {"shard": "b"}]},
+            {"data": [{"shard": "b"}, {"shard": "a"}]},
+            set(),
+        ),
+        # change outside of any shard
+        (
+            {"data[*].shard"},
+            {"data": [{"shard": "a"}], "other": 1},
+            {"data": [{"shard": "a"}], "other": 2},
+            set(),
+        ),
+        # changes in the element owning a nested shard affect it
+        (
+            {"roles[*].groups[*].account"},
+            {"roles": [{"name": "r", "groups": [{"account": "a"}, {"account": "b"}]}]},
+            {"roles": [{"name": "s", "groups": [{"account": "a"}, {"account": "b"}]}]},
+            {"a", "b"},
+        ),
+    ],
+)
+def test_find_changed_shards_by_fingerprint(
+    shard_path_selectors: set[str],
+    previous: dict[str, Any],
+    current: dict[str, Any],
+    expected: set[str],
+) -> None:
+    sharding_config = DesiredStateShardConfig(
+        shard_arg_name="shard",
+        shard_path_selectors=shard_path_selectors,
+        sharded_run_review=lambda x: True,
+        detect_shards_by_fingerprint=True,
+    )
+
+    assert find_changed_shards_by_fingerprint(previous, current, sharding_config) == (
+        expected
+    )
+    desired_state_diff = build_desired_state_diff(sharding_config, previous, current)
+    assert desired_state_diff.affected_shards == expected
@@ -563,3 +563,193 @@ def test_fetch_current_state_skips_argocd_managed(oc_cs1: oc.OCClient) -> None:
 
     _, _, _, resource = next(iter(ri))
     assert len(resource["current"]) == 0
+
+
+def _template_resource(content: str, variables: str | None = None) -> dict[str, Any]:
+    return {
+        "provider": "resource-template",
+        "type": "jinja2",
+        "variables": variables,
+        "resource": {"path": "/cm.yml", "content": content, "schema": None},
+    }
+
+
+CM_TEMPLATE = """
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: {{ name }}
+data:
+  value: "{{ value }}"
+"""
+
+NS_CM_TEMPLATE = """
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: cm
+data:
+  namespace: "{{ resource.namespace.name }}"
+"""
+
+
+def _namespace(name: str) -> dict[str, Any]:
+    return {"name": name, "cluster": {"name": "cs1"}}
+
+
+def test_fetch_openshift_resource_renders_shared_template_once(
+    mocker: MockerFixture,
+) -> None:
+    render = mocker.spy(orb, "process_jinja2_template")
+    cache = orb.Jinja2TemplateCache()
+    variables = '{"name": "cm", "value": "v"}'
+
+    results = [
+        orb.fetch_openshift_resource(
+            _template_resource(CM_TEMPLATE, variables), _namespace(ns), cache=cache
+        )
+        for ns in ("ns1", "ns2")
+    ]
+
+    assert render.call_count == 1
+    assert [r.body["data"] for r in results] == [{"value": "v"}, {"value": "v"}]
+
+
+def test_fetch_openshift_resource_render_cache_respects_variables(
+    mocker: MockerFixture,
+) -> None:
+    render = mocker.spy(orb, "process_jinja2_template")
+    cache = orb.Jinja2TemplateCache()
+
+    results = [
+        orb.fetch_openshift_resource(
+            _template_resource(CM_TEMPLATE, f'{{"name": "cm", "value": "{v}"}}'),
+            _namespace("ns1"),
+            cache=cache,
+        )
+        for v in ("a", "b")
+    ]
+
+    assert render.call_count == 2
+    assert [r.body["data"] for r in results] == [{"value": "a"}, {"value": "b"}]
+
+
+def test_fetch_openshift_resource_render_cache_scoped_to_namespace(
+    mocker: MockerFixture,
+) -> None:
+    render = mocker.spy(orb, "process_jinja2_template")
+    cache = orb.Jinja2TemplateCache()
+
+    results = [
+        orb.fetch_openshift_resource(
+            _template_resource(NS_CM_TEMPLATE), _namespace(ns), cache=cache
+        )
+        for ns in ("ns1", "ns2", "ns1")
+    ]
+
+    assert render.call_count == 2
+    assert [r.body["data"]["namespace"] for r in results] == ["ns1", "ns2", "ns1"]
+
+
+def test_fetch_openshift_resource_without_cache_does_not_memoize(
+    mocker: MockerFixture,
+) -> None:
+    render = mocker.spy(orb, "process_jinja2_template")
+    variables = '{"name": "cm", "value": "v"}'
+
+    for ns in ("ns1", "ns2"):
+        orb.fetch_openshift_resource(
+            _template_resource(CM_TEMPLATE, variables), _namespace(ns)
+        )
+
+    assert render.call_count == 2
+
+
+SETTINGS = {"vault": True}
+
+
+def _vault_secret_spec(path: str, version: int = 1) -> ob.DesiredStateSpec:
+    return ob.DesiredStateSpec(
+        oc=Mock(),
+        cluster="cs1",
+        namespace="ns1",
+        resource={
+            "provider": "vault-secret",
+            "path": path,
+            "version": version,
+            "name": None,
+            "labels": None,
+            "annotations": None,
+            "type": None,
+        },
+        parent=_namespace("ns1"),
+    )
+
+
+def test_prefetch_vault_secrets_serves_fetch_from_cache(
+    mocker: MockerFixture,
+) -> None:
+    secret_reader = mocker.patch.object(orb, "SecretReader", autospec=True)
+    read_all = secret_reader.return_value.read_all
+    read_all.return_value = {"key": "value"}
+    cache = orb.Jinja2TemplateCache()
+    specs = [_vault_secret_spec("app/a"), _vault_secret_spec("app/a")]
+
+    orb.prefetch_vault_secrets(specs, cache=cache, settings=SETTINGS)
+    results = [
+        orb.fetch_openshift_resource(spec.resource, spec.parent, SETTINGS, cache=cache)
+        for spec in specs
+    ]
+
+    read_all.assert_called_once_with({"path": "app/a", "version": 1})
+    assert [r.body["data"] for r in results] == [{"key": "dmFsdWU="}] * 2
+
+
+def test_prefetch_vault_secrets_defers_errors(mocker: MockerFixture) -> None:
+    secret_reader = mocker.patch.object(orb, "SecretReader", autospec=True)
+    read_all = secret_reader.return_value.read_all
+    read_all.side_effect = orb.SecretVersionNotFoundError("version not found")
+    cache = orb.Jinja2TemplateCache()
+    spec = _vault_secret_spec("app/a", version=2)
+
+    orb.prefetch_vault_secrets([spec], cache=cache, settings=SETTINGS)
+
+    with pytest.raises(orb.FetchSecretError):
+        orb.fetch_openshift_resource(spec.resource, spec.parent, SETTINGS, cache=cache)
+    assert read_all.call_count == 2
+
+
+def test_fetch_data_skips_unchanged_namespaces(mocker: MockerFixture) -> None:
+    mocker.patch.object(orb, "OC_Map")
+    mocker.patch.object(orb.queries, "get_app_interface_settings", return_value={})
+    mocker.patch.object(orb, "prefetch_vault_secrets")
+    fetch_states = mocker.patch.object(orb, "fetch_states")
+    current_specs = [
+        CurrentStateSpec(
+            oc=Mock(),
+            cluster="cs1",
+            namespace=ns,
+            kind="ConfigMap",
+            resource_names=None,
+        )
+        for ns in ("ns1", "ns2")
+    ]
+    desired_specs = [_vault_secret_spec("app/a")]
+    mocker.patch.object(
+        orb.ob, "init_specs_to_fetch", return_value=current_specs + desired_specs
+    )
+    fingerprints = Mock()
+    fingerprints.changed_namespaces.return_value = {("cs1", "ns1")}
+
+    orb.fetch_data(
+        [],
+        thread_pool_size=1,
+        internal=None,
+        cache=orb.Jinja2TemplateCache(),
+        fingerprints=fingerprints,
+    )
+
+    assert [c.args[0] for c in fetch_states.call_args_list] == [
+        desired_specs[0],
+        current_specs[0],
+    ]
@@ -1,8 +1,21 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 import click
+import pytest
+
+from reconcile import run_integration
+from reconcile.run_integration import (
+    WorkerIntegration,
+    build_entry_point_args,
+    parse_worker_integrations,
+    run_worker,
+    wait_for_bundle_change,
+)
 
-from reconcile.run_integration import build_entry_point_args
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 
 @click.group()
@@ -48,3 +61,190 @@ def test_build_entry_point_args_keeps_quoted_arg_with_spaces_as_one_token() -> N
         "--keycloak-instances",
         '{"url": "https://example.com", "secret": {"a": "b"}}',
     ]
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_wait_for_bundle_change_returns_on_new_sha() -> None:
+    fake = FakeTime()
+    shas = iter(["a", "a", "b"])
+
+    wait_for_bundle_change(
+        "a", 60, 10, get_sha=lambda: next(shas), sleep=fake.sleep, clock=fake.clock
+    )
+
+    assert fake.now == 30
+
+
+def test_wait_for_bundle_change_waits_at_most_max_wait() -> None:
+    fake = FakeTime()
+
+    wait_for_bundle_change(
+        "a", 25, 10, get_sha=lambda: "a", sleep=fake.sleep, clock=fake.clock
+    )
+
+    assert fake.now == 25
+
+
+def test_wait_for_bundle_change_without_initial_sha() -> None:
+    fake = FakeTime()
+    shas = iter([None, "a", "a", "b"])
+
+    wait_for_bundle_change(
+        None, 60, 10, get_sha=lambda: next(shas), sleep=fake.sleep, clock=fake.clock
+    )
+
+    assert fake.now == 40
+
+
+def test_parse_worker_integrations() -> None:
+    integrations = parse_worker_integrations(
+        '["a", {"name": "b", "extra_args": "--foo", "sleep_duration_secs": 5}]'
+    )
+
+    assert integrations[0].name == "a"
+    assert integrations[1] == WorkerIntegration(
+        name="b",
+        extra_args="--foo",
+        sleep_duration_secs=5,
+        sleep_on_error=integrations[0].sleep_on_error,
+    )
+
+
+def test_parse_worker_integrations_duplicates() -> None:
+    with pytest.raises(ValueError):
+        parse_worker_integrations('["a", {"name": "a"}]')
+
+
+@pytest.mark.parametrize(
+    "spec, error",
+    [
+        ('[{"name": "a", "sleep_duration": 5}]', "sleep_duration"),
+        ('[{"name": "a", "next_run": 5}]', "next_run"),
+        ('[{"extra_args": "--foo"}]', "name missing"),
+    ],
+)
+def test_parse_worker_integrations_invalid(spec: str, error: str) -> None:
+    with pytest.raises(ValueError, match=error):
+        parse_worker_integrations(spec)
+
+
+def test_parse_worker_integrations_invalid_type() -> None:
+    with pytest.raises(TypeError):
+        parse_worker_integrations("[1]")
+
+
+class StopWorkerError(Exception):
+    pass
+
+
+def run_worker_until(
+    integrations: list[WorkerIntegration],
+    fake: FakeTime,
+    until: float,
+    failing: set[str] | None = None,
+    get_sha: Callable[[], str | None] = lambda: None,
+) -> list[tuple[float, str]]:
+    runs: list[tuple[float, str]] = []
+
+    def run(
+        command: click.Command, name: str, extra_args: str | None
+    ) -> tuple[int, bool]:
+        if fake.now > until:
+            raise StopWorkerError
+        runs.append((fake.now, name))
+        return 0, name in (failing or set())
+
+    with pytest.raises(StopWorkerError):
+        run_worker(
+            _cli,
+            integrations,
+            run=run,
+            get_sha=get_sha,
+            sleep=fake.sleep,
+            clock=fake.clock,
+        )
+    return runs
+
+
+def test_run_worker_independent_schedules() -> None:
+    fake = FakeTime()
+    integrations = [
+        WorkerIntegration(name="a", sleep_duration_secs=10),
+        WorkerIntegration(name="b", sleep_duration_secs=25),
+    ]
+
+    runs = run_worker_until(integrations, fake, until=50)
+
+    assert [name for _, name in runs if name == "a"] == ["a"] * 6
+    assert [t for t, name in runs if name == "b"] == [0, 25, 50]
+
+
+def test_run_worker_failure_isolation() -> None:
+    fake = FakeTime()
+    integrations = [
+        WorkerIntegration(name="a", sleep_duration_secs=10),
+        WorkerIntegration(name="b", sleep_duration_secs=10, sleep_on_error=1),
+    ]
+
+    runs = run_worker_until(integrations, fake, until=5, failing={"b"})
+
+    assert [t for t, name in runs if name == "a"] == [0]
+    assert [t for t, name in runs if name == "b"] == [0, 1, 2, 3, 4, 5]
+
+
+def test_run_worker_bundle_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_integration, "BUNDLE_POLL_INTERVAL_SECS", 5)
+    fake = FakeTime()
+    integrations = [WorkerIntegration(name="a", sleep_duration_secs=100)]
+
+    runs = run_worker_until(
+        integrations,
+        fake,
+        until=100,
+        get_sha=lambda: "old" if fake.now < 12 else "new",
+    )
+
+    assert runs == [(0, "a"), (15, "a")]
+
+
+def test_run_worker_polls_at_poll_interval(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_integration, "BUNDLE_POLL_INTERVAL_SECS", 10)
+    fake = FakeTime()
+    polls: list[float] = []
+
+    def get_sha() -> str:
+        polls.append(fake.now)
+        return "sha"
+
+    integrations = [
+        WorkerIntegration(name="a", sleep_duration_secs=3),
+        WorkerIntegration(name="b", sleep_duration_secs=4),
+    ]
+
+    run_worker_until(integrations, fake, until=30, get_sha=get_sha)
+
+    assert polls == [0, 10, 20, 30]
+
+
+def test_run_worker_run_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(run_integration, "RUN_ONCE", "true")
+    codes = {"a": 0, "b": 3}
+
+    with pytest.raises(SystemExit) as e:
+        run_worker(
+            _cli,
+            [WorkerIntegration(name="a"), WorkerIntegration(name="b")],
+            run=lambda command, name, extra_args: (codes[name], False),
+        )
+
+    assert e.value.code == 3
@@ -14,6 +14,7 @@ from github import (
     Github,
     GithubException,
 )
+from sretoolbox.utils import threaded
 
 from reconcile.gql_definitions.common.saas_files import (
     SaasResourceTemplateTargetImageV1,
@@ -763,6 +764,55 @@ class TestGetContainerImagesDiffSaasFile(TestCase):
             expected,
         )
 
+    def test_get_container_images_diff_saas_file_images_looked_up_once(
+        self,
+    ) -> None:
+        saasherder = SaasHerder(
+            [self.saas_file],
+            secret_reader=MockSecretReader(),
+            thread_pool_size=1,
+            integration="",
+            integration_version="",
+            hash_length=7,
+            repo_url="https://repo-url.com",
+        )
+        saasherder.state = MagicMock()
+        saasherder.state.get.return_value = "asha"
+        self.get_commit_sha.return_value = "abcd4242"
+        self.get_image.return_value = MagicMock()
+
+        saasherder.get_container_images_diff_saas_file(self.saas_file, True)
+
+        # both targets use quay.io/centos/centos
+        self.assertEqual(
+            sorted(c.kwargs["image"] for c in self.get_image.call_args_list),
+            ["quay.io/centos/centos:abcd424", "quay.io/fedora/fedora:abcd424"],
+        )
+
+    def test_get_container_images_diff_saas_file_image_missing(self) -> None:
+        saasherder = SaasHerder(
+            [self.saas_file],
+            secret_reader=MockSecretReader(),
+            thread_pool_size=1,
+            integration="",
+            integration_version="",
+            hash_length=7,
+            repo_url="https://repo-url.com",
+        )
+        saasherder.state = MagicMock()
+        saasherder.state.get.return_value = "asha"
+        self.get_commit_sha.return_value = "abcd4242"
+        self.get_image.side_effect = lambda *args, image, **kwargs: (
+            None if image.startswith("quay.io/fedora") else MagicMock()
+        )
+
+        actual = saasherder.get_container_images_diff_saas_file(self.saas_file, True)
+
+        self.assertEqual(
+            [t.namespace_name for t in actual],
+            ["test-image-trigger"],
+        )
+
     def test_state_key_consistency(
         self,
     ) -> None:
@@ -1003,6 +1053,88 @@ class TestPopulateDesiredState(TestCase):
         self.assertEqual(5, cnt, "expected 5 resources, found less")
         self.assertEqual(self.saasherder.promotions, [None, None, None, None])
 
+    def test_populate_desired_state_max_in_flight_targets(self) -> None:
+        self.saasherder.thread_pool_size = 4
+        with (
+            patch(
+                "reconcile.utils.saasherder.saasherder.MAX_IN_FLIGHT_TARGETS",
+                1,
+            ),
+            patch(
+                "reconcile.utils.saasherder.saasherder.threaded.run",
+                wraps=threaded.run,
+            ) as run,
+        ):
+            self.saasherder.populate_desired_state(ResourceInventory())
+
+        self.assertEqual(1, run.call_args_list[1].args[2])
+
+    def test_populate_desired_state_rendered_target_cache(self) -> None:
+        store: dict[str, Any] = {}
+        state = MagicMock()
+        state.get.side_effect = store.get
+        state.add.side_effect = lambda key, value, force=False: store.__setitem__(
+            key, value
+        )
+        self.saasherder.state = state
+
+        def desired_state() -> list[dict[str, Any]]:
+            ri = ResourceInventory()
+            for resource_type in ("Deployment", "Service", "ConfigMap"):
+                ri.initialize_resource_type("stage-1", "yolo-stage", resource_type)
+                ri.initialize_resource_type("prod-1", "yolo", resource_type)
+            self.saasherder.populate_desired_state(ri)
+            return [
+                d_item.body
+                for _, _, _, data in ri
+                for d_item in data["desired"].values()
+            ]
+
+        with (
+            patch(
+                "reconcile.utils.saasherder.saasherder.RENDERED_TARGET_CACHE_ENABLED",
+                True,
+            ),
+            patch.object(
+                self.saasherder,
+                "_get_commit_sha",
+                side_effect=lambda url, ref, github: ref,
+            ),
+        ):
+            rendered = desired_state()
+            fetches = SaasHerder._get_file_contents.call_count  # type: ignore[attr-defined]
+            cached = desired_state()
+
+        self.assertEqual(5, len(cached))
+        self.assertEqual(rendered, cached)
+        self.assertEqual(4, len(store))
+        self.assertEqual(
+            fetches,
+            SaasHerder._get_file_contents.call_count,  # type: ignore[attr-defined]
+        )
+
+        # a new renderer does not use targets rendered by the previous one
+        with (
+            patch(
+                "reconcile.utils.saasherder.saasherder.RENDERED_TARGET_CACHE_ENABLED",
+                True,
+            ),
+            patch(
+                "reconcile.utils.saasherder.saasherder.RENDERED_TARGET_CACHE_VERSION",
+                2,
+            ),
+            patch.object(
+                self.saasherder,
+                "_get_commit_sha",
+                side_effect=lambda url, ref, github: ref,
+            ),
+        ):
+            desired_state()
+        self.assertLess(
+            fetches,
+            SaasHerder._get_file_contents.call_count,  # type: ignore[attr-defined]
+        )
+
 
 @pytest.mark.usefixtures("inject_gql_class_factory")
 class TestCollectRepoUrls(TestCase):
@@ -1959,3 +2091,52 @@ def test_render_templated_parameters_in_init(
             },
         ),
     ]
+
+
+def _saasherder_with_gql_saas_file(
+    gql_class_factory: Callable[..., SaasFile],
+) -> SaasHerder:
+    saas_file = gql_class_factory(
+        SaasFile,
+        Fixtures("saasherder").get_anymarkup("saas-templated-params.gql.yml"),
+    )
+    return SaasHerder(
+        [saas_file],
+        secret_reader=MockSecretReader(),
+        thread_pool_size=1,
+        integration="",
+        integration_version="",
+        hash_length=24,
+        repo_url="https://repo-url.com",
+    )
+
+
+def test_get_commit_sha_resolves_ref_once(
+    gql_class_factory: Callable[..., SaasFile],
+) -> None:
+    saasherder = _saasherder_with_gql_saas_file(gql_class_factory)
+    github = MagicMock()
+    github.get_repo.return_value.get_commit.return_value.sha = "a" * 40
+
+    for _ in range(3):
+        assert (
+            saasherder._get_commit_sha(
+                "https://github.com/app-sre/repo", "main", github
+            )
+            == "a" * 40
+        )
+
+    github.get_repo.return_value.get_commit.assert_called_once_with(sha="main")
+
+
+def test_get_commit_sha_skips_full_commit_sha(
+    gql_class_factory: Callable[..., SaasFile],
+) -> None:
+    saasherder = _saasherder_with_gql_saas_file(gql_class_factory)
+    github = MagicMock()
+
+    assert (
+        saasherder._get_commit_sha("https://github.com/app-sre/repo", "b" * 40, github)
+        == "b" * 40
+    )
+    github.get_repo.assert_not_called()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from reconcile.utils.saasherder import content_cache
+from reconcile.utils.saasherder.content_cache import GitContentCache
+from reconcile.utils.saasherder.saasherder import SaasHerder
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+KEY = GitContentCache.key("https://github.com/app-sre/repo", "/template.yml", "sha")
+
+
+@pytest.fixture
+def state() -> MagicMock:
+    store: dict[str, Any] = {}
+    state = MagicMock()
+    state.get.side_effect = store.get
+    state.add.side_effect = lambda key, value, force=False: store.__setitem__(
+        key, value
+    )
+    return state
+
+
+def test_key_is_content_addressed() -> None:
+    assert (
+        GitContentCache.key("https://github.com/app-sre/repo", "/template.yml", "sha")
+        == KEY
+    )
+    assert (
+        GitContentCache.key(
+            "https://github.com/app-sre/repo", "/template.yml", "other-sha"
+        )
+        != KEY
+    )
+    assert (
+        GitContentCache.key(
+            "https://github.com/app-sre/repo", "/template.yml", "sha", kind="directory"
+        )
+        != KEY
+    )
+
+
+def test_get_or_fetch_local(tmp_path: Path) -> None:
+    fetch = MagicMock(return_value=b"content")
+    cache = GitContentCache(str(tmp_path), max_bytes=1024)
+
+    assert cache.get_or_fetch(KEY, fetch) == b"content"
+    assert cache.get_or_fetch(KEY, fetch) == b"content"
+    # a new process finds the entry on disk
+    assert GitContentCache(str(tmp_path), max_bytes=1024).get(KEY) == b"content"
+    fetch.assert_called_once_with()
+
+
+def test_get_or_fetch_shared_state(tmp_path: Path, state: MagicMock) -> None:
+    fetch = MagicMock(return_value=b"content")
+    GitContentCache(str(tmp_path / "pod1"), max_bytes=1024, state=state).get_or_fetch(
+        KEY, fetch
+    )
+
+    cache = GitContentCache(str(tmp_path / "pod2"), max_bytes=1024, state=state)
+
+    assert cache.get_or_fetch(KEY, fetch) == b"content"
+    fetch.assert_called_once_with()
+    assert os.listdir(tmp_path / "pod2") == [KEY]
+
+
+def test_get_or_fetch_without_local_tier(state: MagicMock) -> None:
+    fetch = MagicMock(return_value=b"content")
+    cache = GitContentCache(None, max_bytes=1024, state=state)
+
+    assert cache.get_or_fetch(KEY, fetch) == b"content"
+    assert cache.get_or_fetch(KEY, fetch) == b"content"
+    fetch.assert_called_once_with()
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = GitContentCache(str(tmp_path), max_bytes=10)
+    cache.get_or_fetch("a", lambda: b"aaaa")
+    cache.get_or_fetch("b", lambda: b"bbbb")
+    os.utime(tmp_path / "a", (0, 0))
+    os.utime(tmp_path / "b", (1, 1))
+    # reading a makes b the least recently used entry
+    cache.get("a")
+
+    cache.get_or_fetch("c", lambda: b"cccc")
+
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+
+
+def test_from_env_disabled(mocker: MockerFixture, state: MagicMock) -> None:
+    mocker.patch.object(content_cache, "GIT_CONTENT_CACHE_DIR", None)
+    mocker.patch.object(content_cache, "GIT_CONTENT_CACHE_STATE_ENABLED", False)
+
+    assert GitContentCache.from_env(state=state) is None
+
+
+def test_from_env_state(mocker: MockerFixture, state: MagicMock) -> None:
+    mocker.patch.object(content_cache, "GIT_CONTENT_CACHE_DIR", None)
+    mocker.patch.object(content_cache, "GIT_CONTENT_CACHE_STATE_ENABLED", True)
+
+    cache = GitContentCache.from_env(state=state)
+
+    assert cache is not None
+    assert cache.state is state
+    assert cache.directory is None
+
+
+def test_saasherder_directory_contents_cached(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    saasherder = SaasHerder.__new__(SaasHerder)
+    saasherder.gitlab = MagicMock()
+    saasherder.git_content_cache = GitContentCache(str(tmp_path), max_bytes=1024)
+    mocker.patch.object(saasherder, "_get_commit_sha", return_value="sha")
+    assert saasherder.gitlab is not None
+    get_directory_contents = saasherder.gitlab.get_directory_contents
+    get_directory_contents.return_value = {
+        "a.yml": b"kind: A\n---\nkind: B\n",
+        "c.yml": b"kind: C\n",
+    }
+
+    for _ in range(2):
+        resources, commit_sha = saasherder._get_directory_contents(
+            "https://gitlab.com/app-sre/repo", "/dir", "main", MagicMock()
+        )
+        assert resources == [{"kind": "A"}, {"kind": "B"}, {"kind": "C"}]
+        assert commit_sha == "sha"
+    get_directory_contents.assert_called_once()
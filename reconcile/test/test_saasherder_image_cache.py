@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from reconcile.utils.saasherder import saasherder
+from reconcile.utils.saasherder.image_cache import ImageExistenceCache
+from reconcile.utils.saasherder.saasherder import SaasHerder
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+TAG = "quay.io/app-sre/image:abcdef"
+DIGEST = "quay.io/app-sre/image@sha256:" + "a" * 64
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def state() -> MagicMock:
+    store: dict[str, Any] = {}
+    state = MagicMock()
+    state.get.side_effect = store.get
+    state.add.side_effect = lambda key, value, force=False: store.__setitem__(
+        key, value
+    )
+    return state
+
+
+def test_key_depends_on_user() -> None:
+    assert ImageExistenceCache.key(TAG, "user", None) == ImageExistenceCache.key(
+        TAG, "user", None
+    )
+    assert ImageExistenceCache.key(TAG, "user", None) != ImageExistenceCache.key(
+        TAG, "other", None
+    )
+
+
+def test_tag_expires(clock: Clock) -> None:
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+    cache.set("key", TAG, exists=True)
+
+    assert cache.get("key") is True
+    clock.now += 61
+    assert cache.get("key") is None
+
+
+def test_digest_never_expires(clock: Clock) -> None:
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+    cache.set("key", DIGEST, exists=True)
+
+    clock.now += 10**9
+    assert cache.get("key") is True
+
+
+def test_negative_expires(clock: Clock) -> None:
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+    cache.set("key", DIGEST, exists=False)
+
+    assert cache.get("key") is False
+    clock.now += 11
+    assert cache.get("key") is None
+
+
+def test_shared_state(clock: Clock, state: MagicMock) -> None:
+    ImageExistenceCache(60, 10, state=state, now=clock).set("a", TAG, exists=True)
+    ImageExistenceCache(60, 10, state=state, now=clock).set("b", TAG, exists=False)
+
+    cache = ImageExistenceCache(60, 10, state=state, now=clock)
+
+    assert cache.get("a") is True
+    # negative results are not shared
+    assert cache.get("b") is None
+
+
+def test_exists_uses_cached_result(clock: Clock) -> None:
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+    check = MagicMock(return_value=False)
+
+    assert cache.exists("key", TAG, check) is False
+    assert cache.exists("key", TAG, check) is False
+    check.assert_called_once_with()
+
+
+def test_exists_negative_result_expires(clock: Clock) -> None:
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+    check = MagicMock(return_value=False)
+
+    assert cache.exists("key", TAG, check) is False
+    # the image was pushed after the first check
+    check.return_value = True
+    clock.now += 11
+
+    assert cache.exists("key", TAG, check) is True
+    assert check.call_count == 2
+
+
+def test_exists_registry_concurrency(clock: Clock) -> None:
+    cache = ImageExistenceCache(
+        tag_ttl=60, negative_ttl=10, now=clock, registry_concurrency=1
+    )
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def check() -> bool:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        threading.Event().wait(0.01)
+        with lock:
+            running -= 1
+        return True
+
+    threads = [
+        threading.Thread(target=cache.exists, args=(str(i), f"{TAG}{i}", check))
+        for i in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max_running == 1
+
+
+def test_get_and_validate_image_cached(mocker: MockerFixture, clock: Clock) -> None:
+    image = mocker.patch.object(saasherder, "Image", autospec=True)
+    image.return_value.__bool__.return_value = True
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+
+    for _ in range(2):
+        img = SaasHerder._get_and_validate_image(
+            full_image_path=TAG,
+            username="user",
+            password="password",
+            auth_server=None,
+            timeout=60,
+            error_prefix="prefix",
+            cache=cache,
+        )
+        assert img is image.return_value
+
+    image.return_value.__bool__.assert_called_once_with()
+
+
+def test_get_and_validate_image_negative_cached(
+    mocker: MockerFixture, clock: Clock
+) -> None:
+    image = mocker.patch.object(saasherder, "Image", autospec=True)
+    image.return_value.__bool__.return_value = False
+    cache = ImageExistenceCache(tag_ttl=60, negative_ttl=10, now=clock)
+
+    for _ in range(2):
+        assert (
+            SaasHerder._get_and_validate_image(
+                full_image_path=TAG,
+                username="user",
+                password="password",
+                auth_server=None,
+                timeout=60,
+                error_prefix="prefix",
+                cache=cache,
+            )
+            is None
+        )
+
+    image.return_value.__bool__.assert_called_once_with()
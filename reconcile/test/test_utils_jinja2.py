@@ -1,6 +1,12 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock
+
 import pytest
 from jsonpath_ng.exceptions import JsonPathParserError
 
+from reconcile.utils.jinja2 import render_cache, render_pool
 from reconcile.utils.jinja2.filters import (
     extract_jsonpath,
     hash_list,
@@ -8,6 +14,18 @@ from reconcile.utils.jinja2.filters import (
     matches_jsonpath,
     str_format,
 )
+from reconcile.utils.jinja2.render_cache import (
+    PersistentRenderCache,
+    render_with_cache,
+)
+from reconcile.utils.jinja2.render_pool import render_in_process_pool
+from reconcile.utils.jinja2.utils import (
+    Jinja2TemplateCache,
+    jinja2_template_variables,
+)
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
 
 
 def test_hash_list_empty() -> None:
@@ -134,3 +152,140 @@ def test_str_format() -> None:
     value = "path/to/object"
     format = "s3://%s"
     assert str_format(value, format) == "s3://path/to/object"
+
+
+def test_jinja2_template_variables() -> None:
+    body = "{% set x = 1 %}{{ x }}{{ name }}{{ vault('a', 'b') }}{{ resource.path }}"
+    assert jinja2_template_variables(body) == {"name", "vault", "resource"}
+
+
+def test_jinja2_template_variables_extra_curly() -> None:
+    assert jinja2_template_variables("{{{ name }}} {{ other }}", True) == {"name"}
+
+
+@pytest.fixture
+def persistent_cache(mocker: MockerFixture) -> PersistentRenderCache:
+    cache = PersistentRenderCache(max_entries=10)
+    mocker.patch.object(render_cache, "persistent_render_cache", cache)
+    mocker.patch.object(render_cache, "PERSISTENT_RENDER_CACHE_ENABLED", True)
+    return cache
+
+
+def test_render_with_cache_memoizes_per_run() -> None:
+    render = MagicMock(return_value="rendered")
+    cache = Jinja2TemplateCache()
+
+    assert render_with_cache(cache, "key", frozenset(), render) == "rendered"
+    assert render_with_cache(cache, "key", frozenset(), render) == "rendered"
+    assert render_with_cache(Jinja2TemplateCache(), "key", frozenset(), render)
+    assert render.call_count == 2
+
+
+def test_render_with_cache_persistent_same_bundle(
+    persistent_cache: PersistentRenderCache, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(render_cache, "current_bundle_sha", return_value="sha1")
+    render = MagicMock(return_value="rendered")
+
+    for _ in range(2):
+        assert (
+            render_with_cache(Jinja2TemplateCache(), "key", frozenset(), render)
+            == "rendered"
+        )
+
+    render.assert_called_once()
+
+
+def test_render_with_cache_persistent_bundle_changed(
+    persistent_cache: PersistentRenderCache, mocker: MockerFixture
+) -> None:
+    bundle_sha = mocker.patch.object(render_cache, "current_bundle_sha")
+    render = MagicMock(return_value="rendered")
+
+    for sha in ("sha1", "sha2"):
+        bundle_sha.return_value = sha
+        render_with_cache(Jinja2TemplateCache(), "key", frozenset(), render)
+
+    assert render.call_count == 2
+    assert persistent_cache.get("sha1", "key") is None
+    assert persistent_cache.get("sha2", "key") == "rendered"
+
+
+def test_render_with_cache_persistent_skips_volatile_templates(
+    persistent_cache: PersistentRenderCache, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(render_cache, "current_bundle_sha", return_value="sha1")
+    render = MagicMock(return_value="rendered")
+
+    for _ in range(2):
+        render_with_cache(Jinja2TemplateCache(), "key", frozenset({"vault"}), render)
+
+    assert render.call_count == 2
+    assert persistent_cache.get("sha1", "key") is None
+
+
+def test_persistent_render_cache_max_entries() -> None:
+    cache = PersistentRenderCache(max_entries=1)
+    cache.set("sha", "a", "1")
+    cache.set("sha", "b", "2")
+    assert cache.get("sha", "a") == "1"
+    assert cache.get("sha", "b") is None
+
+
+def test_render_in_process_pool_disabled(mocker: MockerFixture) -> None:
+    mocker.patch.object(render_pool, "RENDER_PROCESS_POOL_SIZE", 0)
+    render = MagicMock(return_value="rendered")
+
+    assert render_in_process_pool("{{ a }}", {"a": 1}, False, render) == "rendered"
+    render.assert_called_once_with()
+
+
+def test_render_in_process_pool_sends_referenced_variables(
+    mocker: MockerFixture,
+) -> None:
+    pool = mocker.patch.object(render_pool, "render_process_pool").return_value
+    pool.submit.return_value.result.return_value = "1"
+    render = MagicMock()
+
+    result = render_in_process_pool("{{ a }}", {"a": 1, "b": 2}, False, render)
+
+    assert result == "1"
+    pool.submit.assert_called_once_with(render_pool._render, "{{ a }}", {"a": 1}, False)
+    render.assert_not_called()
+
+
+def test_render_in_process_pool_renders_io_templates_locally(
+    mocker: MockerFixture,
+) -> None:
+    pool = mocker.patch.object(render_pool, "render_process_pool").return_value
+    render = MagicMock(return_value="rendered")
+
+    result = render_in_process_pool("{{ vault('a', 'b') }}", {}, False, render)
+
+    assert result == "rendered"
+    pool.submit.assert_not_called()
+
+
+def test_render_in_process_pool_falls_back_on_worker_error(
+    mocker: MockerFixture,
+) -> None:
+    pool = mocker.patch.object(render_pool, "render_process_pool").return_value
+    pool.submit.return_value.result.side_effect = Exception("worker died")
+    render = MagicMock(return_value="rendered")
+
+    assert render_in_process_pool("{{ a }}", {"a": 1}, False, render) == "rendered"
+
+
+def test_render_in_process_pool_worker(mocker: MockerFixture) -> None:
+    mocker.patch.object(render_pool, "RENDER_PROCESS_POOL_SIZE", 1)
+    mocker.patch.object(render_pool, "_pool", None)
+    pool = render_pool.render_process_pool()
+    assert pool is not None
+    try:
+        result = render_in_process_pool(
+            "{{{ a }}}-{{ a }}", {"a": 1}, True, MagicMock(side_effect=Exception)
+        )
+    finally:
+        pool.shutdown()
+
+    assert result == "1-{{ a }}"
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from reconcile.utils.bounded_directory import BoundedDirectory
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_read_write_remove(tmp_path: Path) -> None:
+    directory = BoundedDirectory(str(tmp_path / "cache"), max_bytes=100)
+
+    assert directory.read("a") is None
+    directory.write("a", b"content")
+    assert directory.read("a") == b"content"
+    directory.remove("a")
+    assert directory.read("a") is None
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    directory = BoundedDirectory(str(tmp_path), max_bytes=100)
+    directory.write("a", b"a" * 50)
+    directory.write("b", b"b" * 50)
+    os.utime(tmp_path / "a", (0, 0))
+    os.utime(tmp_path / "b", (1, 1))
+    # reading a file marks it as used
+    assert directory.read("a") == b"a" * 50
+
+    directory.write("c", b"c" * 50)
+
+    assert directory.read("a") == b"a" * 50
+    assert directory.read("b") is None
+    assert directory.read("c") == b"c" * 50
+
+
+def test_counts_existing_files(tmp_path: Path) -> None:
+    (tmp_path / "a").write_bytes(b"a" * 80)
+    os.utime(tmp_path / "a", (0, 0))
+    directory = BoundedDirectory(str(tmp_path), max_bytes=100)
+
+    directory.write("b", b"b" * 50)
+
+    assert directory.read("a") is None
+    assert directory.read("b") == b"b" * 50
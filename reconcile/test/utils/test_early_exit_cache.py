@@ -14,6 +14,8 @@ from reconcile.utils.early_exit_cache import (
     CacheStatus,
     CacheValue,
     EarlyExitCache,
+    HeadCache,
+    HeadCacheBackend,
 )
 from reconcile.utils.state import State
 
@@ -559,3 +561,72 @@ def test_early_exit_cache_delete(
     early_exit_cache.delete(cache_key_with_digest)
 
     state.rm.assert_called_once_with(str(cache_key_with_digest))
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_early_exit_cache_head_cache(state: Any) -> None:
+    clock = Clock()
+    early_exit_cache = EarlyExitCache(state, head_cache=HeadCache(60, now=clock))
+    state.head.return_value = (False, {})
+
+    for _ in range(2):
+        assert early_exit_cache.head(DRY_RUN_CACHE_KEY).status == CacheStatus.MISS
+    assert state.head.call_count == 2
+
+    early_exit_cache.set(
+        NO_DRY_RUN_CACHE_KEY, NO_DRY_RUN_CACHE_VALUE, 100, LATEST_CACHE_SOURCE_DIGEST
+    )
+    assert early_exit_cache.head(NO_DRY_RUN_CACHE_KEY).status == CacheStatus.HIT
+    assert state.head.call_count == 2
+
+    clock.now += 61
+    assert early_exit_cache.head(NO_DRY_RUN_CACHE_KEY).status == CacheStatus.MISS
+    assert state.head.call_count == 3
+
+
+def test_head_cache_backend() -> None:
+    store: dict[str, str] = {}
+    backend = create_autospec(HeadCacheBackend)
+    backend.get.side_effect = store.get
+    backend.set.side_effect = lambda key, value, ttl=None: store.__setitem__(key, value)
+
+    HeadCache(60, backend=backend).set("path", True, {"k": "v"})
+
+    assert HeadCache(60, backend=backend).get("path") == (True, {"k": "v"})
+    backend.set.assert_called_once_with(
+        "early-exit-cache-head:path", '{"exists": true, "metadata": {"k": "v"}}', 60
+    )
+
+
+def test_head_cache_backend_unavailable() -> None:
+    backend = create_autospec(HeadCacheBackend)
+    backend.get.side_effect = ConnectionError()
+
+    assert HeadCache(60, backend=backend).get("path") is None
+
+
+@pytest.mark.parametrize("value", ["not json", '{"exists": true}', "[]"])
+def test_head_cache_backend_corrupt_value(value: str) -> None:
+    backend = create_autospec(HeadCacheBackend)
+    backend.get.return_value = value
+
+    assert HeadCache(60, backend=backend).get("path") is None
+
+
+def test_head_cache_prunes_expired_entries() -> None:
+    clock = Clock()
+    head_cache = HeadCache(60, now=clock)
+    head_cache.set("a", True, {})
+    clock.now += 30
+    head_cache.set("b", True, {})
+    clock.now += 31
+
+    assert head_cache.get("b") == (True, {})
+    assert list(head_cache._memory) == ["b"]
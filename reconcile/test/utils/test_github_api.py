@@ -144,3 +144,34 @@ def test_get_raw_file_with_multiple_contents(github: Mock) -> None:
         match=r"Path some/path of ref some-ref in repo my/repo is a directory!",
     ):
         GithubRepositoryApi.get_raw_file(path="some/path", ref="some-ref", repo=repo)
+
+
+def test_get_directory_contents() -> None:
+    repo = create_autospec(Repository, full_name="my/repo")
+    files = [
+        create_autospec(spec=ContentFile, type="file", path=f"dir/{name}", sha=name)
+        for name in ("a.yml", "b.yml")
+    ]
+    repo.get_contents.return_value = files
+    repo.get_git_blob.side_effect = lambda sha: create_autospec(
+        spec=GitBlob, content=base64.b64encode(sha.encode())
+    )
+
+    contents = GithubRepositoryApi.get_directory_contents(
+        repo=repo, path="dir", ref="some-ref"
+    )
+
+    assert contents == {"dir/a.yml": b"a.yml", "dir/b.yml": b"b.yml"}
+    repo.get_contents.assert_called_once_with(path="dir", ref="some-ref")
+
+
+def test_get_directory_contents_of_file() -> None:
+    repo = create_autospec(Repository, full_name="my/repo")
+    repo.get_contents.return_value = create_autospec(spec=ContentFile)
+
+    with pytest.raises(
+        TypeError, match=r"Path some/path of ref some-ref in repo my/repo is a file!"
+    ):
+        GithubRepositoryApi.get_directory_contents(
+            repo=repo, path="some/path", ref="some-ref"
+        )
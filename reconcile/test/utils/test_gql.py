@@ -12,12 +12,14 @@ if TYPE_CHECKING:
     from pytest_httpserver import HTTPServer
     from pytest_mock import MockerFixture
 
+from reconcile.utils import gql as gql_module
 from reconcile.utils.gql import (
     GqlApi,
     GqlApiError,
     GqlApiErrorForbiddenSchemaError,
     GqlApiIntegrationNotFoundError,
     PersistentRequestsHTTPTransport,
+    get_current_sha,
 )
 
 TEST_QUERY = """
@@ -203,3 +205,33 @@ def test_gqlapi_query_full_stack_transport_error(httpserver: HTTPServer) -> None
     )
     with pytest.raises(GqlApiError, match="error.*returned with GraphQL response"):
         gql_api.query.__wrapped__(gql_api, SIMPLE_QUERY)  # type: ignore[attr-defined]
+
+
+def test_get_current_sha(httpserver: HTTPServer, mocker: MockerFixture) -> None:
+    mocker.patch.object(
+        gql_module,
+        "get_config",
+        return_value={
+            "graphql": {"server": httpserver.url_for("/graphql"), "token": "t"}
+        },
+    )
+    httpserver.expect_request(
+        "/sha256", headers={"Authorization": "t"}
+    ).respond_with_data("abc")
+
+    assert get_current_sha() == "abc"
+
+
+def test_get_current_sha_does_not_retry(
+    httpserver: HTTPServer, mocker: MockerFixture
+) -> None:
+    mocker.patch.object(
+        gql_module,
+        "get_config",
+        return_value={"graphql": {"server": httpserver.url_for("/graphql")}},
+    )
+    httpserver.expect_request("/sha256").respond_with_data("", status=500)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        get_current_sha()
+    assert len(httpserver.log) == 1
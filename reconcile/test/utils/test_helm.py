@@ -17,12 +17,17 @@ from reconcile.integrations_manager import (
 )
 from reconcile.test.fixtures import Fixtures
 from reconcile.utils import helm
+from reconcile.utils.single_flight import SingleFlightCache
 
 if TYPE_CHECKING:
     from collections.abc import (
         Callable,
         Sequence,
     )
+    from pathlib import Path
+    from unittest.mock import MagicMock
+
+    from pytest_mock import MockerFixture
 
 fxt = Fixtures("helm")
 
@@ -463,3 +468,73 @@ def test_template_cron_enable_pushgateway(
     template = helm.template(build_helm_values(helm_integration_specs_cron))
     expected = yaml.safe_load(fxt.get("enable_pushgateway.yml"))
     assert template == expected
+
+
+@pytest.fixture
+def template_ref(mocker: MockerFixture) -> MagicMock:
+    mocker.patch.object(helm, "_rendered_templates", SingleFlightCache())
+    return mocker.patch.object(
+        helm, "_template_ref", return_value="kind: A\n---\nkind: B\n"
+    )
+
+
+def test_template_all_memoizes_commit(template_ref: MagicMock) -> None:
+    for _ in range(2):
+        resources = helm.template_all(
+            url="https://github.com/app-sre/repo",
+            path="/chart",
+            ref="main",
+            namespace="ns",
+            values={"a": 1},
+            commit_sha="sha",
+        )
+        assert list(resources) == [{"kind": "A"}, {"kind": "B"}]
+
+    template_ref.assert_called_once_with(
+        "https://github.com/app-sre/repo", "/chart", "sha", "ns", {"a": 1}, True
+    )
+
+
+def test_template_all_memo_respects_values(template_ref: MagicMock) -> None:
+    for values in ({"a": 1}, {"a": 2}):
+        helm.template_all(
+            url="https://github.com/app-sre/repo",
+            path="/chart",
+            ref="main",
+            namespace="ns",
+            values=values,
+            commit_sha="sha",
+        )
+
+    assert template_ref.call_count == 2
+
+
+def test_template_all_without_commit_sha(template_ref: MagicMock) -> None:
+    for _ in range(2):
+        helm.template_all(
+            url="https://github.com/app-sre/repo",
+            path="/chart",
+            ref="main",
+            namespace="ns",
+            values={"a": 1},
+        )
+
+    assert template_ref.call_count == 2
+
+
+def test_do_template_persistent_repository_cache(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    cache_dir = tmp_path / "cache"
+    mocker.patch.object(helm, "HELM_REPOSITORY_CACHE_DIR", str(cache_dir))
+    run = mocker.patch.object(helm, "run")
+    run.return_value.stdout = b"kind: A\n"
+    chart = tmp_path / "chart"
+    chart.mkdir()
+    (chart / "Chart.yaml").write_text("name: chart\n")
+
+    assert helm.do_template(values={}, path=str(chart), namespace="ns") == "kind: A\n"
+
+    cmd = run.call_args.args[0]
+    assert cmd[cmd.index("--repository-cache") + 1] == str(cache_dir)
+    assert cache_dir.is_dir()
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from reconcile.utils.namespace_fingerprints import (
+    NamespaceFingerprints,
+    namespace_fingerprints,
+)
+from reconcile.utils.openshift_resource import OpenshiftResource as OR
+from reconcile.utils.openshift_resource import ResourceInventory
+
+
+def _configmap(name: str, value: str) -> OR:
+    return OR(
+        {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": name},
+            "data": {"value": value},
+        },
+        "integration",
+        "0.0.1",
+    )
+
+
+def _inventory(values: dict[str, str], cluster: str = "c1") -> ResourceInventory:
+    ri = ResourceInventory()
+    for namespace, value in values.items():
+        ri.initialize_resource_type(cluster, namespace, "ConfigMap")
+        ri.add_desired(cluster, namespace, "ConfigMap", "cm", _configmap("cm", value))
+    return ri
+
+
+@pytest.fixture
+def state() -> MagicMock:
+    store: dict[str, Any] = {}
+    state = MagicMock()
+    state.get.side_effect = store.get
+    state.get_many.side_effect = lambda keys: {k: store[k] for k in keys if k in store}
+    state.add.side_effect = lambda key, value, force=False: store.__setitem__(
+        key, value
+    )
+    return state
+
+
+def _fingerprints(state: MagicMock, now: float = 1000) -> NamespaceFingerprints:
+    return NamespaceFingerprints(
+        state, full_sweep_interval=3600, version="1", now=lambda: now
+    )
+
+
+def test_namespace_fingerprints() -> None:
+    fingerprints = namespace_fingerprints(_inventory({"ns1": "a", "ns2": "a"}))
+
+    assert fingerprints["c1"]["ns1"] == fingerprints["c1"]["ns2"]
+    assert (
+        namespace_fingerprints(_inventory({"ns1": "b"}))["c1"]["ns1"]
+        != fingerprints["c1"]["ns1"]
+    )
+
+
+def test_changed_namespaces_first_run(state: MagicMock) -> None:
+    changed = _fingerprints(state).changed_namespaces(
+        _inventory({"ns1": "a", "ns2": "b"})
+    )
+
+    assert changed == {("c1", "ns1"), ("c1", "ns2")}
+
+
+def test_changed_namespaces_after_commit(state: MagicMock) -> None:
+    fingerprints = _fingerprints(state)
+    fingerprints.changed_namespaces(_inventory({"ns1": "a", "ns2": "b"}))
+    fingerprints.commit()
+
+    changed = _fingerprints(state, now=2000).changed_namespaces(
+        _inventory({"ns1": "a", "ns2": "c"})
+    )
+
+    assert changed == {("c1", "ns2")}
+
+
+def test_changed_namespaces_without_commit(state: MagicMock) -> None:
+    _fingerprints(state).changed_namespaces(_inventory({"ns1": "a"}))
+
+    changed = _fingerprints(state, now=2000).changed_namespaces(
+        _inventory({"ns1": "a"})
+    )
+
+    assert changed == {("c1", "ns1")}
+
+
+def test_changed_namespaces_full_sweep(state: MagicMock) -> None:
+    fingerprints = _fingerprints(state)
+    fingerprints.changed_namespaces(_inventory({"ns1": "a"}))
+    fingerprints.commit()
+
+    changed = _fingerprints(state, now=1000 + 3600).changed_namespaces(
+        _inventory({"ns1": "a"})
+    )
+
+    assert changed == {("c1", "ns1")}
+
+
+def test_changed_namespaces_cluster_error(state: MagicMock) -> None:
+    fingerprints = _fingerprints(state)
+    fingerprints.changed_namespaces(_inventory({"ns1": "a"}))
+    fingerprints.commit()
+    ri = _inventory({"ns1": "a"})
+    ri.register_error(cluster="c1")
+
+    assert _fingerprints(state, now=2000).changed_namespaces(ri) == {("c1", "ns1")}
+
+
+def test_changed_namespaces_shards_of_a_cluster(state: MagicMock) -> None:
+    # two shards reconcile different namespaces of the same cluster
+    for values in ({"ns1": "a"}, {"ns2": "b"}):
+        fingerprints = _fingerprints(state)
+        fingerprints.changed_namespaces(_inventory(values))
+        fingerprints.commit()
+
+    for values in ({"ns1": "a"}, {"ns2": "b"}):
+        assert (
+            _fingerprints(state, now=2000).changed_namespaces(_inventory(values))
+            == set()
+        )
+
+
+def test_changed_namespaces_full_sweep_per_namespace(state: MagicMock) -> None:
+    fingerprints = _fingerprints(state)
+    fingerprints.changed_namespaces(_inventory({"ns1": "a"}))
+    fingerprints.commit()
+    fingerprints = _fingerprints(state, now=3000)
+    fingerprints.changed_namespaces(_inventory({"ns2": "b"}))
+    fingerprints.commit()
+
+    changed = _fingerprints(state, now=1000 + 3600).changed_namespaces(
+        _inventory({"ns1": "a", "ns2": "b"})
+    )
+
+    assert changed == {("c1", "ns1")}
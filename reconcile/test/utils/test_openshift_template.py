@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from reconcile.utils import oc
+from reconcile.utils.openshift_template import (
+    TemplateProcessingError,
+    process_template,
+)
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+def template(
+    objects: list[dict[str, Any]], parameters: list[dict[str, Any]]
+) -> dict[str, Any]:
+    return {
+        "apiVersion": "template.openshift.io/v1",
+        "kind": "Template",
+        "metadata": {"name": "test"},
+        "parameters": parameters,
+        "objects": objects,
+    }
+
+
+def config_map(data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": "test"},
+        "data": data,
+    }
+
+
+def test_process_template_substitution() -> None:
+    t = template(
+        [
+            config_map({
+                "image": "quay.io/app:${IMAGE_TAG}",
+                "both": "${IMAGE_TAG}-${REPLICAS}",
+                "unknown": "${UNKNOWN}",
+                "replicas": "${{REPLICAS}}",
+                "enabled": "${{ENABLED}}",
+                "${KEY}": "key",
+            })
+        ],
+        [
+            {"name": "IMAGE_TAG", "required": True},
+            {"name": "REPLICAS", "value": "3"},
+            {"name": "ENABLED", "value": "true"},
+            {"name": "KEY", "value": "substituted"},
+        ],
+    )
+
+    items = process_template(t, {"IMAGE_TAG": "abcdef", "NOT_IN_TEMPLATE": "x"})
+
+    assert items == [
+        config_map({
+            "image": "quay.io/app:abcdef",
+            "both": "abcdef-3",
+            "unknown": "${UNKNOWN}",
+            "replicas": 3,
+            "enabled": True,
+            "substituted": "key",
+        })
+    ]
+
+
+def test_process_template_formats_parameters() -> None:
+    t = template(
+        [config_map({"a": "${A}", "b": "${{B}}"})],
+        [{"name": "A"}, {"name": "B"}],
+    )
+
+    assert process_template(t, {"A": True, "B": 2}) == [
+        config_map({"a": "True", "b": 2})
+    ]
+
+
+def test_process_template_generate() -> None:
+    t = template(
+        [config_map({"password": "${PASSWORD}", "pin": "${PIN}"})],
+        [
+            {"name": "PASSWORD", "generate": "expression", "from": "[a-zA-Z0-9]{16}"},
+            {"name": "PIN", "generate": "expression", "from": "pin-[\\d]{4}"},
+        ],
+    )
+
+    data = process_template(t)[0]["data"]
+
+    assert re.fullmatch(r"[a-zA-Z0-9]{16}", data["password"])
+    assert re.fullmatch(r"pin-[0-9]{4}", data["pin"])
+
+
+@pytest.mark.parametrize(
+    "t",
+    [
+        template([], [{"name": "REQUIRED", "required": True}]),
+        template([], [{"name": "INVALID-NAME"}]),
+        template([], [{"name": "A"}, {"name": "A"}]),
+        template([], [{"name": "A", "generate": "unknown"}]),
+        template([], [{"name": "A", "generate": "expression", "from": "[a-z]{256}"}]),
+        template([config_map({"a": "${{A}}"})], [{"name": "A", "value": "no-json"}]),
+        template([{"metadata": {"name": "no-kind"}}], []),
+        template([config_map({}) | {"metadata": {"namespace": "ns"}}], []),
+        template([config_map({})], []) | {"labels": {"app": "test"}},
+        config_map({}),
+    ],
+)
+def test_process_template_unsupported(t: dict[str, Any]) -> None:
+    with pytest.raises(TemplateProcessingError):
+        process_template(t)
+
+
+def test_oc_process_in_process(mocker: MockerFixture) -> None:
+    oc_local = mocker.patch.object(oc, "OCLocal", autospec=True)
+    t = template([config_map({"a": "${A}"})], [{"name": "A"}])
+
+    assert oc.oc_process(t, {"A": "a"}) == [config_map({"a": "a"})]
+    oc_local.assert_not_called()
+
+
+def test_oc_process_falls_back_to_binary(mocker: MockerFixture) -> None:
+    oc_local = mocker.patch.object(oc, "OCLocal", autospec=True)
+    t = template([], [{"name": "REQUIRED", "required": True}])
+
+    assert oc.oc_process(t) is oc_local.return_value.process.return_value
+    oc_local.return_value.process.assert_called_once_with(t, None)
@@ -257,3 +257,63 @@ def test_promotion_data_disabled_cache_by_default(
     assert state.get.call_count == 2  # type: ignore[attr-defined]
     state.get.assert_called_with("promotions_v2/channel/uid/sha", None)  # type: ignore[attr-defined]
     state.ls.assert_not_called()  # type: ignore[attr-defined]
+
+
+def test_prefetch_promotion_data(
+    s3_state_builder: Callable[[Mapping[str, Any]], State],
+) -> None:
+    state = s3_state_builder({
+        "ls": [],
+        "get": {
+            "promotions_v2/channel/uid/sha": {
+                "success": True,
+                "target_config_hash": "hash",
+                "saas_file": "saas_file",
+            }
+        },
+    })
+    deployment_state = PromotionState(state=state)
+
+    deployment_state.prefetch_promotion_data(
+        [("sha", "channel", "uid"), ("sha", "channel", "other-uid")],
+        thread_pool_size=2,
+    )
+
+    assert deployment_state.get_promotion_data(
+        channel="channel",
+        sha="sha",
+        target_uid="uid",
+        pre_check_sha_exists=False,
+        use_cache=True,
+    ) == PromotionData(success=True, target_config_hash="hash", saas_file="saas_file")
+    # missing promotion data is cached as well
+    assert (
+        deployment_state.get_promotion_data(
+            channel="channel",
+            sha="sha",
+            target_uid="other-uid",
+            pre_check_sha_exists=False,
+            use_cache=True,
+        )
+        is None
+    )
+    assert state.get.call_count == 2  # type: ignore[attr-defined]
+
+
+def test_prefetch_promotion_data_pre_check_sha_exists(
+    s3_state_builder: Callable[[Mapping[str, Any]], State],
+) -> None:
+    state = s3_state_builder({
+        "ls": ["/promotions_v2/channel/uid/sha"],
+        "get": {},
+    })
+    deployment_state = PromotionState(state=state)
+    deployment_state.cache_commit_shas_from_s3()
+
+    deployment_state.prefetch_promotion_data(
+        [("sha", "channel", "uid"), ("other-sha", "channel", "uid")],
+        thread_pool_size=2,
+        pre_check_sha_exists=True,
+    )
+
+    state.get.assert_called_once_with("promotions_v2/channel/uid/sha", None)  # type: ignore[attr-defined]
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from reconcile.utils.single_flight import SingleFlightCache
+
+
+def test_single_flight_cache_memoizes() -> None:
+    cache: SingleFlightCache[str, int] = SingleFlightCache()
+
+    assert cache.get_or_set("a", lambda: 1) == 1
+    assert cache.get_or_set("a", lambda: 2) == 1
+    assert "a" in cache
+    assert len(cache) == 1
+
+
+def test_single_flight_cache_concurrent_callers_compute_once() -> None:
+    cache: SingleFlightCache[str, int] = SingleFlightCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        started.set()
+        release.wait()
+        return 1
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get_or_set, "a", compute) for _ in range(4)]
+        started.wait()
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == [1, 1, 1, 1]
+    assert len(calls) == 1
+
+
+def test_single_flight_cache_does_not_cache_errors() -> None:
+    cache: SingleFlightCache[str, int] = SingleFlightCache()
+
+    def fail() -> int:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_set("a", fail)
+    assert cache.get_or_set("a", lambda: 1) == 1
+
+
+def test_single_flight_cache_max_entries() -> None:
+    cache: SingleFlightCache[str, int] = SingleFlightCache(max_entries=2)
+    cache.get_or_set("a", lambda: 0)
+    cache.get_or_set("b", lambda: 1)
+    cache.get_or_set("c", lambda: 2)
+
+    assert "a" not in cache
+    assert cache.get_or_set("c", lambda: 5) == 2
+    assert len(cache) == 2
+
+
+def test_single_flight_do_merges_concurrent_callers() -> None:
+    cache: SingleFlightCache[str, int] = SingleFlightCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute() -> int:
+        calls.append(1)
+        started.set()
+        release.wait()
+        return 1
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.do, "a", compute) for _ in range(4)]
+        started.wait()
+        # give the other callers time to join the running computation
+        threading.Event().wait(0.1)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == [1, 1, 1, 1]
+    assert len(calls) == 1
+    # the result is not kept
+    assert cache.do("a", lambda: 2) == 2
+    assert "a" not in cache
+
+
+def test_single_flight_do_raises_errors() -> None:
+    cache: SingleFlightCache[str, int] = SingleFlightCache()
+
+    def fail() -> int:
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.do("a", fail)
+    assert cache.do("a", lambda: 1) == 1
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import threading
 from typing import TYPE_CHECKING
 
 import boto3
@@ -26,9 +29,11 @@ from reconcile.utils.state import (
     TransactionStateObj,
     acquire_state_settings,
 )
+from reconcile.utils.state_cache import StateObjectCache
 
 if TYPE_CHECKING:
     from collections.abc import Generator
+    from pathlib import Path
 
     from mypy_boto3_s3 import S3Client
     from pytest import MonkeyPatch
@@ -174,6 +179,56 @@ def test_ls_when_that_are_more_than_1000_keys(
     assert keys == expected
 
 
+def test_ls_with_prefix(integration_state: State, s3_client: S3Client) -> None:
+    for key in ["path/a", "path/b", "other/c"]:
+        s3_client.put_object(
+            Bucket=integration_state.bucket,
+            Key=f"state/integration-name/{key}",
+            Body="{}",
+        )
+
+    assert integration_state.ls(prefix="path/") == ["/path/a", "/path/b"]
+
+
+def test_get_many(integration_state: State, s3_client: S3Client) -> None:
+    for key in ["a", "b"]:
+        s3_client.put_object(
+            Bucket=integration_state.bucket,
+            Key=f"state/integration-name/{key}",
+            Body=f'{{"key": "{key}"}}',
+        )
+
+    assert integration_state.get_many(["a", "b", "missing"]) == {
+        "a": {"key": "a"},
+        "b": {"key": "b"},
+    }
+
+
+@pytest.fixture
+def state_with_path(integration_state: State, s3_client: S3Client) -> State:
+    for key in ["path/a", "path/nested/b", "other/c"]:
+        s3_client.put_object(
+            Bucket=integration_state.bucket,
+            Key=f"state/integration-name/{key}",
+            Body=f'"{key}"',
+        )
+    return integration_state
+
+
+def test_get_all(state_with_path: State) -> None:
+    assert state_with_path.get_all("path") == {
+        "a": "path/a",
+        "nested/b": "path/nested/b",
+    }
+
+
+def test_get_all_async(state_with_path: State) -> None:
+    assert asyncio.run(state_with_path.get_all_async("path")) == {
+        "a": "path/a",
+        "nested/b": "path/nested/b",
+    }
+
+
 def test_exists_for_existing_key(integration_state: State, s3_client: S3Client) -> None:
     key = "some-key"
 
@@ -519,3 +574,144 @@ def test_state_transaction_state_obj_bool() -> None:
     assert obj.value is False
     assert obj.changed
     assert obj.exists
+
+
+@pytest.fixture
+def cached_state(s3_client: S3Client, integration: str, tmp_path: Path) -> State:
+    return State(
+        integration=integration,
+        bucket=BUCKET,
+        client=s3_client,
+        cache=StateObjectCache(directory=str(tmp_path)),
+    )
+
+
+def test_cached_get_revalidates(
+    cached_state: State, s3_client: S3Client, mocker: MockerFixture
+) -> None:
+    cached_state["key"] = {"a": 1}
+    get_object = mocker.spy(s3_client, "get_object")
+
+    assert cached_state["key"] == {"a": 1}
+    assert get_object.call_args.kwargs["IfNoneMatch"]
+
+    s3_client.put_object(
+        Bucket=BUCKET, Key="state/integration-name/key", Body='{"a": 2}'
+    )
+    assert cached_state["key"] == {"a": 2}
+
+
+def test_cached_get_survives_new_state(
+    cached_state: State, s3_client: S3Client, integration: str, tmp_path: Path
+) -> None:
+    s3_client.put_object(
+        Bucket=BUCKET, Key="state/integration-name/key", Body='{"a": 1}'
+    )
+    assert cached_state["key"] == {"a": 1}
+
+    state = State(
+        integration=integration,
+        bucket=BUCKET,
+        client=s3_client,
+        cache=StateObjectCache(directory=str(tmp_path)),
+    )
+    assert state.cache is not None
+    cached = state.cache.get(BUCKET, "state/integration-name/key")
+    assert cached is not None
+    assert cached.body == b'{"a": 1}'
+
+
+def test_cached_ls_snapshot(
+    cached_state: State, s3_client: S3Client, mocker: MockerFixture
+) -> None:
+    s3_client.put_object(
+        Bucket=BUCKET,
+        Key="state/integration-name/path/a",
+        Body='"a"',
+        Metadata={"m": "a"},
+    )
+    assert cached_state["path/a"] == "a"
+    cached_state.ls(prefix="path/")
+    get_object = mocker.spy(s3_client, "get_object")
+    head_object = mocker.spy(s3_client, "head_object")
+
+    assert cached_state["path/a"] == "a"
+    assert cached_state.head("path/a") == (True, {"m": "a"})
+    assert cached_state.exists("path/a")
+    assert not cached_state.exists("path/b")
+    with pytest.raises(KeyError):
+        cached_state["path/b"]
+    cached_state.add("path/b", "b")
+    assert cached_state.exists("path/b")
+    assert cached_state["path/b"] == "b"
+    cached_state.rm("path/b")
+    assert not cached_state.exists("path/b")
+
+    get_object.assert_not_called()
+    head_object.assert_not_called()
+    # keys outside of the listed prefix are not answered from the snapshot
+    assert not cached_state.exists("other")
+    head_object.assert_called_once()
+
+
+def test_batch_writes_on_exit(
+    integration_state: State, s3_client: S3Client, mocker: MockerFixture
+) -> None:
+    put_object = mocker.spy(s3_client, "put_object")
+
+    with integration_state.batch():
+        integration_state["a"] = 1
+        integration_state.add("b", 2)
+        integration_state.add("b", 3, force=True)
+        with pytest.raises(KeyError):
+            integration_state.add("a", 4)
+        assert integration_state.exists("a")
+        assert integration_state["b"] == 3
+        put_object.assert_not_called()
+
+    assert put_object.call_count == 2
+    assert integration_state.get_many(["a", "b"]) == {"a": 1, "b": 3}
+
+
+@pytest.mark.parametrize("exception", [AbortStateTransactionError, ValueError])
+def test_batch_exception(integration_state: State, exception: type[Exception]) -> None:
+    with contextlib.suppress(ValueError), integration_state.batch():
+        integration_state["a"] = 1
+        raise exception()
+
+    assert not integration_state.exists("a")
+    # writes after the batch are not buffered
+    integration_state["a"] = 2
+    assert integration_state["a"] == 2
+
+
+def test_batch_other_threads_write_directly(integration_state: State) -> None:
+    with contextlib.suppress(ValueError), integration_state.batch():
+        integration_state["a"] = 1
+        thread = threading.Thread(target=integration_state.__setitem__, args=("b", 2))
+        thread.start()
+        thread.join()
+        raise ValueError()
+
+    assert not integration_state.exists("a")
+    assert integration_state["b"] == 2
+
+
+def test_compressed_value(
+    integration_state: State, s3_client: S3Client, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(state, "COMPRESSION_MIN_SIZE", 100)
+    value = {"data": "a" * 1000}
+
+    integration_state["large"] = value
+    integration_state["small"] = "a"
+
+    large = s3_client.get_object(Bucket=BUCKET, Key="state/integration-name/large")
+    assert large["ContentEncoding"] == "zstd"
+    assert large["ContentLength"] < 1000
+    small = s3_client.get_object(Bucket=BUCKET, Key="state/integration-name/small")
+    assert "ContentEncoding" not in small
+    assert integration_state.get_many(["large", "small"]) == {
+        "large": value,
+        "small": "a",
+    }
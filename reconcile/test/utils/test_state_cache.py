@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from reconcile.utils.state_cache import CachedStateObject, StateObjectCache
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _obj(body: bytes) -> CachedStateObject:
+    return CachedStateObject(etag="etag", body=body)
+
+
+def test_memory_evicts_least_recently_used() -> None:
+    cache = StateObjectCache(memory_max_bytes=10)
+    cache.set("bucket", "a", _obj(b"aaaa"))
+    cache.set("bucket", "b", _obj(b"bbbb"))
+    assert cache.get("bucket", "a") is not None
+
+    cache.set("bucket", "c", _obj(b"cccc"))
+
+    assert cache.get("bucket", "a") is not None
+    assert cache.get("bucket", "b") is None
+    assert cache.get("bucket", "c") is not None
+
+
+def test_memory_skips_large_objects() -> None:
+    cache = StateObjectCache(memory_max_bytes=10)
+    cache.set("bucket", "a", _obj(b"aaaa"))
+
+    cache.set("bucket", "b", _obj(b"b" * 11))
+
+    assert cache.get("bucket", "a") is not None
+    assert cache.get("bucket", "b") is None
+
+
+def test_directory_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = StateObjectCache(
+        directory=str(tmp_path), memory_max_bytes=0, directory_max_bytes=250
+    )
+    cache.set("bucket", "a", _obj(b"a" * 50))
+    cache.set("bucket", "b", _obj(b"b" * 50))
+    # entries used longer ago are evicted first
+    os.utime(tmp_path / StateObjectCache._file_name("bucket/a"), (0, 0))
+
+    cache.set("bucket", "c", _obj(b"c" * 50))
+
+    assert cache.get("bucket", "a") is None
+    assert cache.get("bucket", "b") is not None
+    assert cache.get("bucket", "c") is not None
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 250
+
+
+def test_directory_survives_new_cache(tmp_path: Path) -> None:
+    StateObjectCache(directory=str(tmp_path)).set("bucket", "a", _obj(b"a"))
+
+    cached = StateObjectCache(directory=str(tmp_path)).get("bucket", "a")
+
+    assert cached == _obj(b"a")
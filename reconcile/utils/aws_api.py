@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import operator
 import os
-from functools import lru_cache
+from functools import lru_cache, partial
 from threading import Lock
 from typing import (
     TYPE_CHECKING,
@@ -21,6 +22,7 @@ from sretoolbox.utils import threaded
 
 import reconcile.utils.aws_helper as awsh
 import reconcile.utils.lean_terraform_client as terraform
+from reconcile.utils.runtime.process_context import get_process_context
 from reconcile.utils.secret_reader import SecretReader, SecretReaderBase
 
 if TYPE_CHECKING:
@@ -192,12 +194,20 @@ class AWSApi:
                 logging.debug(f"FIPS endpoint enabled for AWS account: {account_name}")
                 self.use_fips = True
 
-            session = Session(
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                region_name=region_name,
+            # sessions are expensive to create, daemons keep them until the
+            # credentials change
+            self.sessions[account_name] = get_process_context().get_or_create(
+                f"aws-session/{account_name}",
+                partial(
+                    Session,
+                    aws_access_key_id=access_key,
+                    aws_secret_access_key=secret_key,
+                    region_name=region_name,
+                ),
+                key=hashlib.sha256(
+                    f"{access_key}:{secret_key}:{region_name}".encode()
+                ).hexdigest(),
             )
-            self.sessions[account_name] = session
 
     def __enter__(self) -> Self:
         return self
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from contextlib import suppress
+
+
+class BoundedDirectory:
+    """Files in a local directory, bounded in size.
+
+    The least recently used files are removed once the directory grows beyond
+    `max_bytes`. The mtime of a file tracks its last use. Files are written to
+    a temporary file first, so readers never see partial files.
+
+    :param path: directory, created on the first write
+    :param max_bytes: max size of all files in the directory
+    """
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = 0
+        if os.path.isdir(self.path):
+            self._size = sum(size for _, _, size in self._entries())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        entries = []
+        for entry in os.scandir(self.path):
+            # temporary files start with a dot
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def read(self, name: str) -> bytes | None:
+        """Returns the content of a file, None if it does not exist."""
+        path = self._file(name)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def write(self, name: str, content: bytes) -> None:
+        """Writes a file and evicts the least recently used files if needed.
+
+        Raises OSError if the file can not be written.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, self._file(name))
+        except OSError:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._size += len(content)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def remove(self, name: str) -> None:
+        with suppress(FileNotFoundError):
+            os.remove(self._file(name))
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        self._size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            self._size -= size
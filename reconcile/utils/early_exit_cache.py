@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
+import logging
+import os
+import threading
+import time
 from datetime import UTC, datetime, timedelta
 from enum import Enum
-from functools import cached_property
-from typing import TYPE_CHECKING, Self
+from functools import cache, cached_property
+from typing import TYPE_CHECKING, Protocol, Self
 
 from deepdiff import DeepHash
 from pydantic import BaseModel, ConfigDict
@@ -12,7 +17,7 @@ from reconcile.utils.datetime_util import utc_now
 from reconcile.utils.state import State, init_state
 
 if TYPE_CHECKING:
-    from collections.abc import Mapping
+    from collections.abc import Callable, Mapping
 
     from reconcile.utils.secret_reader import SecretReaderBase
 
@@ -20,6 +25,10 @@ STATE_INTEGRATION = "early-exit-cache"
 EXPIRE_AT_METADATA_KEY = "expire-at"
 CACHE_SOURCE_DIGEST_METADATA_KEY = "cache-source-digest"
 LATEST_CACHE_SOURCE_DIGEST_METADATA_KEY = "latest-cache-source-digest"
+# seconds to keep head results in the front tier, 0 disables it. Changes done by
+# other processes are not seen before the ttl is over.
+HEAD_CACHE_TTL = int(os.environ.get("EARLY_EXIT_CACHE_HEAD_TTL", "0"))
+HEAD_CACHE_KEY_PREFIX = "early-exit-cache-head:"
 
 
 class CacheKeyWithDigest(BaseModel, frozen=True):
@@ -148,9 +157,110 @@ class CacheHeadResult(BaseModel):
     latest_cache_source_digest: str
 
 
+class HeadCacheBackend(Protocol):
+    """A shared string cache, e.g. a qontract_api CacheBackend."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl: int | None = None) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+
+class HeadCache:
+    """
+    Front tier for the State head results of the early exit cache.
+
+    Results are kept in process memory and, if a backend is given, in a shared
+    cache for other processes, both for `ttl` seconds. Backend errors are logged
+    and the lookup falls back to the State.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        backend: HeadCacheBackend | None = None,
+        now: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.backend = backend
+        self.now = now
+        self._memory: dict[str, tuple[float, bool, dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        # all entries share the same ttl, so the dict is ordered by expiry
+        while self._memory:
+            path, (expire_at, _, _) = next(iter(self._memory.items()))
+            if now < expire_at:
+                break
+            del self._memory[path]
+
+    def get(self, path: str) -> tuple[bool, dict[str, str]] | None:
+        with self._lock:
+            self._prune(self.now())
+            entry = self._memory.get(path)
+        if entry is not None:
+            return entry[1], entry[2]
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(HEAD_CACHE_KEY_PREFIX + path)
+            if value is None:
+                return None
+            data = json.loads(value)
+            exists, metadata = data["exists"], data["metadata"]
+        except Exception as e:
+            logging.warning(f"early exit head cache backend lookup failed: {e!r}")
+            return None
+        self._set_memory(path, exists, metadata)
+        return exists, metadata
+
+    def _set_memory(self, path: str, exists: bool, metadata: dict[str, str]) -> None:
+        with self._lock:
+            now = self.now()
+            self._prune(now)
+            # re-insert to keep the dict ordered by expiry
+            self._memory.pop(path, None)
+            self._memory[path] = (now + self.ttl, exists, metadata)
+
+    def set(self, path: str, exists: bool, metadata: Mapping[str, str]) -> None:
+        self._set_memory(path, exists, dict(metadata))
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(
+                HEAD_CACHE_KEY_PREFIX + path,
+                json.dumps({"exists": exists, "metadata": dict(metadata)}),
+                self.ttl,
+            )
+        except Exception as e:
+            logging.warning(f"early exit head cache backend unavailable: {e}")
+
+    def delete(self, path: str) -> None:
+        with self._lock:
+            self._memory.pop(path, None)
+        if self.backend is None:
+            return
+        try:
+            self.backend.delete(HEAD_CACHE_KEY_PREFIX + path)
+        except Exception as e:
+            logging.warning(f"early exit head cache backend unavailable: {e}")
+
+
+@cache
+def get_head_cache() -> HeadCache | None:
+    """Returns the head cache shared by all EarlyExitCaches of this process,
+    None if it is disabled."""
+    if not HEAD_CACHE_TTL:
+        return None
+    return HeadCache(ttl=HEAD_CACHE_TTL)
+
+
 class EarlyExitCache:
-    def __init__(self, state: State):
+    def __init__(self, state: State, head_cache: HeadCache | None = None):
         self.state = state
+        self.head_cache = head_cache
 
     @classmethod
     def build(
@@ -158,7 +268,7 @@ class EarlyExitCache:
         secret_reader: SecretReaderBase | None = None,
     ) -> Self:
         state = init_state(STATE_INTEGRATION, secret_reader)
-        return cls(state)
+        return cls(state, head_cache=get_head_cache())
 
     def __enter__(self) -> Self:
         return self
@@ -201,6 +311,8 @@ class EarlyExitCache:
             metadata=metadata,
             force=True,
         )
+        if self.head_cache is not None:
+            self.head_cache.set(str(key), True, metadata)
 
     def head(self, key: CacheKey) -> CacheHeadResult:
         """
@@ -220,6 +332,17 @@ class EarlyExitCache:
         :return: None
         """
         self.state.rm(str(key))
+        if self.head_cache is not None:
+            self.head_cache.delete(str(key))
+
+    def _head(self, path: str) -> tuple[bool, Mapping[str, str]]:
+        if self.head_cache is None:
+            return self.state.head(path)
+        if (result := self.head_cache.get(path)) is not None:
+            return result
+        exists, metadata = self.state.head(path)
+        self.head_cache.set(path, exists, metadata)
+        return exists, metadata
 
     @staticmethod
     def _is_stale(
@@ -245,7 +368,7 @@ class EarlyExitCache:
         key: CacheKey,
         latest_cache_source_digest: str,
     ) -> CacheStatus:
-        exists, metadata = self.state.head(key.dry_run_path())
+        exists, metadata = self._head(key.dry_run_path())
         if not exists:
             return CacheStatus.MISS
         if self._is_expired(metadata):
@@ -255,7 +378,7 @@ class EarlyExitCache:
         return CacheStatus.HIT
 
     def _head_dry_run(self, key: CacheKey) -> CacheHeadResult:
-        _, latest_metadata = self.state.head(key.no_dry_run_path())
+        _, latest_metadata = self._head(key.no_dry_run_path())
         latest_cache_source_digest = (
             latest_metadata.get(CACHE_SOURCE_DIGEST_METADATA_KEY) or ""
         )
@@ -278,7 +401,7 @@ class EarlyExitCache:
         return CacheStatus.HIT
 
     def _head_no_dry_run(self, key: CacheKey) -> CacheHeadResult:
-        exists, metadata = self.state.head(key.no_dry_run_path())
+        exists, metadata = self._head(key.no_dry_run_path())
         latest_cache_source_digest = (
             metadata.get(CACHE_SOURCE_DIGEST_METADATA_KEY) or ""
         )
@@ -7,16 +7,18 @@ from typing import TYPE_CHECKING, Self
 from urllib.parse import urlparse
 
 from github import Commit, Github, GithubException, UnknownObjectException
-from sretoolbox.utils import retry
+from sretoolbox.utils import retry, threaded
 
 if TYPE_CHECKING:
     from types import TracebackType
 
+    from github.ContentFile import ContentFile
     from github.Repository import Repository
 
 GH_BASE_URL = os.environ.get("GITHUB_API", "https://api.github.com")
 
 MAX_FILE_CONTENT_SIZE = 1024**2  # 1MB
+DIRECTORY_CONTENTS_THREAD_POOL_SIZE = 10
 
 
 class UnsupportedDirectoryError(Exception):
@@ -96,6 +98,44 @@ class GithubRepositoryApi:
         blob = repo.get_git_blob(content.sha)
         return base64.b64decode(blob.content)
 
+    @staticmethod
+    def get_directory_contents(
+        repo: Repository,
+        path: str,
+        ref: str,
+        thread_pool_size: int = DIRECTORY_CONTENTS_THREAD_POOL_SIZE,
+    ) -> dict[str, bytes]:
+        """
+        Get the contents of the files in a directory.
+
+        The directory listing already contains the blob sha of each file, so
+        the blobs are fetched directly and in parallel.
+
+        :param repo: The repository to get the contents from.
+        :param ref: The commit SHA, tag or branch to get the contents at.
+        :param path: The path of the directory.
+        :return: A dictionary with the file path as keys and the file content bytes as values.
+        """
+        directory = repo.get_contents(path=path, ref=ref)
+        if not isinstance(directory, list):
+            raise TypeError(
+                f"Path {path} of ref {ref} in repo {repo.full_name} is a file!"
+            )
+
+        def _get_content(item: ContentFile) -> bytes:
+            if item.type != "file":
+                # symlinks and submodules are resolved by the contents API
+                return GithubRepositoryApi.get_raw_file(
+                    repo=repo, path=item.path, ref=ref
+                )
+            return base64.b64decode(repo.get_git_blob(item.sha).content)
+
+        contents = threaded.run(_get_content, directory, thread_pool_size)
+        return {
+            item.path: content
+            for item, content in zip(directory, contents, strict=True)
+        }
+
     @retry()
     def get_file(
         self,
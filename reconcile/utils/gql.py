@@ -25,6 +25,7 @@ from sretoolbox.utils import retry
 
 from reconcile.status import RunningState
 from reconcile.utils.config import get_config
+from reconcile.utils.runtime.process_context import get_process_context
 
 INTEGRATIONS_QUERY = """
 {
@@ -36,6 +37,8 @@ INTEGRATIONS_QUERY = """
 }
 """
 
+BUNDLE_SHA_PATH_PREFIX = "/graphqlsha/"
+
 requests_logger.setLevel(logging.WARNING)
 
 
@@ -248,6 +251,14 @@ class GqlApi:
             return datetime.fromtimestamp(int(self.commit_timestamp), UTC).isoformat()
         return None
 
+    @property
+    def bundle_sha(self) -> str | None:
+        """The sha of the bundle this client is pinned to, if any."""
+        path = urlparse(self.url).path
+        if path.startswith(BUNDLE_SHA_PATH_PREFIX):
+            return path.removeprefix(BUNDLE_SHA_PATH_PREFIX)
+        return None
+
 
 class GqlApiSingleton:
     gql_api: GqlApi | None = None
@@ -339,6 +350,21 @@ def get_sha(server: ParseResult, token: str | None = None) -> str:
     return sha
 
 
+def get_current_sha(timeout: float = 5) -> str:
+    """
+    Returns the sha of the bundle the configured server currently serves.
+
+    Meant for polling, so it makes a single short request without retries.
+    """
+    config = get_config()
+    token = config["graphql"].get("token")
+    sha_endpoint = urlparse(config["graphql"]["server"])._replace(path="/sha256")
+    headers = {"Authorization": token} if token else None
+    response = requests.get(sha_endpoint.geturl(), headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.content.decode("utf-8")
+
+
 @retry(exceptions=requests.exceptions.HTTPError, max_attempts=5)
 def get_git_commit_info(
     sha: str, server: ParseResult, token: str | None = None
@@ -367,6 +393,8 @@ def init_from_config(
 
     if print_url:
         logging.info(f"using gql endpoint {server}")
+    # the server url contains the bundle sha, if there is one
+    get_process_context().set_bundle(server)
     return init(
         server,
         token,
@@ -386,10 +414,10 @@ def _get_gql_server_and_token(
     server = server_url.geturl()
     token = config["graphql"].get("token")
     if sha:
-        server = server_url._replace(path=f"/graphqlsha/{sha}").geturl()
+        server = server_url._replace(path=f"{BUNDLE_SHA_PATH_PREFIX}{sha}").geturl()
     elif autodetect_sha:
         sha = get_sha(server_url, token)
-        server = server_url._replace(path=f"/graphqlsha/{sha}").geturl()
+        server = server_url._replace(path=f"{BUNDLE_SHA_PATH_PREFIX}{sha}").geturl()
     if sha:
         running_state = RunningState()
         git_commit_info = get_git_commit_info(sha, server_url, token)
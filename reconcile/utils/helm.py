@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import tempfile
+from contextlib import nullcontext
 from subprocess import (
     CalledProcessError,
     run,
@@ -14,10 +16,23 @@ import yaml
 from reconcile.utils import git
 from reconcile.utils.json import json_dumps
 from reconcile.utils.runtime.sharding import ShardSpec
+from reconcile.utils.single_flight import SingleFlightCache
 
 if TYPE_CHECKING:
     from collections.abc import Iterable, Mapping
 
+# persistent helm repository cache (repository indexes), shared by all
+# `helm` calls of the process. a new temporary directory per call if unset.
+HELM_REPOSITORY_CACHE_DIR = os.environ.get("HELM_REPOSITORY_CACHE_DIR")
+HELM_TEMPLATE_CACHE_MAX_ENTRIES = int(
+    os.environ.get("HELM_TEMPLATE_CACHE_MAX_ENTRIES", "256")
+)
+
+# rendered charts of immutable commits, see template_all
+_rendered_templates: SingleFlightCache[tuple[str, ...], str] = SingleFlightCache(
+    max_entries=HELM_TEMPLATE_CACHE_MAX_ENTRIES
+)
+
 
 class HelmTemplateError(Exception):
     pass
@@ -30,6 +45,13 @@ class JSONEncoder(json.JSONEncoder):
         return super().default(o)
 
 
+def _repository_cache_dir() -> nullcontext[str] | tempfile.TemporaryDirectory[str]:
+    if HELM_REPOSITORY_CACHE_DIR:
+        os.makedirs(HELM_REPOSITORY_CACHE_DIR, exist_ok=True)
+        return nullcontext(HELM_REPOSITORY_CACHE_DIR)
+    return tempfile.TemporaryDirectory()
+
+
 def do_template(
     values: Mapping[str, Any],
     path: str,
@@ -40,7 +62,7 @@ def do_template(
             tempfile.NamedTemporaryFile(
                 mode="w+", encoding="locale"
             ) as repository_config_file,
-            tempfile.TemporaryDirectory() as repository_cache_dir,
+            _repository_cache_dir() as repository_cache_dir,
         ):
             with open(
                 os.path.join(path, "Chart.yaml"), encoding="locale"
@@ -110,17 +132,42 @@ def template(
     return yaml.safe_load(do_template(values=values, path=path, namespace=namespace))
 
 
-def template_all(
+def _template_ref(
     url: str,
     path: str,
     ref: str,
     namespace: str,
     values: Mapping[str, Any],
-    ssl_verify: bool = True,
-) -> Iterable[Mapping[str, Any]]:
+    ssl_verify: bool,
+) -> str:
     with tempfile.TemporaryDirectory() as wd:
         git.clone(url, wd, depth=1, verify=ssl_verify)
         git.checkout(ref, wd, verify=ssl_verify)
-        return yaml.safe_load_all(
-            do_template(values=values, path=f"{wd}{path}", namespace=namespace)
+        return do_template(values=values, path=f"{wd}{path}", namespace=namespace)
+
+
+def template_all(
+    url: str,
+    path: str,
+    ref: str,
+    namespace: str,
+    values: Mapping[str, Any],
+    ssl_verify: bool = True,
+    commit_sha: str | None = None,
+) -> Iterable[Mapping[str, Any]]:
+    """Renders the chart at `path` of the git repository `url` at `ref`.
+
+    If `commit_sha` is the commit `ref` points to, the chart is immutable and
+    the rendered output is reused by all calls with the same values.
+    """
+    if not commit_sha:
+        rendered = _template_ref(url, path, ref, namespace, values, ssl_verify)
+    else:
+        values_hash = hashlib.sha256(
+            json_dumps(values, cls=JSONEncoder).encode("utf-8")
+        ).hexdigest()
+        rendered = _rendered_templates.get_or_set(
+            (url, path, commit_sha, namespace, values_hash),
+            lambda: _template_ref(url, path, commit_sha, namespace, values, ssl_verify),
         )
+    return yaml.safe_load_all(rendered)
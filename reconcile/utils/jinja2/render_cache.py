@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING, Any
+
+from reconcile.utils import gql
+from reconcile.utils.jinja2.utils import Jinja2TemplateCache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+# template functions that render their arguments with the template variables,
+# so their results depend on everything the variables expose
+# (e.g. `resource.namespace.name`) even if the template body does not refer to it
+VARIABLE_RENDERING_TEMPLATE_FUNCTIONS = frozenset({"github", "vault"})
+
+# template functions whose results can change while the bundle stays the same.
+# the rendered output of templates using them is never reused beyond a single run.
+VOLATILE_TEMPLATE_FUNCTIONS = frozenset({
+    "github",
+    "s3",
+    "s3_ls",
+    "url",
+    "vault",
+    "yesterday",
+})
+
+PERSISTENT_RENDER_CACHE_ENABLED = os.environ.get(
+    "PERSISTENT_RENDER_CACHE", ""
+).lower() in {"true", "1", "yes"}
+PERSISTENT_RENDER_CACHE_MAX_ENTRIES = int(
+    os.environ.get("PERSISTENT_RENDER_CACHE_MAX_ENTRIES", "100000")
+)
+
+
+class PersistentRenderCache:
+    """Rendered templates shared by all runs of a process for the same bundle sha.
+
+    run_integration.py runs an integration in a loop within the same process. As
+    long as the bundle does not change, the output of templates that only depend on
+    bundle data can be reused by the next run. All entries are dropped as soon as
+    a different bundle sha is seen.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._bundle_sha: str | None = None
+        self._store: dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, bundle_sha: str, key: Hashable) -> str | None:
+        with self._lock:
+            if bundle_sha != self._bundle_sha:
+                return None
+            return self._store.get(key)
+
+    def set(self, bundle_sha: str, key: Hashable, rendered: str) -> None:
+        with self._lock:
+            if bundle_sha != self._bundle_sha:
+                self._bundle_sha = bundle_sha
+                self._store = {}
+            if len(self._store) < self.max_entries:
+                self._store[key] = rendered
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bundle_sha = None
+            self._store = {}
+
+
+persistent_render_cache = PersistentRenderCache(PERSISTENT_RENDER_CACHE_MAX_ENTRIES)
+
+
+def current_bundle_sha() -> str | None:
+    try:
+        return gql.get_api().bundle_sha
+    except gql.GqlApiError:
+        return None
+
+
+def render_with_cache(
+    cache: Jinja2TemplateCache,
+    key: Hashable,
+    template_variables: frozenset[str],
+    render: Callable[[], Any],
+) -> Any:
+    """Returns the memoized output for a render cache key or renders it.
+
+    The in-run memo lives in the RENDER namespace of the Jinja2TemplateCache,
+    concurrent callers for the same key wait for a single rendering. If enabled,
+    templates without volatile lookups are additionally looked up in the
+    persistent render cache of the current bundle sha.
+
+    :param cache: the Jinja2TemplateCache of the current run
+    :param key: must identify all inputs of the rendering
+    :param template_variables: undeclared variables of the template,
+        see jinja2_template_variables
+    :param render: renders the template on a cache miss
+    """
+
+    def _render() -> Any:
+        bundle_sha = None
+        if PERSISTENT_RENDER_CACHE_ENABLED and not (
+            template_variables & VOLATILE_TEMPLATE_FUNCTIONS
+        ):
+            bundle_sha = current_bundle_sha()
+        if bundle_sha is None:
+            return render()
+        rendered = persistent_render_cache.get(bundle_sha, key)
+        if rendered is None:
+            rendered = render()
+            persistent_render_cache.set(bundle_sha, key, rendered)
+        return rendered
+
+    return cache.get_or_set(Jinja2TemplateCache.RENDER, key, _render)
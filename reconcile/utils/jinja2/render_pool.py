@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from reconcile.utils.jinja2.utils import (
+    jinja2_template_variables,
+    process_jinja2_template,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+
+# template functions that do I/O. they need the secret reader, credentials and
+# the Jinja2TemplateCache of the run, so templates using them are rendered in the
+# calling process.
+IO_TEMPLATE_FUNCTIONS = frozenset({
+    "github",
+    "query",
+    "s3",
+    "s3_ls",
+    "url",
+    "vault",
+})
+
+# number of worker processes rendering templates without I/O lookups,
+# 0 renders all templates in the calling thread
+RENDER_PROCESS_POOL_SIZE = int(os.environ.get("RENDER_PROCESS_POOL_SIZE", "0"))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def render_process_pool() -> ProcessPoolExecutor | None:
+    """Returns the process pool shared by all runs of this process, if enabled.
+
+    Workers are started lazily and kept for the lifetime of the process, so the
+    integrations run in a loop by run_integration.py do not pay the start-up and
+    import costs more than once.
+    """
+    global _pool  # ruff: ignore[global-statement]
+    if RENDER_PROCESS_POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # the calling process runs threads, forking it is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESS_POOL_SIZE,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+            atexit.register(_pool.shutdown, cancel_futures=True)
+        return _pool
+
+
+def _render(body: str, vars: dict[str, Any], extra_curly: bool) -> Any:
+    return process_jinja2_template(body, vars=vars, extra_curly=extra_curly)
+
+
+def render_in_process_pool(
+    body: str,
+    vars: Mapping[str, Any] | None,
+    extra_curly: bool,
+    render: Callable[[], Any],
+) -> Any:
+    """Renders a template in the render process pool.
+
+    Jinja2 rendering is CPU bound and serialized by the GIL, no matter how many
+    threads fetch the desired state. Templates that do not use any I/O lookups
+    only depend on their variables, so only the variables they refer to are sent
+    to a worker process. Everything else, including failed renderings, is handled
+    by `render` in the calling thread, which also reports template errors the same
+    way as without a process pool.
+
+    :param body: the template
+    :param vars: the template variables
+    :param extra_curly: whether the template uses extra curly braces
+    :param render: renders the template in the calling thread
+    """
+    pool = render_process_pool()
+    if pool is None:
+        return render()
+    vars = vars or {}
+    try:
+        template_variables = jinja2_template_variables(body, extra_curly)
+    except Exception:
+        return render()
+    if template_variables & IO_TEMPLATE_FUNCTIONS or "_template_mocks" in vars:
+        return render()
+    worker_vars = {k: vars[k] for k in template_variables if k in vars}
+    try:
+        return pool.submit(_render, body, worker_vars, extra_curly).result()
+    except Exception:
+        return render()
+
+
+def pooled_template_function(
+    tfunc: Callable[..., Any],
+    extra_curly: bool,
+) -> Callable[..., Any]:
+    """Wraps a template function to render templates without I/O lookups in
+    the render process pool, see render_in_process_pool."""
+
+    def render(
+        body: str,
+        vars: dict[str, Any],
+        settings: Mapping[str, Any] | None = None,
+    ) -> Any:
+        return render_in_process_pool(
+            body,
+            vars,
+            extra_curly,
+            lambda: tfunc(body=body, vars=vars, settings=settings),
+        )
+
+    return render
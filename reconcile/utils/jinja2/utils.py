@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING, Any, Self
 
 import jinja2
 from github import Github
+from jinja2 import meta
 from jinja2.sandbox import SandboxedEnvironment
 from pydantic import BaseModel
 from sretoolbox.utils import retry
@@ -70,11 +71,10 @@ class TemplateRenderOptions(BaseModel, frozen=True):
 
 
 @cache
-def compile_jinja2_template(
-    body: str,
+def _jinja2_environment(
     extra_curly: bool = False,
     template_render_options: TemplateRenderOptions | None = None,
-) -> Any:
+) -> SandboxedEnvironment:
     if not template_render_options:
         template_render_options = TemplateRenderOptions.create()
     env: dict[str, Any] = template_render_options.model_dump()
@@ -104,8 +104,24 @@ def compile_jinja2_template(
         "json_pointers": json_pointers,
         "str_format": str_format,
     })
+    return jinja_env
 
-    return jinja_env.from_string(body)
+
+@cache
+def compile_jinja2_template(
+    body: str,
+    extra_curly: bool = False,
+    template_render_options: TemplateRenderOptions | None = None,
+) -> Any:
+    return _jinja2_environment(extra_curly, template_render_options).from_string(body)
+
+
+@cache
+def jinja2_template_variables(body: str, extra_curly: bool = False) -> frozenset[str]:
+    """Returns the names of the variables a template refers to without
+    declaring them itself, e.g. `resource` or lookup functions like `vault`."""
+    ast = _jinja2_environment(extra_curly).parse(body)
+    return frozenset(meta.find_undeclared_variables(ast))
 
 
 GH_BASE_URL = os.environ.get("GITHUB_API", "https://api.github.com")
@@ -117,7 +133,8 @@ def init_github() -> Github:
 
 
 class Jinja2TemplateCache:
-    """Scoped cache for Jinja2 template external lookups (vault, github, s3, query).
+    """Scoped cache for Jinja2 template external lookups (vault, github, s3, query)
+    and rendered templates.
 
     Create one instance per integration run and pass it to process_jinja2_template
     so all template renderings within a run share cached results. A fresh instance
@@ -126,11 +143,12 @@ class Jinja2TemplateCache:
 
     GITHUB = "github"
     QUERY = "query"
+    RENDER = "render"
     S3 = "s3"
     S3_LS = "s3_ls"
     VAULT = "vault"
 
-    _NAMESPACES = (GITHUB, QUERY, S3, S3_LS, VAULT)
+    _NAMESPACES = (GITHUB, QUERY, RENDER, S3, S3_LS, VAULT)
 
     def __init__(self) -> None:
         self._stores: dict[str, dict[Any, Any]] = {ns: {} for ns in self._NAMESPACES}
@@ -279,6 +297,18 @@ def list_s3_objects(
     return cache.get_or_set(Jinja2TemplateCache.S3_LS, cache_key, _fetch)
 
 
+def vault_secret_cache_key(path: str, version: Any) -> tuple[str, str | None]:
+    """Returns the key of a vault secret in the VAULT namespace of the
+    Jinja2TemplateCache.
+
+    "LATEST" and None both mean "current version" in Vault KV v2, sharing a
+    single cache entry avoids a redundant Vault read.
+    """
+    if version is None or str(version).upper() == "LATEST":
+        return (path, None)
+    return (path, str(version))
+
+
 @retry()
 def _vault_read_all(
     secret_reader: SecretReaderBase,
@@ -324,11 +354,8 @@ def lookup_secret(
             )
     if not secret_reader:
         secret_reader = SecretReader(settings)
-    # Normalize "LATEST" to None — both mean "current version" in Vault KV v2,
-    # sharing a single cache entry avoids a redundant Vault read.
-    if version is not None and str(version).upper() == "LATEST":
-        version = None
-    cache_key = (path, str(version) if version is not None else None)
+    cache_key = vault_secret_cache_key(path, version)
+    version = cache_key[1]
 
     sr = secret_reader
 
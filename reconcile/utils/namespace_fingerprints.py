@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import defaultdict
+from itertools import starmap
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from reconcile.utils.openshift_resource import ResourceInventory
+    from reconcile.utils.state import State
+
+STATE_KEY_PREFIX = "namespace-fingerprints"
+
+
+def namespace_fingerprints(ri: ResourceInventory) -> dict[str, dict[str, str]]:
+    """Returns the fingerprints of the desired state of all namespaces in a
+    ResourceInventory, grouped by cluster.
+
+    A fingerprint covers the managed resource types and names and the
+    canonical sha256sum of every desired resource.
+    """
+    specs: dict[tuple[str, str], list[Any]] = defaultdict(list)
+    for cluster, namespace, kind, data in ri:
+        specs[cluster, namespace].append([
+            kind,
+            data["managed_names"],
+            sorted(
+                [name, resource.sha256sum(), data["use_admin_token"].get(name)]
+                for name, resource in data["desired"].items()
+            ),
+        ])
+    fingerprints: dict[str, dict[str, str]] = defaultdict(dict)
+    for (cluster, namespace), spec in specs.items():
+        fingerprints[cluster][namespace] = hashlib.sha256(
+            json.dumps(sorted(spec, key=str), sort_keys=True).encode("utf-8")
+        ).hexdigest()
+    return fingerprints
+
+
+class NamespaceFingerprints:
+    """Desired state fingerprints of namespaces, persisted per namespace in State.
+
+    A namespace whose desired state did not change since the last successful
+    reconciliation does not need to be reconciled again, unless something changed
+    on the cluster. To detect such drift, every namespace is reconciled at least
+    once every `full_sweep_interval` seconds.
+
+    Every namespace has its own key, so shards and runs that only see some
+    namespaces of a cluster do not touch the fingerprints of the others.
+
+    :param state: State of the integration
+    :param full_sweep_interval: max seconds between two reconciliations of a
+        namespace
+    :param version: version of the integration, a new version reconciles all
+        namespaces
+    """
+
+    def __init__(
+        self,
+        state: State,
+        full_sweep_interval: int,
+        version: str,
+        now: Callable[[], float] = time.time,
+    ) -> None:
+        self.state = state
+        self.full_sweep_interval = full_sweep_interval
+        self.version = version
+        self.now = now
+        self._pending: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    def key(cluster: str, namespace: str) -> str:
+        return f"{STATE_KEY_PREFIX}/{cluster}/{namespace}"
+
+    def changed_namespaces(self, ri: ResourceInventory) -> set[tuple[str, str]]:
+        """Returns the (cluster, namespace) pairs that need to be reconciled.
+
+        The desired state must already be in the ResourceInventory. The new
+        fingerprints are kept until `commit` is called.
+        """
+        fingerprints = {
+            (cluster, namespace): fingerprint
+            for cluster, namespaces in namespace_fingerprints(ri).items()
+            for namespace, fingerprint in namespaces.items()
+        }
+        stored_values = self.state.get_many(starmap(self.key, fingerprints))
+        changed: set[tuple[str, str]] = set()
+        now = self.now()
+        for (cluster, namespace), fingerprint in fingerprints.items():
+            key = self.key(cluster, namespace)
+            stored = stored_values.get(key) or {}
+            full_sweep = (
+                ri.has_error_registered(cluster)
+                or stored.get("version") != self.version
+                or now - stored.get("full_sweep", 0) >= self.full_sweep_interval
+            )
+            if full_sweep or stored.get("fingerprint") != fingerprint:
+                changed.add((cluster, namespace))
+            self._pending[key] = {
+                "version": self.version,
+                "full_sweep": now if full_sweep else stored.get("full_sweep", 0),
+                "fingerprint": fingerprint,
+            }
+        return changed
+
+    def commit(self) -> None:
+        """Persists the fingerprints computed by `changed_namespaces`.
+
+        Call only after all changed namespaces were reconciled successfully.
+        """
+        with self.state.batch():
+            for key, value in self._pending.items():
+                self.state.add(key, value, force=True)
+        self._pending = {}
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 import itertools
 import json
 import logging
@@ -50,6 +51,11 @@ from reconcile.status import RunningState
 from reconcile.utils.json import json_dumps
 from reconcile.utils.metrics import oc_get_items_duration, reconcile_time
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
+from reconcile.utils.openshift_template import (
+    TemplateProcessingError,
+    process_template,
+)
+from reconcile.utils.runtime.process_context import get_process_context
 from reconcile.utils.secret_reader import (
     SecretNotFoundError,
     SecretReader,
@@ -64,6 +70,13 @@ if TYPE_CHECKING:
 urllib3.disable_warnings()
 
 GET_REPLICASET_MAX_ATTEMPTS = 20
+OC_PROCESS_USE_BINARY = os.environ.get("OC_PROCESS_USE_BINARY", "").lower() in {
+    "true",
+    "1",
+    "yes",
+}
+# seconds daemons keep the api resources discovered on a cluster
+OC_API_RESOURCES_CACHE_TTL = int(os.environ.get("OC_API_RESOURCES_CACHE_TTL", "300"))
 DEFAULT_GROUP = ""
 PROJECT_KIND = "Project.project.openshift.io"
 USER_KIND = "User.user.openshift.io"
@@ -243,6 +256,13 @@ class OCProcessReconcileTimeDecoratorMsg:
 def oc_process(
     template: Mapping[str, Any], parameters: Mapping[str, Any] | None = None
 ) -> Iterable[dict[str, Any]]:
+    """Processes a template in-process, falls back to `oc process` for
+    templates the in-process implementation does not handle."""
+    if not OC_PROCESS_USE_BINARY:
+        try:
+            return process_template(template, parameters)
+        except TemplateProcessingError as e:
+            logging.debug(f"processing template with oc: {e}")
     oc = OCLocal(cluster_name="cluster", server=None, token=None, local=True)
     return oc.process(template, parameters)
 
@@ -701,24 +721,37 @@ class OCCli:
     def get_api_resources(self) -> dict[str, list[OCCliApiResource]]:
         with self.api_resources_lock:
             if not self.api_resources:
-                cmd = ["api-resources", "--no-headers"]
-                results = self._run(cmd).decode("utf-8").split("\n")
-                for line in results:
-                    r = line.split()
-                    kind = r[-1]
-                    namespaced = r[-2].lower() == "true"
-                    # r[-3] is APIVERSION column
-                    # it can be core group e.g. v1
-                    # or group/version e.g. apps/v1
-                    group_version = r[-3].split("/", 1)
-                    group = "" if len(group_version) == 1 else group_version[0]
-                    api_version = group_version[-1]
-                    obj = OCCliApiResource(kind, group, api_version, namespaced)
-                    d = self.api_resources.setdefault(kind, [])
-                    d.append(obj)
+                # discovery runs oc, daemons keep the result for a while.
+                # operators can install CRDs at any time, so it expires.
+                self.api_resources = get_process_context().get_or_create(
+                    f"oc-api-resources/{self.cluster_name}/{self.server}",
+                    self._discover_api_resources,
+                    key=hashlib.sha256(
+                        " ".join(self.oc_base_cmd).encode("utf-8")
+                    ).hexdigest(),
+                    ttl=OC_API_RESOURCES_CACHE_TTL,
+                )
 
         return self.api_resources
 
+    def _discover_api_resources(self) -> dict[str, list[OCCliApiResource]]:
+        api_resources: dict[str, list[OCCliApiResource]] = {}
+        cmd = ["api-resources", "--no-headers"]
+        results = self._run(cmd).decode("utf-8").split("\n")
+        for line in results:
+            r = line.split()
+            kind = r[-1]
+            namespaced = r[-2].lower() == "true"
+            # r[-3] is APIVERSION column
+            # it can be core group e.g. v1
+            # or group/version e.g. apps/v1
+            group_version = r[-3].split("/", 1)
+            group = "" if len(group_version) == 1 else group_version[0]
+            api_version = group_version[-1]
+            obj = OCCliApiResource(kind, group, api_version, namespaced)
+            api_resources.setdefault(kind, []).append(obj)
+        return api_resources
+
     def get_version(self) -> bytes:
         # this is actually a 10 second timeout, because: oc reasons
         cmd = ["version", "--request-timeout=5"]
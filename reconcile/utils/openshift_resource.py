@@ -595,6 +595,10 @@ class ResourceInventory:
     def is_cluster_present(self, cluster: str) -> bool:
         return cluster in self._clusters
 
+    def remove_namespace(self, cluster: str, namespace: str) -> None:
+        with self._lock:
+            self._clusters.get(cluster, {}).pop(namespace, None)
+
     def add_desired_resource(
         self,
         cluster: str,
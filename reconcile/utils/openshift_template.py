@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import re
+import secrets
+import string
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+PARAMETER_NAME_RE = re.compile(r"^[a-zA-Z0-9_]+$")
+STRING_PARAMETER_RE = re.compile(r"\$\{([a-zA-Z0-9_]+?)\}")
+NON_STRING_PARAMETER_RE = re.compile(r"^\$\{\{([a-zA-Z0-9_]+)\}\}$")
+GENERATOR_RE = re.compile(r"\[([a-zA-Z0-9\-\\]+)\](\{(\w+)\})")
+RANGE_RE = re.compile(r"([\\]?[a-zA-Z0-9]\-?[a-zA-Z0-9]?)")
+
+ALPHABET = string.ascii_letters
+NUMERALS = string.digits
+SYMBOLS = "~!@#$%^&*()-_+={}[]\\|<,>.?/\"';:`"
+CHARACTER_CLASSES = {
+    "\\w": ALPHABET + NUMERALS + "_",
+    "\\d": NUMERALS,
+    "\\a": ALPHABET + NUMERALS,
+    "\\A": SYMBOLS,
+}
+MAX_GENERATED_LENGTH = 255
+
+
+class TemplateProcessingError(Exception):
+    pass
+
+
+def _generate_expression_value(expression: str) -> str:
+    """Replaces each `[range]{length}` in expression with random characters,
+    like the expression generator of `oc process`."""
+    while match := GENERATOR_RE.search(expression):
+        if not match.group(3).isdigit():
+            raise TemplateProcessingError(f"invalid length in {expression}")
+        length = int(match.group(3))
+        if not 0 < length <= MAX_GENERATED_LENGTH:
+            raise TemplateProcessingError(
+                f"range must be within [1-{MAX_GENERATED_LENGTH}] characters: "
+                f"{expression}"
+            )
+        alphabet = ""
+        for token in RANGE_RE.findall(match.group(1)):
+            if token in CHARACTER_CLASSES:
+                alphabet += CHARACTER_CLASSES[token]
+            elif len(token) == 3 and token[1] == "-" and token[0] <= token[2]:
+                alphabet += "".join(
+                    chr(c) for c in range(ord(token[0]), ord(token[2]) + 1)
+                )
+            else:
+                raise TemplateProcessingError(
+                    f"unsupported range {token} in {expression}"
+                )
+        alphabet = "".join(dict.fromkeys(alphabet))
+        value = "".join(secrets.choice(alphabet) for _ in range(length))
+        expression = expression[: match.start()] + value + expression[match.end() :]
+    return expression
+
+
+def _parameter_values(
+    template_parameters: Iterable[Mapping[str, Any]], parameters: Mapping[str, Any]
+) -> dict[str, str]:
+    values: dict[str, str] = {}
+    for param in template_parameters:
+        name = param.get("name")
+        if not isinstance(name, str) or not PARAMETER_NAME_RE.match(name):
+            raise TemplateProcessingError(f"invalid parameter name: {name}")
+        if name in values:
+            raise TemplateProcessingError(f"duplicate parameter name: {name}")
+        value = param.get("value") or ""
+        if not isinstance(value, str):
+            raise TemplateProcessingError(f"parameter {name} value is not a string")
+        if name in parameters:
+            # formatted the same way as the oc process command line
+            value = f"{parameters[name]}"
+        if not value and (generate := param.get("generate")):
+            if generate != "expression":
+                raise TemplateProcessingError(
+                    f"unknown generator {generate} for parameter {name}"
+                )
+            value = _generate_expression_value(param.get("from") or "")
+        if not value and param.get("required"):
+            raise TemplateProcessingError(
+                f"parameter {name} is required and must be specified"
+            )
+        values[name] = value
+    return values
+
+
+def _reject_constant(constant: str) -> Any:
+    raise TemplateProcessingError(f"invalid JSON value: {constant}")
+
+
+def _substitute(value: Any, values: Mapping[str, str]) -> Any:
+    if isinstance(value, str):
+        # ${{NAME}} must be the whole string, its value is used as JSON
+        if (match := NON_STRING_PARAMETER_RE.match(value)) and match.group(1) in values:
+            try:
+                return json.loads(
+                    values[match.group(1)], parse_constant=_reject_constant
+                )
+            except ValueError as e:
+                raise TemplateProcessingError(
+                    f"invalid JSON value for parameter {match.group(1)}: {e}"
+                ) from e
+        out = value
+        for match in STRING_PARAMETER_RE.finditer(value):
+            if match.group(1) in values:
+                out = out.replace(match.group(0), values[match.group(1)], 1)
+        return out
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            key = _substitute(k, values)
+            if not isinstance(key, str):
+                raise TemplateProcessingError(f"key {k} is not substituted by a string")
+            result[key] = _substitute(v, values)
+        return result
+    if isinstance(value, list):
+        return [_substitute(v, values) for v in value]
+    return value
+
+
+def process_template(
+    template: Mapping[str, Any], parameters: Mapping[str, Any] | None = None
+) -> list[dict[str, Any]]:
+    """Processes an OpenShift template like
+    `oc process --local --ignore-unknown-parameters`, without the oc binary.
+
+    Templates using features which are not implemented here raise
+    TemplateProcessingError: object labels and hardcoded namespaces. Templates
+    which oc process rejects raise it as well, use the oc binary to get its
+    error message.
+    """
+    if template.get("kind") != "Template":
+        raise TemplateProcessingError("not a Template")
+    if template.get("labels"):
+        raise TemplateProcessingError("template labels are not supported")
+    values = _parameter_values(template.get("parameters") or [], parameters or {})
+    items = []
+    for obj in template.get("objects") or []:
+        if not isinstance(obj, dict):
+            raise TemplateProcessingError(f"object is not a mapping: {obj}")
+        metadata = obj.get("metadata") or {}
+        if not isinstance(metadata, dict) or metadata.get("namespace"):
+            raise TemplateProcessingError("object namespaces are not supported")
+        item = _substitute(obj, values)
+        if not isinstance(item.get("kind"), str) or not isinstance(
+            item.get("apiVersion"), str
+        ):
+            raise TemplateProcessingError(f"object kind or apiVersion missing: {obj}")
+        items.append(item)
+    return items
@@ -7,8 +7,11 @@ from typing import TYPE_CHECKING
 from pydantic import (
     BaseModel,
 )
+from sretoolbox.utils import threaded
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
+
     from reconcile.utils.state import State
 
 
@@ -52,6 +55,15 @@ class PromotionState:
     def _target_key(self, channel: str, target_uid: str) -> str:
         return f"{channel}/{target_uid}"
 
+    def _promotion_path(self, sha: str, channel: str, target_uid: str) -> str:
+        return f"promotions_v2/{channel}/{target_uid}/{sha}"
+
+    def _fetch_promotion_data(self, path: str) -> PromotionData | None:
+        data = self._state.get(path, None)
+        if not data:
+            return None
+        return PromotionData(**data)
+
     def cache_commit_shas_from_s3(self) -> None:
         """
         Caching commit shas locally - this is used
@@ -90,21 +102,50 @@ class PromotionState:
             # Lets reduce unecessary calls to S3
             return None
 
-        path_v2 = f"promotions_v2/{channel}/{target_uid}/{sha}"
+        path_v2 = self._promotion_path(sha=sha, channel=channel, target_uid=target_uid)
         if use_cache and path_v2 in self._promotion_data_cache:
             return self._promotion_data_cache[path_v2]
 
-        data = self._state.get(path_v2, None)
-        if not data:
-            return None
-
-        promotion_data = PromotionData(**data)
-        self._promotion_data_cache[path_v2] = promotion_data
+        promotion_data = self._fetch_promotion_data(path_v2)
+        if promotion_data is not None:
+            self._promotion_data_cache[path_v2] = promotion_data
         return promotion_data
 
+    def prefetch_promotion_data(
+        self,
+        keys: Iterable[tuple[str, str, str]],
+        thread_pool_size: int,
+        pre_check_sha_exists: bool = False,
+    ) -> None:
+        """
+        Fetch promotion data of many (sha, channel, target_uid) keys from S3
+        concurrently into the local cache. get_promotion_data calls with use_cache=True
+        do not make any API calls for these keys afterwards, also not for keys without
+        promotion data.
+
+        @param pre_check_sha_exists: If set to True, keys with a commit sha missing in
+        the local commit cache are not fetched, see get_promotion_data.
+        """
+        paths: set[str] = set()
+        for sha, channel, target_uid in keys:
+            target_key = self._target_key(channel=channel, target_uid=target_uid)
+            if pre_check_sha_exists and sha not in self._commits_by_channel[target_key]:
+                continue
+            path = self._promotion_path(sha=sha, channel=channel, target_uid=target_uid)
+            if path not in self._promotion_data_cache:
+                paths.add(path)
+        to_fetch = sorted(paths)
+        promotion_data = threaded.run(
+            self._fetch_promotion_data, to_fetch, thread_pool_size
+        )
+        self._promotion_data_cache.update(zip(to_fetch, promotion_data, strict=True))
+
     def publish_promotion_data(
         self, sha: str, channel: str, target_uid: str, data: PromotionData
     ) -> None:
-        state_key_v2 = f"promotions_v2/{channel}/{target_uid}/{sha}"
+        state_key_v2 = self._promotion_path(
+            sha=sha, channel=channel, target_uid=target_uid
+        )
         self._state.add(state_key_v2, data.model_dump(), force=True)
+        self._promotion_data_cache[state_key_v2] = data
         logging.info("Uploaded %s to %s", data, state_key_v2)
@@ -1,18 +1,20 @@
+import hashlib
 import logging
-import multiprocessing
-from collections.abc import Callable, Iterable, Mapping
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
 from dataclasses import dataclass
 from typing import Any
 
-from deepdiff import DeepHash
+import jsonpath_ng
 from jsonpath_ng.ext.parser import parse
 
 from reconcile.change_owners.diff import (
     Diff,
     DiffType,
-    extract_diffs,
+    HashTree,
+    extract_diffs_by_hash_tree,
 )
-from reconcile.utils.jsonpath import apply_constraint_to_path
+from reconcile.utils.jsonpath import apply_constraint_to_path, jsonpath_parts
 from reconcile.utils.runtime.integration import (
     DesiredStateShardConfig,
     ShardedRunProposal,
@@ -59,9 +61,10 @@ def find_changed_shards(
     provided `DesiredStateShardConfig`.
     """
     affected_shards = set()
+    shard_path_selectors = [parse(s) for s in sharding_config.shard_path_selectors]
     for d in diffs:
-        for shard_path_spec in sharding_config.shard_path_selectors:
-            shard_path = apply_constraint_to_path(parse(shard_path_spec), d.path)
+        for shard_path_selector in shard_path_selectors:
+            shard_path = apply_constraint_to_path(shard_path_selector, d.path)
             if shard_path:
                 if d.diff_type in {DiffType.CHANGED, d.diff_type.REMOVED}:
                     affected_shards.update({
@@ -74,102 +77,69 @@ def find_changed_shards(
     return affected_shards
 
 
-EXTRACT_TASK_RESULT_KEY_DIFFS = "diffs"
-EXTRACT_TASK_RESULT_KEY_ERROR = "error"
-
-
-def _extract_diffs_task(
-    extraction_function: Callable[
-        [Mapping[str, Any], Mapping[str, Any]], Iterable[Diff]
-    ],
-    previous_desired_state: Mapping[str, Any],
-    current_desired_state: Mapping[str, Any],
-    return_value: dict,
-) -> None:
+def _shard_owner_depth(shard_path_selector: jsonpath_ng.JSONPath) -> int:
     """
-    A multiprocessing task that extracts diffs from two desired states
-    and stores them in a return value dictionary.
-    """
-    try:
-        diffs = extraction_function(previous_desired_state, current_desired_state)
-        return_value[EXTRACT_TASK_RESULT_KEY_DIFFS] = diffs
-    except BaseException as e:
-        return_value[EXTRACT_TASK_RESULT_KEY_ERROR] = e
-
-
-class DiffDetectionTimeoutError(Exception):
-    """
-    Raised when the fine grained diff detection takes too long.
+    The number of levels between a shard found by the selector and the element
+    owning it, which is the element selected by the first wildcard of the
+    selector, or the first field if there is no wildcard.
     """
+    parts = jsonpath_parts(shard_path_selector, ignore_root=True)
+    first_wildcard = next(
+        (
+            i
+            for i, p in enumerate(parts)
+            if not isinstance(p, jsonpath_ng.Fields) or "*" in p.fields
+        ),
+        0,
+    )
+    return len(parts) - first_wildcard - 1
 
 
-class DiffDetectionFailureError(Exception):
-    """
-    Raised when the fine grained diff detection fails.
-    """
+def shard_fingerprints(
+    desired_state: Mapping[str, Any],
+    sharding_config: DesiredStateShardConfig,
+    tree: HashTree | None = None,
+) -> dict[Any, bytes]:
+    """
+    Calculates a fingerprint per shard of a desired state, from the hashes of
+    all elements owning the shard (see `_shard_owner_depth`).
+    """
+    tree = tree or HashTree()
+    tokens: dict[Any, list[bytes]] = defaultdict(list)
+    for shard_path_spec in sharding_config.shard_path_selectors:
+        shard_path_selector = parse(shard_path_spec)
+        depth = _shard_owner_depth(shard_path_selector)
+        for shard in shard_path_selector.find(desired_state):
+            owner = shard
+            for _ in range(depth):
+                owner = owner.context
+            tokens[shard.value].append(
+                shard_path_spec.encode() + tree.hash(owner.value)
+            )
+    return {
+        shard: hashlib.blake2b(b"".join(sorted(t)), digest_size=16).digest()
+        for shard, t in tokens.items()
+    }
 
 
-def extract_diffs_with_timeout(
-    extraction_function: Callable[
-        [Mapping[str, Any], Mapping[str, Any]], Iterable[Diff]
-    ],
+def find_changed_shards_by_fingerprint(
     previous_desired_state: Mapping[str, Any],
     current_desired_state: Mapping[str, Any],
-    timeout_seconds: int,
-) -> list[Diff]:
-    """
-    Extracts diffs from two desired states using a dedicated extraction function.
-    If the timeout is reached, a `DiffDetectionTimeout` exception is raised.
-
-    The diff extraction is performed in a separate process for the sole purpose
-    to be able to enforce a timeout. This is necessary because the diff extraction
-    can take a long time for large desired states. Stoping the process is reasonable
-    for multiple reasons:
-        * the process can potentially take minutes to complete. that would deminish
-          the value derived from the detected diffs (e.g. sharded runs)
-        * the process can potentially take a lot of memory the longer it runs,
-          which would put more pressure on the system executing the process, e.g.
-          Jenkins
-        * experience has shown that the diff extraction process yields the most
-          valueable results when it is fast. if it takes too long, the results
-          yield contain too many diffs to be meaningful for followup processing
-    """
-    ctx = multiprocessing.get_context("fork")
-    m = ctx.Manager()
-    result_value = m.dict()
-
-    process = ctx.Process(
-        target=_extract_diffs_task,
-        args=(
-            extraction_function,
-            previous_desired_state,
-            current_desired_state,
-            result_value,
-        ),
-    )
-    process.start()
-    process.join(timeout_seconds)
-    if process.is_alive():
-        logging.info(
-            f"timeout {timeout_seconds}s reached to find fine grained diffs. "
-            "no shard detection or sharded runs will be performed."
-        )
-        process.terminate()
-        process.join()
-        raise DiffDetectionTimeoutError()
-
-    if EXTRACT_TASK_RESULT_KEY_DIFFS in result_value:
-        return result_value[EXTRACT_TASK_RESULT_KEY_DIFFS]
-
-    original_error = result_value.get(EXTRACT_TASK_RESULT_KEY_ERROR)
-    if original_error:
-        raise DiffDetectionFailureError() from original_error
-
-    # not every error situation of the diff extraction process
-    # will result in an exception. the lack of a result is an error
-    # indicator as well. in those cases, we raise at least
-    # a generic exception to indicate that something went wrong
-    raise DiffDetectionFailureError("unknown error during fine grained diff detection")
+    sharding_config: DesiredStateShardConfig,
+    tree: HashTree | None = None,
+) -> set[str]:
+    """
+    Finds the shards whose fingerprints differ between the two desired states,
+    including shards that exist only in one of them.
+    """
+    tree = tree or HashTree()
+    previous = shard_fingerprints(previous_desired_state, sharding_config, tree)
+    current = shard_fingerprints(current_desired_state, sharding_config, tree)
+    return {
+        shard
+        for shard in previous.keys() | current.keys()
+        if previous.get(shard) != current.get(shard)
+    }
 
 
 def build_desired_state_diff(
@@ -182,45 +152,55 @@ def build_desired_state_diff(
     If sharding config is provided, the diff will also contain the affected
     shards introduced by the change between the two desired states.
     """
-    # is there even a difference?
-    previous_hash = DeepHash(previous_desired_state)
-    current_hash = DeepHash(current_desired_state)
-    desired_state_diff_found = previous_hash.get(
-        previous_desired_state
-    ) != current_hash.get(current_desired_state)
-
-    shards = set()
-    exract_diff_timeout_seconds = 10
+    changed_shards: set[str] = set()
     try:
-        if desired_state_diff_found and sharding_config:
-            # detect shards based on fine grained diffs
-            diffs = extract_diffs_with_timeout(
-                extraction_function=extract_diffs,
-                previous_desired_state=previous_desired_state,
-                current_desired_state=current_desired_state,
-                timeout_seconds=exract_diff_timeout_seconds,
+        if sharding_config and sharding_config.detect_shards_by_fingerprint:
+            # no diffs needed, the hashes of the subtrees are calculated only once
+            tree = HashTree()
+            desired_state_diff_found = tree.hash(previous_desired_state) != tree.hash(
+                current_desired_state
             )
-            changed_shards = find_changed_shards(
-                diffs=diffs,
-                previous_desired_state=previous_desired_state,
-                current_desired_state=current_desired_state,
-                sharding_config=sharding_config,
+            if desired_state_diff_found:
+                changed_shards = find_changed_shards_by_fingerprint(
+                    previous_desired_state=previous_desired_state,
+                    current_desired_state=current_desired_state,
+                    sharding_config=sharding_config,
+                    tree=tree,
+                )
+        else:
+            # the hash tree diff is linear in the size of the desired states
+            diffs = extract_diffs_by_hash_tree(
+                previous_desired_state, current_desired_state
             )
-            if changed_shards:
-                # let the integration decide if the sharding proposal is fine
-                if sharding_config.sharded_run_review(
-                    ShardedRunProposal(proposed_shards=changed_shards)
-                ):
-                    shards = changed_shards
-    except DiffDetectionTimeoutError:
+            desired_state_diff_found = bool(diffs)
+            if desired_state_diff_found and sharding_config:
+                # detect shards based on fine grained diffs
+                changed_shards = find_changed_shards(
+                    diffs=diffs,
+                    previous_desired_state=previous_desired_state,
+                    current_desired_state=current_desired_state,
+                    sharding_config=sharding_config,
+                )
+    except Exception as e:
+        # e.g. a RecursionError on deeply nested desired states or an invalid
+        # shard path selector
         logging.warning(
-            f"unable to extract fine grained diffs for shard extraction "
-            f"within {exract_diff_timeout_seconds} seconds. continue without sharding"
+            f"unable to detect the shards affected by the desired state diff: "
+            f"{e!r}. continue without sharding"
         )
-    except DiffDetectionFailureError as e:
-        logging.warning(
-            f"unable to extract fine grained diffs for shard extraction: {e}"
+        desired_state_diff_found = previous_desired_state != current_desired_state
+        changed_shards = set()
+
+    shards = set()
+    # let the integration decide if the sharding proposal is fine
+    if (
+        changed_shards
+        and sharding_config
+        and sharding_config.sharded_run_review(
+            ShardedRunProposal(proposed_shards=changed_shards)
         )
+    ):
+        shards = changed_shards
 
     return DesiredStateDiff(
         previous_desired_state=previous_desired_state,
@@ -102,6 +102,15 @@ class DesiredStateShardConfig:
     collection. In that case, this flag should be set to `True`.
     """
 
+    detect_shards_by_fingerprint: bool = False
+    """
+    Detect the affected shards by comparing a fingerprint per shard of the
+    previous and current desired state, instead of mapping each diff to the
+    shard path selectors. A shard is affected if anything changes in the
+    elements selected by the first wildcard of a selector that contain it,
+    e.g. in `state.<key>` for `state.*.shard`.
+    """
+
 
 RunParamsSelfTypeVar = TypeVar("RunParamsSelfTypeVar", bound="RunParams")
 
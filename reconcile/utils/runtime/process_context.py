@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Resource:
+    value: Any
+    key: Hashable
+    per_bundle: bool
+    bundle: str | None
+    expire_at: float | None
+    close: Callable[[Any], None] | None
+
+
+class ProcessContext:
+    """
+    Long-lived resources of an integration process, e.g. clients and settings
+    that are expensive to set up.
+
+    The context is only active while run_integration runs an integration, in
+    all other cases (CLI runs, tests) get_or_create() always creates a new
+    resource. run_integration releases all resources after each iteration,
+    unless it runs in daemon mode. In daemon mode, resources are kept across
+    iterations and released
+
+    * when their key changes, e.g. a hash of the credentials they use
+    * when the bundle changes, if they were registered with per_bundle=True
+    * when they are older than the ttl they were registered with, e.g. for
+      state of the clusters that changes independently of the bundle
+    * on invalidate(), e.g. after credentials were rotated
+    * when an iteration fails
+    """
+
+    def __init__(self, now: Callable[[], float] = time.monotonic) -> None:
+        self.active = False
+        self.now = now
+        self._bundle: str | None = None
+        self._resources: dict[str, _Resource] = {}
+        self._lock = threading.Lock()
+        # resources are created under a lock per name, so a slow factory only
+        # blocks lookups of the same resource. factories may use other
+        # resources of the context.
+        self._name_locks: dict[str, threading.RLock] = {}
+
+    def _name_lock(self, name: str) -> threading.RLock:
+        with self._lock:
+            return self._name_locks.setdefault(name, threading.RLock())
+
+    def get_or_create(
+        self,
+        name: str,
+        factory: Callable[[], T],
+        key: Hashable = None,
+        per_bundle: bool = False,
+        close: Callable[[T], None] | None = None,
+        ttl: float | None = None,
+    ) -> T:
+        """
+        Returns the resource registered under `name`, created by `factory` if
+        there is none for `key` (and the current bundle, if `per_bundle`).
+
+        :param name: unique name of the resource
+        :param factory: creates the resource
+        :param key: the resource is recreated when the key changes
+        :param per_bundle: recreate the resource when the bundle changes
+        :param close: releases the resource when it is replaced or invalidated
+        :param ttl: recreate the resource once it is older than `ttl` seconds
+        """
+        if not self.active:
+            return factory()
+        with self._name_lock(name):
+            with self._lock:
+                bundle = self._bundle if per_bundle else None
+                resource = self._resources.get(name)
+                if (
+                    resource is not None
+                    and resource.key == key
+                    and resource.bundle == bundle
+                    and (resource.expire_at is None or self.now() < resource.expire_at)
+                ):
+                    return resource.value
+            value = factory()
+            with self._lock:
+                old = self._resources.pop(name, None)
+                self._resources[name] = _Resource(
+                    value=value,
+                    key=key,
+                    per_bundle=per_bundle,
+                    bundle=bundle,
+                    expire_at=None if ttl is None else self.now() + ttl,
+                    close=close,
+                )
+            self._close(name, old)
+            return value
+
+    def set_bundle(self, bundle: str) -> None:
+        """
+        Sets the bundle the integration reads, e.g. the GraphQL URL of a bundle
+        sha. Resources registered with per_bundle=True are released when it
+        changes.
+        """
+        with self._lock:
+            if bundle == self._bundle:
+                return
+            self._bundle = bundle
+            released = [
+                (name, self._resources.pop(name))
+                for name, resource in list(self._resources.items())
+                if resource.per_bundle
+            ]
+        for name, resource in released:
+            self._close(name, resource)
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Releases the resource registered under `name` or all resources."""
+        with self._lock:
+            names = list(self._resources) if name is None else [name]
+            released = [(n, self._resources.pop(n, None)) for n in names]
+        for n, resource in released:
+            self._close(n, resource)
+
+    @staticmethod
+    def _close(name: str, resource: _Resource | None) -> None:
+        if resource is None or resource.close is None:
+            return
+        try:
+            resource.close(resource.value)
+        except Exception as e:
+            logging.warning(f"failed to close {name}: {e}")
+
+
+process_context = ProcessContext()
+
+
+def get_process_context() -> ProcessContext:
+    return process_context
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Self
+
+from reconcile.utils.bounded_directory import BoundedDirectory
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from reconcile.utils.state import State
+
+GIT_CONTENT_CACHE_DIR = os.environ.get("SAASHERDER_GIT_CONTENT_CACHE_DIR")
+GIT_CONTENT_CACHE_MAX_BYTES = int(
+    os.environ.get("SAASHERDER_GIT_CONTENT_CACHE_MAX_BYTES", str(512 * 1024 * 1024))
+)
+GIT_CONTENT_CACHE_STATE_ENABLED = os.environ.get(
+    "SAASHERDER_GIT_CONTENT_CACHE_STATE", ""
+).lower() in {"true", "1", "yes"}
+STATE_KEY_PREFIX = "git-content-cache"
+
+
+class GitContentCache:
+    """Content-addressed cache of files and directories in git repositories.
+
+    Content at a commit sha never changes, so entries never need to be
+    invalidated. Entries are kept on local disk, the least recently used ones
+    are evicted once the cache grows beyond `max_bytes`. If a State is given,
+    it is used as a second tier shared by all pods of an integration.
+
+    :param directory: local cache directory, created if missing. no local
+        tier if None
+    :param max_bytes: max size of the local cache directory
+    :param state: optional State used as a shared second tier
+    """
+
+    def __init__(
+        self,
+        directory: str | None,
+        max_bytes: int,
+        state: State | None = None,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.state = state
+        self._local = (
+            BoundedDirectory(directory, max_bytes) if directory is not None else None
+        )
+
+    @classmethod
+    def from_env(cls, state: State | None = None) -> Self | None:
+        """Returns the cache configured by the SAASHERDER_GIT_CONTENT_CACHE_*
+        env variables, None if no tier is enabled."""
+        if not GIT_CONTENT_CACHE_STATE_ENABLED:
+            state = None
+        if GIT_CONTENT_CACHE_DIR is None and state is None:
+            return None
+        return cls(
+            directory=GIT_CONTENT_CACHE_DIR,
+            max_bytes=GIT_CONTENT_CACHE_MAX_BYTES,
+            state=state,
+        )
+
+    @staticmethod
+    def key(url: str, path: str, commit_sha: str, kind: str = "file") -> str:
+        return hashlib.sha256(
+            json.dumps([url, path, commit_sha, kind]).encode("utf-8")
+        ).hexdigest()
+
+    def _read_local(self, key: str) -> bytes | None:
+        if self._local is None:
+            return None
+        return self._local.read(key)
+
+    def _write_local(self, key: str, content: bytes) -> None:
+        if self._local is None:
+            return
+        try:
+            self._local.write(key, content)
+        except OSError as e:
+            logging.warning(f"could not write git content cache: {e}")
+
+    def _read_state(self, key: str) -> bytes | None:
+        if self.state is None:
+            return None
+        try:
+            value = self.state.get(f"{STATE_KEY_PREFIX}/{key}", None)
+        except Exception as e:
+            logging.warning(f"could not read git content cache from state: {e}")
+            return None
+        if not value:
+            return None
+        return base64.b64decode(value["content"])
+
+    def _write_state(self, key: str, content: bytes) -> None:
+        if self.state is None:
+            return
+        try:
+            self.state.add(
+                f"{STATE_KEY_PREFIX}/{key}",
+                {"content": base64.b64encode(content).decode("ascii")},
+                force=True,
+            )
+        except Exception as e:
+            logging.warning(f"could not write git content cache to state: {e}")
+
+    def get(self, key: str) -> bytes | None:
+        content = self._read_local(key)
+        if content is None:
+            content = self._read_state(key)
+            if content is not None:
+                self._write_local(key, content)
+        return content
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], bytes]) -> bytes:
+        """Returns the cached content for a key or fetches and caches it.
+
+        The key must identify immutable content, see `key`.
+        """
+        content = self.get(key)
+        if content is None:
+            content = fetch()
+            self._write_local(key, content)
+            self._write_state(key, content)
+        return content
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING, Any, Self
+
+from reconcile.utils.single_flight import SingleFlightCache
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from reconcile.utils.state import State
+
+IMAGE_CACHE_TAG_TTL = int(os.environ.get("SAASHERDER_IMAGE_CACHE_TAG_TTL", "600"))
+IMAGE_CACHE_NEGATIVE_TTL = int(
+    os.environ.get("SAASHERDER_IMAGE_CACHE_NEGATIVE_TTL", "60")
+)
+IMAGE_CACHE_STATE_ENABLED = os.environ.get(
+    "SAASHERDER_IMAGE_CACHE_STATE", ""
+).lower() in {"true", "1", "yes"}
+IMAGE_REGISTRY_CONCURRENCY = int(
+    os.environ.get("SAASHERDER_IMAGE_REGISTRY_CONCURRENCY", "10")
+)
+STATE_KEY_PREFIX = "image-existence-cache"
+
+
+class ImageExistenceCache:
+    """Results of image existence checks against container registries.
+
+    Digest-pinned images are immutable, so positive results for them never
+    expire. Tags can be moved or deleted, positive results for them expire after
+    `tag_ttl` seconds. Images that could not be found are checked again after
+    `negative_ttl` seconds. Results are kept in memory and, if a State is given,
+    shared with all pods of an integration. Negative results are never shared.
+
+    Results are cached per registry user, as images may only be visible with
+    some credentials.
+
+    Concurrent checks of the same image are merged into one, and at most
+    `registry_concurrency` checks run against a registry at the same time.
+    """
+
+    def __init__(
+        self,
+        tag_ttl: int,
+        negative_ttl: int,
+        state: State | None = None,
+        now: Callable[[], float] = time.time,
+        registry_concurrency: int | None = None,
+    ) -> None:
+        self.tag_ttl = tag_ttl
+        self.negative_ttl = negative_ttl
+        self.state = state
+        self.now = now
+        self.registry_concurrency = registry_concurrency
+        self._store: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._checks: SingleFlightCache[str, bool] = SingleFlightCache()
+        self._registry_semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    @classmethod
+    def from_env(cls, state: State | None = None) -> Self:
+        return cls(
+            tag_ttl=IMAGE_CACHE_TAG_TTL,
+            negative_ttl=IMAGE_CACHE_NEGATIVE_TTL,
+            state=state if IMAGE_CACHE_STATE_ENABLED else None,
+            registry_concurrency=IMAGE_REGISTRY_CONCURRENCY,
+        )
+
+    @staticmethod
+    def key(image: str, username: str | None, auth_server: str | None) -> str:
+        return hashlib.sha256(
+            json.dumps([image, username, auth_server]).encode("utf-8")
+        ).hexdigest()
+
+    def _valid(self, entry: dict[str, Any] | None) -> bool:
+        if not entry:
+            return False
+        expire_at = entry.get("expire_at")
+        return expire_at is None or self.now() < expire_at
+
+    def get(self, key: str) -> bool | None:
+        """Returns whether the image exists or None if unknown."""
+        with self._lock:
+            entry = self._store.get(key)
+        if not self._valid(entry) and self.state is not None:
+            try:
+                entry = self.state.get(f"{STATE_KEY_PREFIX}/{key}", None)
+            except Exception as e:
+                logging.warning(f"could not read image existence cache: {e}")
+                entry = None
+            if self._valid(entry):
+                with self._lock:
+                    self._store[key] = entry  # type: ignore[assignment]
+        if not self._valid(entry):
+            return None
+        assert entry is not None
+        return entry["exists"]
+
+    def set(self, key: str, image: str, exists: bool) -> None:
+        if not exists:
+            expire_at: float | None = self.now() + self.negative_ttl
+        elif "@sha256:" in image:
+            expire_at = None
+        else:
+            expire_at = self.now() + self.tag_ttl
+        entry = {"exists": exists, "expire_at": expire_at}
+        with self._lock:
+            self._store[key] = entry
+        if exists and self.state is not None:
+            try:
+                self.state.add(f"{STATE_KEY_PREFIX}/{key}", entry, force=True)
+            except Exception as e:
+                logging.warning(f"could not write image existence cache: {e}")
+
+    def _registry_limit(self, image: str) -> AbstractContextManager[Any]:
+        if not self.registry_concurrency:
+            return nullcontext()
+        registry = image.split("/", 1)[0]
+        with self._lock:
+            if registry not in self._registry_semaphores:
+                self._registry_semaphores[registry] = threading.BoundedSemaphore(
+                    self.registry_concurrency
+                )
+            return self._registry_semaphores[registry]
+
+    def exists(self, key: str, image: str, check: Callable[[], bool]) -> bool:
+        """Returns whether the image exists, calls `check` if that is unknown.
+
+        Concurrent callers for the same key wait for a single check.
+        """
+
+        def _check() -> bool:
+            exists = self.get(key)
+            if exists is None:
+                with self._registry_limit(image):
+                    exists = check()
+                self.set(key, image, exists)
+            return exists
+
+        return self._checks.do(key, _check)
@@ -300,6 +300,24 @@ class ImagePatternsBlockRule:
     image_patterns: list[str]
 
 
+@dataclass
+class ContainerImageTriggerCandidate:
+    """A target with images, it triggers once all images exist at the
+    desired tag and the tag differs from the one in state."""
+
+    trigger_spec: TriggerSpecContainerImage
+    image_patterns: list[str]
+    image_auth: ImageAuth
+    error_prefix: str
+
+    @property
+    def image_uris(self) -> list[str]:
+        return [
+            f"{image}:{self.trigger_spec.state_content}"
+            for image in self.trigger_spec.images
+        ]
+
+
 @dataclass
 class TargetSpec:
     saas_file: SaasFile
@@ -363,6 +381,18 @@ class TargetSpec:
     def delete(self) -> bool:
         return bool(self.target.delete)
 
+    @property
+    def has_secret_parameters(self) -> bool:
+        return any(
+            container.secret_parameters
+            for container in (
+                self.target.namespace.environment,
+                self.saas_file,
+                self.resource_template,
+                self.target,
+            )
+        )
+
     @property
     def html_url(self) -> str:
         git_object = "blob" if self.provider == "openshift-template" else "tree"
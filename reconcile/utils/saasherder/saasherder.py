@@ -19,7 +19,6 @@ from github import (
     Github,
     GithubException,
 )
-from github.ContentFile import ContentFile
 from gitlab.exceptions import GitlabError
 from requests import exceptions as rqexc
 from sretoolbox.container import Image
@@ -35,8 +34,9 @@ from reconcile.utils.datetime_util import utc_now
 from reconcile.utils.github_api import GithubRepositoryApi
 from reconcile.utils.json import json_dumps
 from reconcile.utils.oc import (
-    OCLocal,
+    OC_PROCESS_USE_BINARY,
     StatusCodeError,
+    oc_process,
 )
 from reconcile.utils.openshift_resource import OpenshiftResource as OR
 from reconcile.utils.openshift_resource import (
@@ -49,6 +49,8 @@ from reconcile.utils.promotion_state import (
     PromotionData,
     PromotionState,
 )
+from reconcile.utils.saasherder.content_cache import GitContentCache
+from reconcile.utils.saasherder.image_cache import ImageExistenceCache
 from reconcile.utils.saasherder.interfaces import (
     SaasFile,
     SaasParentSaasPromotion,
@@ -60,6 +62,7 @@ from reconcile.utils.saasherder.interfaces import (
 )
 from reconcile.utils.saasherder.models import (
     Channel,
+    ContainerImageTriggerCandidate,
     ImageAuth,
     ImagePatternsBlockRule,
     Namespace,
@@ -78,11 +81,13 @@ from reconcile.utils.saasherder.models import (
     TriggerTypes,
     UpstreamJob,
 )
+from reconcile.utils.single_flight import SingleFlightCache
 from reconcile.utils.slo_document_manager import SLODetails, SLODocumentManager
 from reconcile.utils.vcs import VCS
 
 if TYPE_CHECKING:
     from collections.abc import (
+        Callable,
         Generator,
         Iterable,
         Mapping,
@@ -101,6 +106,15 @@ TARGET_CONFIG_HASH = "target_config_hash"
 TEMPLATE_API_VERSION = "template.openshift.io/v1"
 UNIQUE_SAAS_FILE_ENV_COMBO_LEN = 56
 REQUEST_TIMEOUT = 60
+RENDERED_TARGETS_STATE_KEY_PREFIX = "rendered-targets"
+# max number of targets rendered at the same time, 0 to use thread_pool_size
+MAX_IN_FLIGHT_TARGETS = int(os.environ.get("SAASHERDER_MAX_IN_FLIGHT_TARGETS", "0"))
+RENDERED_TARGET_CACHE_ENABLED = os.environ.get(
+    "SAASHERDER_RENDERED_TARGET_CACHE", ""
+).lower() in {"true", "1", "yes"}
+# rendered targets are kept in the state across releases, bump this whenever
+# rendering changes its output
+RENDERED_TARGET_CACHE_VERSION = 1
 
 
 def is_commit_sha(ref: str) -> bool:
@@ -139,6 +153,7 @@ class SaasHerder:
         image_patterns_block_rules: list[ImagePatternsBlockRule] | None = None,
     ) -> None:
         self.error_registered = False
+        self._commit_shas: SingleFlightCache[tuple[str, str], str] = SingleFlightCache()
         self.saas_files = saas_files
         self.repo_urls = self._collect_repo_urls()
         self.image_patterns = self._collect_image_patterns()
@@ -159,6 +174,8 @@ class SaasHerder:
         self.include_trigger_trace = include_trigger_trace
         self.state = state
         self._promotion_state = PromotionState(state=state) if state else None
+        self.git_content_cache = GitContentCache.from_env(state=state)
+        self.image_cache = ImageExistenceCache.from_env(state=state)
         self._channel_map = self._assemble_channels(saas_files=all_saas_files)
         self.images: set[str] = set()
         self.blocked_versions = self._collect_blocked_versions()
@@ -752,17 +769,30 @@ class SaasHerder:
 
         return file_name, archive_url
 
+    def _cached_git_content(self, key: str, fetch: Callable[[], bytes]) -> bytes:
+        if self.git_content_cache is None:
+            return fetch()
+        return self.git_content_cache.get_or_fetch(key, fetch)
+
     @retry(max_attempts=20)
     def _get_file_contents(
         self, url: str, path: str, ref: str, github: Github
     ) -> tuple[Any, str]:
         commit_sha = self._get_commit_sha(url, ref, github)
+        content = self._cached_git_content(
+            GitContentCache.key(url, path, commit_sha),
+            lambda: self._fetch_file_contents(url, path, commit_sha, github),
+        )
+        return yaml.safe_load(content), commit_sha
 
+    def _fetch_file_contents(
+        self, url: str, path: str, commit_sha: str, github: Github
+    ) -> bytes:
         repo_info = VCS.parse_repo_url(url)
         match repo_info.platform:
             case "github":
                 repo = github.get_repo(repo_info.name)
-                content = GithubRepositoryApi.get_raw_file(
+                return GithubRepositoryApi.get_raw_file(
                     repo=repo,
                     path=path,
                     ref=commit_sha,
@@ -772,7 +802,7 @@ class SaasHerder:
                     raise Exception("gitlab is not initialized")
                 if not (project := self.gitlab.get_project(url)):
                     raise Exception(f"Could not find gitlab project for {url}")
-                content = self.gitlab.get_raw_file(
+                return self.gitlab.get_raw_file(
                     project=project,
                     path=path,
                     ref=commit_sha,
@@ -780,30 +810,36 @@ class SaasHerder:
             case _:
                 raise Exception(f"Only GitHub and GitLab are supported: {url}")
 
-        return yaml.safe_load(content), commit_sha
-
     @retry()
     def _get_directory_contents(
         self, url: str, path: str, ref: str, github: Github
     ) -> tuple[list[Any], str]:
         commit_sha = self._get_commit_sha(url, ref, github)
+        packed = self._cached_git_content(
+            GitContentCache.key(url, path, commit_sha, kind="directory"),
+            lambda: json.dumps([
+                base64.b64encode(content).decode("ascii")
+                for content in self._fetch_directory_contents(
+                    url, path, commit_sha, github
+                )
+            ]).encode("utf-8"),
+        )
         resources: list[Any] = []
+        for content in json.loads(packed):
+            resources.extend(yaml.safe_load_all(base64.b64decode(content)))
+        return resources, commit_sha
+
+    def _fetch_directory_contents(
+        self, url: str, path: str, commit_sha: str, github: Github
+    ) -> list[bytes]:
         repo_info = VCS.parse_repo_url(url)
         match repo_info.platform:
             case "github":
                 repo = github.get_repo(repo_info.name)
-                directory = repo.get_contents(path, commit_sha)
-                if isinstance(directory, ContentFile):
-                    raise TypeError(f"Path {path} and sha {commit_sha} is a file!")
-                for f in directory:
-                    file_path = os.path.join(path, f.name)
-                    raw_file = GithubRepositoryApi.get_raw_file(
-                        repo=repo,
-                        path=file_path,
-                        ref=commit_sha,
-                    )
-                    result_resources = yaml.safe_load_all(raw_file)
-                    resources.extend(result_resources)
+                dir_contents = GithubRepositoryApi.get_directory_contents(
+                    repo, path=path, ref=commit_sha
+                )
+                return list(dir_contents.values())
             case "gitlab":
                 if not self.gitlab:
                     raise Exception("gitlab is not initialized")
@@ -814,16 +850,20 @@ class SaasHerder:
                     ref=commit_sha,
                     path=path,
                 )
-                for content in dir_contents.values():
-                    result_resources = yaml.safe_load_all(content)
-                    resources.extend(result_resources)
+                return list(dir_contents.values())
             case _:
                 raise Exception(f"Only GitHub and GitLab are supported: {url}")
 
-        return resources, commit_sha
+    def _get_commit_sha(self, url: str, ref: str, github: Github) -> str:
+        """Resolves a ref to a commit sha, once per run for each (url, ref)."""
+        if is_commit_sha(ref):
+            return ref
+        return self._commit_shas.get_or_set(
+            (url, ref), lambda: self._resolve_commit_sha(url, ref, github)
+        )
 
     @retry()
-    def _get_commit_sha(self, url: str, ref: str, github: Github) -> str:
+    def _resolve_commit_sha(self, url: str, ref: str, github: Github) -> str:
         repo_info = VCS.parse_repo_url(url)
         match repo_info.platform:
             case "github":
@@ -912,7 +952,14 @@ class SaasHerder:
         target_config_hash = spec.target_config_hash
         error_prefix = spec.error_prefix
 
-        if provider == "openshift-template":
+        cache_key = self._rendered_target_cache_key(spec)
+        # targets rendered with image digests are not cached, tags can move
+        cacheable = cache_key is not None
+        cached = self._get_rendered_target(spec, cache_key) if cache_key else None
+        resources: list[Any]
+        if cached is not None:
+            resources, commit_sha = cached
+        elif provider == "openshift-template":
             consolidated_parameters = spec.parameters()
             try:
                 template, commit_sha = self._get_file_contents(
@@ -954,6 +1001,7 @@ class SaasHerder:
                 "IMAGE_DIGEST", consolidated_parameters, template
             )
             if need_repo_digest or need_image_digest:
+                cacheable = False
                 try:
                     logging.debug("Generating REPO_DIGEST.")
                     registry_image = consolidated_parameters["REGISTRY_IMG"]
@@ -971,8 +1019,9 @@ class SaasHerder:
                     image_patterns=spec.image_patterns,
                     image_auth=spec.image_auth,
                     error_prefix=error_prefix,
+                    cache=self.image_cache,
                 )
-                if not img:
+                if img is None:
                     msg = f"{error_prefix} error get image for {image_uri}"
                     logging.error(msg)
                     raise Exception(msg)
@@ -982,13 +1031,15 @@ class SaasHerder:
                 if need_image_digest:
                     consolidated_parameters["IMAGE_DIGEST"] = img.digest
 
-            oc = OCLocal("cluster", None, None, local=True)
             try:
-                resources: Iterable[Mapping[str, Any]] = oc.process(
-                    template=self._pre_process_template(template),
-                    parameters=consolidated_parameters,
+                resources = list(
+                    oc_process(
+                        template=self._pre_process_template(template),
+                        parameters=consolidated_parameters,
+                    )
                 )
             except StatusCodeError as e:
+                cacheable = False
                 logging.error(f"{error_prefix} error processing template: {e!s}")
 
         elif provider == "directory":
@@ -1010,18 +1061,30 @@ class SaasHerder:
                 else True
             )
             consolidated_parameters = spec.parameters(adjust=False)
-            resources = helm.template_all(
-                url=url,
-                path=path,
-                ref=ref,
-                namespace=spec.target.namespace.name,
-                values=consolidated_parameters,
-                ssl_verify=ssl_verify,
+            try:
+                chart_commit_sha = self._get_commit_sha(url=url, ref=ref, github=github)
+            except Exception as e:
+                # the chart is rendered without the memo
+                logging.debug(f"{error_prefix} could not resolve chart ref: {e!s}")
+                chart_commit_sha = None
+            resources = list(
+                helm.template_all(
+                    url=url,
+                    path=path,
+                    ref=ref,
+                    namespace=spec.target.namespace.name,
+                    values=consolidated_parameters,
+                    ssl_verify=ssl_verify,
+                    commit_sha=chart_commit_sha,
+                )
             )
 
         else:
             logging.error(f"{error_prefix} unknown provider: {provider}")
 
+        if cached is None and cacheable and cache_key:
+            self._set_rendered_target(spec, cache_key, resources, commit_sha)
+
         target_promotion = None
         if target.promotion:
             channels = [
@@ -1044,6 +1107,85 @@ class SaasHerder:
             )
         return resources, target_promotion
 
+    def _rendered_target_state_key(self, spec: TargetSpec) -> str:
+        target_uid = spec.target.uid(
+            parent_resource_template_name=spec.resource_template_name,
+            parent_saas_file_name=spec.saas_file_name,
+        )
+        return f"{RENDERED_TARGETS_STATE_KEY_PREFIX}/{spec.saas_file_name}/{target_uid}"
+
+    def _rendered_target_cache_key(self, spec: TargetSpec) -> str | None:
+        """Returns a key for everything the rendered resources of a target
+        depend on, None if the target can not be cached.
+
+        Targets with secret parameters are not cached, their rendered
+        resources must not end up in the state.
+        """
+        if not (RENDERED_TARGET_CACHE_ENABLED and self.state):
+            return None
+        if spec.provider not in {"openshift-template", "directory"}:
+            return None
+        if spec.has_secret_parameters:
+            return None
+        try:
+            commit_sha = self._get_commit_sha(spec.url, spec.ref, spec.github)
+        except Exception:
+            # rendering reports the error
+            return None
+        key_content = [
+            RENDERED_TARGET_CACHE_VERSION,
+            # the oc binary and process_template may render differently
+            OC_PROCESS_USE_BINARY,
+            spec.target_config_hash,
+            commit_sha,
+            spec.provider,
+            spec.path,
+            spec.hash_length,
+            # environment parameters are not part of the target config hash
+            spec.parameters(),
+            self._get_saas_file_feature_enabled("use_channel_in_image_tag"),
+        ]
+        return hashlib.sha256(json_dumps(key_content).encode("utf-8")).hexdigest()
+
+    def _get_rendered_target(
+        self, spec: TargetSpec, cache_key: str
+    ) -> tuple[list[Any], str] | None:
+        if not self.state:
+            return None
+        try:
+            value = self.state.get(self._rendered_target_state_key(spec), None)
+        except Exception as e:
+            logging.warning(f"{spec.error_prefix} could not read rendered target: {e}")
+            return None
+        if not value or value.get("cache_key") != cache_key:
+            return None
+        return value["resources"], value["commit_sha"]
+
+    def _set_rendered_target(
+        self,
+        spec: TargetSpec,
+        cache_key: str,
+        resources: list[Any],
+        commit_sha: str,
+    ) -> None:
+        if not self.state:
+            return
+        if json.loads(json_dumps(resources)) != resources:
+            # e.g. dates in directory manifests would come back as strings
+            return
+        try:
+            self.state.add(
+                self._rendered_target_state_key(spec),
+                {
+                    "cache_key": cache_key,
+                    "commit_sha": commit_sha,
+                    "resources": resources,
+                },
+                force=True,
+            )
+        except Exception as e:
+            logging.warning(f"{spec.error_prefix} could not store rendered target: {e}")
+
     def _assemble_channels(
         self, saas_files: Iterable[SaasFile] | None
     ) -> dict[str, Channel]:
@@ -1123,6 +1265,7 @@ class SaasHerder:
         image_patterns: Iterable[str],
         image_auth: ImageAuth,
         error_prefix: str,
+        cache: ImageExistenceCache | None = None,
     ) -> Image | None:
         if not image_patterns:
             logging.error(
@@ -1151,6 +1294,7 @@ class SaasHerder:
                     auth_server=image_auth.auth_server,
                     timeout=REQUEST_TIMEOUT,
                     error_prefix=error_prefix,
+                    cache=cache,
                 )
 
         # basic auth fallback for backwards compatibility
@@ -1161,6 +1305,7 @@ class SaasHerder:
             auth_server=image_auth.auth_server,
             timeout=REQUEST_TIMEOUT,
             error_prefix=error_prefix,
+            cache=cache,
         )
 
     @staticmethod
@@ -1171,6 +1316,7 @@ class SaasHerder:
         auth_server: str | Any,
         timeout: int,
         error_prefix: str,
+        cache: ImageExistenceCache | None = None,
     ) -> Image | None:
         try:
             img = Image(
@@ -1180,7 +1326,16 @@ class SaasHerder:
                 auth_server=auth_server,
                 timeout=timeout,
             )
-            if img:
+            # evaluating an Image fetches its manifest from the registry
+            if cache:
+                exists = cache.exists(
+                    ImageExistenceCache.key(full_image_path, username, auth_server),
+                    full_image_path,
+                    lambda: bool(img),
+                )
+            else:
+                exists = bool(img)
+            if exists:
                 return img
             else:
                 logging.error(
@@ -1285,6 +1440,7 @@ class SaasHerder:
             image_patterns=spec.image_patterns,
             image_auth=spec.image_auth,
             error_prefix=spec.error_prefix,
+            cache=self.image_cache,
         )
         return None in images
 
@@ -1348,10 +1504,12 @@ class SaasHerder:
         desired_state_specs: list[TargetSpec] = list(
             itertools.chain.from_iterable(results)
         )
+        # each worker adds the resources of its target to the inventory, only
+        # the in-flight targets hold rendered resources outside of it
         promotions = threaded.run(
             self.populate_desired_state_saas_file,
             desired_state_specs,
-            self.thread_pool_size,
+            min(self.thread_pool_size, MAX_IN_FLIGHT_TARGETS or self.thread_pool_size),
             ri=ri,
         )
         self.promotions: list[Promotion | None] = promotions
@@ -1743,12 +1901,62 @@ class SaasHerder:
         self, dry_run: bool
     ) -> list[TriggerSpecContainerImage]:
         results = threaded.run(
-            self.get_container_images_diff_saas_file,
+            self._get_container_image_trigger_candidates,
             self.saas_files,
             self.thread_pool_size,
+        )
+        candidates = list(itertools.chain.from_iterable(results))
+        return self._get_container_images_diff(candidates, dry_run)
+
+    def _get_container_images_diff(
+        self, candidates: list[ContainerImageTriggerCandidate], dry_run: bool
+    ) -> list[TriggerSpecContainerImage]:
+        # every image is looked up once, no matter how many targets use it
+        image_lookups = {
+            (image_uri, candidate.trigger_spec.saas_file_name): candidate
+            for candidate in candidates
+            for image_uri in candidate.image_uris
+        }
+        images_exist = dict(
+            zip(
+                image_lookups,
+                threaded.run(
+                    self._container_image_exists,
+                    image_lookups.items(),
+                    self.thread_pool_size,
+                ),
+                strict=True,
+            )
+        )
+        trigger_specs = threaded.run(
+            self._get_container_image_trigger_spec,
+            [
+                candidate
+                for candidate in candidates
+                if all(
+                    images_exist[image_uri, candidate.trigger_spec.saas_file_name]
+                    for image_uri in candidate.image_uris
+                )
+            ],
+            self.thread_pool_size,
             dry_run=dry_run,
         )
-        return list(itertools.chain.from_iterable(results))
+        return [trigger_spec for trigger_spec in trigger_specs if trigger_spec]
+
+    def _container_image_exists(
+        self, image_lookup: tuple[tuple[str, str], ContainerImageTriggerCandidate]
+    ) -> bool:
+        (image_uri, _), candidate = image_lookup
+        return (
+            self._get_image(
+                image=image_uri,
+                image_patterns=candidate.image_patterns,
+                image_auth=candidate.image_auth,
+                error_prefix=candidate.error_prefix,
+                cache=self.image_cache,
+            )
+            is not None
+        )
 
     def _build_trigger_spec_container_image_reason(
         self,
@@ -1771,8 +1979,15 @@ class SaasHerder:
         Get a list of trigger specs based on the diff between the
         desired state (git commit) and the current state for a single saas file.
         """
+        return self._get_container_images_diff(
+            self._get_container_image_trigger_candidates(saas_file), dry_run
+        )
+
+    def _get_container_image_trigger_candidates(
+        self, saas_file: SaasFile
+    ) -> list[ContainerImageTriggerCandidate]:
         github = self._initiate_github(saas_file)
-        trigger_specs: list[TriggerSpecContainerImage] = []
+        candidates: list[ContainerImageTriggerCandidate] = []
         for rt in saas_file.resource_templates:
             for target in rt.targets:
                 try:
@@ -1791,17 +2006,6 @@ class SaasHerder:
                         f"{image.org.instance.url}/{image.org.name}/{image.name}"
                         for image in all_images
                     ]
-                    error_prefix = f"[{saas_file.name}/{rt.name}] {target.ref}:"
-                    if not all(
-                        self._get_image(
-                            image=f"{image}:{desired_image_tag}",
-                            image_patterns=saas_file.image_patterns,
-                            image_auth=image_auth,
-                            error_prefix=error_prefix,
-                        )
-                        for image in image_registries
-                    ):
-                        continue
                     trigger_spec = TriggerSpecContainerImage(
                         saas_file_name=saas_file.name,
                         env_name=target.namespace.environment.name,
@@ -1820,30 +2024,44 @@ class SaasHerder:
                         ),
                         target_ref=commit_sha,
                     )
-                    if not self.state:
-                        raise Exception("state is not initialized")
-                    current_image_tag = self.state.get(trigger_spec.state_key, None)
-                    # skip if there is no change in image tag
-                    if current_image_tag == desired_image_tag:
-                        continue
-                    # don't trigger if this is the first time
-                    # this target is being deployed.
-                    # that will be taken care of by
-                    # openshift-saas-deploy-trigger-configs
-                    if current_image_tag is None:
-                        # store the value to take over from now on
-                        if not dry_run:
-                            self.update_state(trigger_spec)
-                        continue
-                    # we finally found something we want to trigger on!
-                    trigger_specs.append(trigger_spec)
+                    candidates.append(
+                        ContainerImageTriggerCandidate(
+                            trigger_spec=trigger_spec,
+                            image_patterns=saas_file.image_patterns,
+                            image_auth=image_auth,
+                            error_prefix=f"[{saas_file.name}/{rt.name}] {target.ref}:",
+                        )
+                    )
                 except GithubException, GitlabError:
                     logging.exception(
                         f"Skipping target {saas_file.name}:{rt.name}"
                         f" - repo: {rt.url} - ref: {target.ref}"
                     )
 
-        return trigger_specs
+        return candidates
+
+    def _get_container_image_trigger_spec(
+        self, candidate: ContainerImageTriggerCandidate, dry_run: bool
+    ) -> TriggerSpecContainerImage | None:
+        trigger_spec = candidate.trigger_spec
+        desired_image_tag = trigger_spec.state_content
+        if not self.state:
+            raise Exception("state is not initialized")
+        current_image_tag = self.state.get(trigger_spec.state_key, None)
+        # skip if there is no change in image tag
+        if current_image_tag == desired_image_tag:
+            return None
+        # don't trigger if this is the first time
+        # this target is being deployed.
+        # that will be taken care of by
+        # openshift-saas-deploy-trigger-configs
+        if current_image_tag is None:
+            # store the value to take over from now on
+            if not dry_run:
+                self.update_state(trigger_spec)
+            return None
+        # we finally found something we want to trigger on!
+        return trigger_spec
 
     def get_configs_diff(self) -> list[TriggerSpecConfig]:
         results = threaded.run(
@@ -2143,6 +2361,7 @@ class SaasHerder:
                     channel=channel.name,
                     target_uid=target_uid,
                     pre_check_sha_exists=False,
+                    use_cache=True,
                 )
                 if not (
                     deployment and (deployment.success or deployment.has_succeeded_once)
@@ -2226,6 +2445,17 @@ class SaasHerder:
         """
         If there were promotion sections in the participating saas files
         validate that the conditions are met."""
+        if self._promotion_state:
+            self._promotion_state.prefetch_promotion_data(
+                (
+                    (promotion.commit_sha, channel.name, target_uid)
+                    for promotion in self.promotions
+                    if promotion is not None
+                    for channel in promotion.subscribe or []
+                    for target_uid in channel.publisher_uids
+                ),
+                thread_pool_size=self.thread_pool_size,
+            )
         return all(
             self._validate_promotion(promotion)
             for promotion in self.promotions
@@ -2248,6 +2478,15 @@ class SaasHerder:
         if not (self.state and self._promotion_state):
             raise Exception("state is not initialized")
 
+        self._promotion_state.prefetch_promotion_data(
+            (
+                (promotion.commit_sha, channel, promotion.saas_target_uid)
+                for promotion in self.promotions
+                if promotion is not None
+                for channel in promotion.publish or []
+            ),
+            thread_pool_size=self.thread_pool_size,
+        )
         now = utc_now()
         for promotion in self.promotions:
             if promotion is None:
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+
+class _Call[V]:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: V | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlightCache[K: Hashable, V]:
+    """Thread-safe memo where concurrent callers for the same key wait for a
+    single computation.
+
+    Failed computations are not cached, the next caller computes again. If
+    `max_entries` is set, the oldest entries are dropped once it is exceeded.
+    """
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        self.max_entries = max_entries
+        self._store: dict[K, V] = {}
+        self._locks: dict[K, threading.Lock] = {}
+        self._meta_lock = threading.Lock()
+        self._calls: dict[K, _Call[V]] = {}
+
+    def do(self, key: K, compute: Callable[[], V]) -> V:
+        """Runs `compute` once for all concurrent callers of the same key,
+        without keeping the result. A failure is raised to all of them."""
+        with self._meta_lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value  # type: ignore[return-value]
+        try:
+            call.value = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._meta_lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def _lock_for(self, key: K) -> threading.Lock:
+        with self._meta_lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get_or_set(self, key: K, compute: Callable[[], V]) -> V:
+        # entries can be evicted concurrently, a membership test is not enough
+        with suppress(KeyError):
+            return self._store[key]
+        with self._lock_for(key):
+            with suppress(KeyError):
+                return self._store[key]
+            value = compute()
+            with self._meta_lock:
+                self._store[key] = value
+                if self.max_entries is not None:
+                    while len(self._store) > self.max_entries:
+                        oldest = next(iter(self._store))
+                        del self._store[oldest]
+                        self._locks.pop(oldest, None)
+        return value
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._store
+
+    def __len__(self) -> int:
+        return len(self._store)
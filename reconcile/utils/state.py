@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import asyncio
 import contextlib
 import json
 import logging
 import os
+import threading
 from abc import abstractmethod
+from compression import zstd
 from dataclasses import dataclass, field
 from typing import (
     TYPE_CHECKING,
@@ -15,6 +18,7 @@ from typing import (
 import boto3
 from botocore.errorfactory import ClientError
 from pydantic import BaseModel
+from sretoolbox.utils import threaded
 
 from reconcile.gql_definitions.common.app_interface_state_settings import (
     AppInterfaceStateConfigurationS3V1,
@@ -29,17 +33,35 @@ from reconcile.typed_queries.app_interface_vault_settings import (
 from reconcile.typed_queries.get_state_aws_account import get_state_aws_account
 from reconcile.utils.aws_api import aws_config_file_path
 from reconcile.utils.json import json_dumps
+from reconcile.utils.runtime.process_context import get_process_context
 from reconcile.utils.secret_reader import (
     SecretReaderBase,
     create_secret_reader,
 )
+from reconcile.utils.state_cache import (
+    CachedStateObject,
+    StateObjectCache,
+    get_state_object_cache,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Callable, Generator, Mapping
+    from collections.abc import Callable, Generator, Iterable, Mapping
 
     from mypy_boto3_s3 import S3Client
 
 
+# botocore keeps up to 10 connections per client by default
+BULK_READ_THREAD_POOL_SIZE = 10
+_MISSING = object()
+# values of at least this many bytes are stored zstd compressed, 0 disables it.
+# States of earlier versions can not read compressed values, only enable it once
+# all readers of a state are updated.
+COMPRESSION_MIN_SIZE = int(
+    os.environ.get("APP_INTERFACE_STATE_COMPRESSION_MIN_SIZE", "0")
+)
+ZSTD_CONTENT_ENCODING = "zstd"
+
+
 class StateInaccessibleError(Exception):
     pass
 
@@ -48,19 +70,28 @@ def init_state(
     integration: str,
     secret_reader: SecretReaderBase | None = None,
 ) -> State:
-    if not secret_reader:
-        vault_settings = get_app_interface_vault_settings()
-        secret_reader = create_secret_reader(use_vault=vault_settings.vault)
-
-    s3_settings = acquire_state_settings(secret_reader)
+    if secret_reader:
+        s3_settings = acquire_state_settings(secret_reader)
+    else:
+        # reading the settings takes a GraphQL query and possibly a vault read
+        s3_settings = get_process_context().get_or_create(
+            "state-settings", _acquire_default_state_settings, per_bundle=True
+        )
 
     return State(
         integration=integration,
         bucket=s3_settings.bucket,
         client=s3_settings.build_client(),
+        cache=get_state_object_cache(),
     )
 
 
+def _acquire_default_state_settings() -> S3StateConfiguration:
+    vault_settings = get_app_interface_vault_settings()
+    secret_reader = create_secret_reader(use_vault=vault_settings.vault)
+    return acquire_state_settings(secret_reader)
+
+
 class S3StateConfiguration(BaseModel):
     bucket: str
     region: str
@@ -235,16 +266,31 @@ class State:
     :param integration: name of calling integration
     :param accounts: Graphql AWS accounts query results
     :param settings: App Interface settings
+    :param cache: (optional) local copies of state objects. Cached objects are
+        revalidated with conditional requests and ls() results are kept as a
+        snapshot to answer exists() and to skip revalidating unchanged objects.
 
     :raises StateInaccessibleException: if the bucket is missing
     or not accessible
     """
 
-    def __init__(self, integration: str, bucket: str, client: S3Client) -> None:
+    def __init__(
+        self,
+        integration: str,
+        bucket: str,
+        client: S3Client,
+        cache: StateObjectCache | None = None,
+    ) -> None:
         """Initiates S3 client from AWSApi."""
         self.state_path = f"state/{integration}" if integration else "state"
         self.bucket = bucket
         self.client = client
+        self.cache = cache
+        # ETags of the keys below the listed prefixes, as of the last ls()
+        self._listed_prefixes: set[str] = set()
+        self._listed_etags: dict[str, str] = {}
+        # batch() buffers the writes of the thread that opened it only
+        self._batch = threading.local()
 
         # check if the bucket exists
         try:
@@ -254,6 +300,18 @@ class State:
                 f"Bucket {self.bucket} is not accessible - {details!s}"
             ) from None
 
+    @property
+    def _write_buffer(self) -> dict[str, tuple[Any, Mapping[str, str] | None]] | None:
+        """Pending writes of the batch() of the current thread,
+        key -> (value, metadata)."""
+        return getattr(self._batch, "writes", None)
+
+    @_write_buffer.setter
+    def _write_buffer(
+        self, writes: dict[str, tuple[Any, Mapping[str, str] | None]] | None
+    ) -> None:
+        self._batch.writes = writes
+
     def __enter__(self) -> Self:
         return self
 
@@ -277,6 +335,11 @@ class State:
         :raises StateInaccessibleException: if the bucket is missing or
         permissions are insufficient or a general AWS error occurred
         """
+        if self._write_buffer is not None and key in self._write_buffer:
+            return True
+        listed, etag = self._listed(key)
+        if listed:
+            return etag is not None
         exists, _ = self.head(key)
         return exists
 
@@ -292,6 +355,12 @@ class State:
         permissions are insufficient or a general AWS error occurred
         """
         key_path = f"{self.state_path}/{key}"
+        listed, etag = self._listed(key)
+        if listed:
+            if etag is None:
+                return False, {}
+            if (cached := self._cached(key, etag)) is not None:
+                return True, cached.metadata
         try:
             response = self.client.head_object(Bucket=self.bucket, Key=key_path)
             return True, response["Metadata"]
@@ -305,12 +374,16 @@ class State:
                 f"in bucket {self.bucket} - {details!s}"
             ) from None
 
-    def ls(self) -> list[str]:
+    def ls(self, prefix: str = "") -> list[str]:
         """
         Returns a list of keys in the state
+
+        :param prefix: only list keys starting with this prefix
+
+        :type prefix: string
         """
         objects = self.client.list_objects_v2(
-            Bucket=self.bucket, Prefix=f"{self.state_path}/"
+            Bucket=self.bucket, Prefix=f"{self.state_path}/{prefix}"
         )
 
         if "Contents" not in objects:
@@ -321,14 +394,35 @@ class State:
         while objects["IsTruncated"]:
             objects = self.client.list_objects_v2(
                 Bucket=self.bucket,
-                Prefix=f"{self.state_path}/",
+                Prefix=f"{self.state_path}/{prefix}",
                 ContinuationToken=objects["NextContinuationToken"],
             )
 
             contents += objects["Contents"]
 
+        if self.cache is not None:
+            self._listed_prefixes.add(prefix)
+            for c in contents:
+                self._listed_etags[c["Key"][len(self.state_path) + 1 :]] = c["ETag"]
+
         return [c["Key"].replace(self.state_path, "") for c in contents]
 
+    def _listed(self, key: str) -> tuple[bool, str | None]:
+        """Returns whether the key is below a prefix listed by ls() and its
+        ETag, None if it did not exist."""
+        if not any(key.startswith(p) for p in self._listed_prefixes):
+            return False, None
+        return True, self._listed_etags.get(key)
+
+    def _cached(self, key: str, etag: str | None = None) -> CachedStateObject | None:
+        """Returns the cached object of a key, if it has the given ETag."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.bucket, f"{self.state_path}/{key}")
+        if cached is None or (etag is not None and cached.etag != etag):
+            return None
+        return cached
+
     def add(
         self,
         key: str,
@@ -353,12 +447,42 @@ class State:
     def _set(
         self, key: str, value: Any, metadata: Mapping[str, str] | None = None
     ) -> None:
-        self.client.put_object(
-            Bucket=self.bucket,
-            Key=f"{self.state_path}/{key}",
-            Body=json_dumps(value),
-            Metadata=metadata or {},
-        )
+        if self._write_buffer is not None:
+            self._write_buffer[key] = (value, metadata)
+            return
+        self._put(key, value, metadata)
+
+    def _put(
+        self, key: str, value: Any, metadata: Mapping[str, str] | None = None
+    ) -> None:
+        body = json_dumps(value).encode("utf-8")
+        if COMPRESSION_MIN_SIZE and len(body) >= COMPRESSION_MIN_SIZE:
+            response = self.client.put_object(
+                Bucket=self.bucket,
+                Key=f"{self.state_path}/{key}",
+                Body=zstd.compress(body),
+                ContentEncoding=ZSTD_CONTENT_ENCODING,
+                Metadata=metadata or {},
+            )
+        else:
+            response = self.client.put_object(
+                Bucket=self.bucket,
+                Key=f"{self.state_path}/{key}",
+                Body=body,
+                Metadata=metadata or {},
+            )
+        if self.cache is not None:
+            self.cache.set(
+                self.bucket,
+                f"{self.state_path}/{key}",
+                CachedStateObject(
+                    etag=response["ETag"],
+                    body=body,
+                    metadata=dict(metadata or {}),
+                ),
+            )
+            if self._listed(key)[0]:
+                self._listed_etags[key] = response["ETag"]
 
     def rm(self, key: str) -> None:
         """
@@ -370,7 +494,12 @@ class State:
         """
         if not self.exists(key):
             raise KeyError(f"[state] key {key} does not exists in {self.state_path}")
+        if self._write_buffer is not None:
+            self._write_buffer.pop(key, None)
         self.client.delete_object(Bucket=self.bucket, Key=f"{self.state_path}/{key}")
+        if self.cache is not None:
+            self.cache.delete(self.bucket, f"{self.state_path}/{key}")
+            self._listed_etags.pop(key, None)
 
     def get(self, key: str, *args: Any) -> Any:
         """
@@ -390,32 +519,131 @@ class State:
                 return args[0]
             raise
 
-    def get_all(self, path: str) -> dict[str, Any]:
+    def get_many(
+        self,
+        keys: Iterable[str],
+        thread_pool_size: int = BULK_READ_THREAD_POOL_SIZE,
+    ) -> dict[str, Any]:
+        """
+        Gets the values of many keys concurrently. Keys that do not exist
+        are missing in the result.
+
+        :param keys: keys to get
+        :param thread_pool_size: max number of concurrent requests
+        """
+        keys = list(keys)
+        values = threaded.run(
+            lambda key: self.get(key, _MISSING), keys, thread_pool_size
+        )
+        return {k: v for k, v in zip(keys, values, strict=True) if v is not _MISSING}
+
+    def get_all(
+        self, path: str, thread_pool_size: int = BULK_READ_THREAD_POOL_SIZE
+    ) -> dict[str, Any]:
         """
         Gets all keys and values from the state in the specified path.
+        Only the path is listed, the values are fetched concurrently.
         """
+        keys = [k.lstrip("/") for k in self.ls(prefix=path)]
+        values = self.get_many(keys, thread_pool_size=thread_pool_size)
         return {
-            k.replace(f"{path}/", "").strip("/"): self.get(k.lstrip("/"))
-            for k in self.ls()
-            if k.startswith(f"/{path}")
+            k.replace(f"{path}/", "").strip("/"): values[k] for k in keys if k in values
         }
 
+    async def get_all_async(
+        self, path: str, thread_pool_size: int = BULK_READ_THREAD_POOL_SIZE
+    ) -> dict[str, Any]:
+        """
+        Like get_all, without blocking the event loop.
+        """
+        return await asyncio.to_thread(self.get_all, path, thread_pool_size)
+
     def __getitem__(self, item: str) -> Any:
+        if self._write_buffer is not None and item in self._write_buffer:
+            return json.loads(json_dumps(self._write_buffer[item][0]))
         try:
-            response = self.client.get_object(
-                Bucket=self.bucket, Key=f"{self.state_path}/{item}"
-            )
-            return json.loads(response["Body"].read())
+            return json.loads(self._get_body(item))
+        except json.decoder.JSONDecodeError:
+            raise KeyError(item) from None
+
+    def _get_body(self, item: str) -> bytes:
+        key_path = f"{self.state_path}/{item}"
+        listed, etag = self._listed(item)
+        if listed and etag is None:
+            raise KeyError(item)
+        cached = self._cached(item)
+        if cached is not None and listed and cached.etag == etag:
+            return cached.body
+        try:
+            if cached is not None:
+                response = self.client.get_object(
+                    Bucket=self.bucket, Key=key_path, IfNoneMatch=cached.etag
+                )
+            else:
+                response = self.client.get_object(Bucket=self.bucket, Key=key_path)
         except ClientError as details:
-            if details.response["Error"]["Code"] == "NoSuchKey":
+            error_code = details.response["Error"]["Code"]
+            if cached is not None and error_code in {"304", "NotModified"}:
+                return cached.body
+            if error_code == "NoSuchKey":
+                if self.cache is not None:
+                    self.cache.delete(self.bucket, key_path)
                 raise KeyError(item) from None
             raise
-        except json.decoder.JSONDecodeError:
-            raise KeyError(item) from None
+        body = response["Body"].read()
+        if response.get("ContentEncoding") == ZSTD_CONTENT_ENCODING:
+            body = zstd.decompress(body)
+        if self.cache is not None:
+            self.cache.set(
+                self.bucket,
+                key_path,
+                CachedStateObject(
+                    etag=response["ETag"], body=body, metadata=response["Metadata"]
+                ),
+            )
+        return body
 
     def __setitem__(self, key: str, value: Any) -> None:
         self._set(key, value)
 
+    @contextlib.contextmanager
+    def batch(
+        self, thread_pool_size: int = BULK_READ_THREAD_POOL_SIZE
+    ) -> Generator[None]:
+        """Get a context manager to write keys in bulk.
+
+        Writes within the context are buffered and written concurrently when the
+        context exits without an exception. Reads of buffered keys return the
+        buffered values. Like with transaction(), nothing is written if an
+        exception occurs and AbortStateTransactionError is swallowed.
+
+        Attention!
+
+        The buffered writes are not atomic. If a write fails, the other writes may
+        have been done already. Nested batches are flushed by the outermost one.
+        Only the writes of the thread that opened the batch are buffered, other
+        threads sharing the State write directly and do not see the buffered
+        values.
+        """
+        if self._write_buffer is not None:
+            yield
+            return
+        self._write_buffer = {}
+        try:
+            yield
+        except AbortStateTransactionError:
+            return
+        else:
+            writes = list(self._write_buffer.items())
+            self._write_buffer = None
+            threaded.run(
+                lambda write: self._put(write[0], *write[1]),
+                writes,
+                thread_pool_size,
+            )
+        finally:
+            self._write_buffer = None
+
     @contextlib.contextmanager
     def transaction(
         self, key: str, value: Any = None
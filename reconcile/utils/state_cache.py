@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cache
+
+from reconcile.utils.bounded_directory import BoundedDirectory
+
+STATE_CACHE_ENABLED = os.environ.get("APP_INTERFACE_STATE_CACHE", "").lower() in {
+    "true",
+    "1",
+    "yes",
+}
+STATE_CACHE_DIR = os.environ.get("APP_INTERFACE_STATE_CACHE_DIR")
+STATE_CACHE_MEMORY_MAX_BYTES = int(
+    os.environ.get("APP_INTERFACE_STATE_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+)
+STATE_CACHE_DIR_MAX_BYTES = int(
+    os.environ.get("APP_INTERFACE_STATE_CACHE_DIR_MAX_BYTES", str(512 * 1024 * 1024))
+)
+
+
+@dataclass(frozen=True)
+class CachedStateObject:
+    etag: str
+    body: bytes
+    metadata: dict[str, str] = field(default_factory=dict)
+
+
+class StateObjectCache:
+    """Local copies of state objects, validated by their ETags.
+
+    Objects are kept in memory and, if a directory is given, on disk, so they
+    survive new State instances in later runs of an integration and restarts of
+    the process. The cache never decides whether an object is up to date, State
+    revalidates the ETag of a cached object before using it.
+
+    Both tiers evict the least recently used objects once they grow beyond
+    their size limit.
+
+    :param directory: cache directory, created if missing. memory only if None
+    :param memory_max_bytes: max size of the bodies kept in memory
+    :param directory_max_bytes: max size of the cache directory
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        memory_max_bytes: int = STATE_CACHE_MEMORY_MAX_BYTES,
+        directory_max_bytes: int = STATE_CACHE_DIR_MAX_BYTES,
+    ) -> None:
+        self.memory_max_bytes = memory_max_bytes
+        self._memory: OrderedDict[str, CachedStateObject] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._local = (
+            BoundedDirectory(directory, directory_max_bytes) if directory else None
+        )
+
+    @staticmethod
+    def _file_name(name: str) -> str:
+        return hashlib.sha256(name.encode("utf-8")).hexdigest()
+
+    def _remember(self, name: str, obj: CachedStateObject) -> None:
+        with self._lock:
+            if (old := self._memory.pop(name, None)) is not None:
+                self._memory_size -= len(old.body)
+            if len(obj.body) > self.memory_max_bytes:
+                return
+            self._memory[name] = obj
+            self._memory_size += len(obj.body)
+            while self._memory_size > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted.body)
+
+    def _forget(self, name: str) -> None:
+        with self._lock:
+            if (old := self._memory.pop(name, None)) is not None:
+                self._memory_size -= len(old.body)
+
+    def get(self, bucket: str, key: str) -> CachedStateObject | None:
+        name = f"{bucket}/{key}"
+        with self._lock:
+            obj = self._memory.get(name)
+            if obj is not None:
+                self._memory.move_to_end(name)
+        if obj is not None or self._local is None:
+            return obj
+        try:
+            content = self._local.read(self._file_name(name))
+            if content is None:
+                return None
+            data = json.loads(content)
+            obj = CachedStateObject(
+                etag=data["etag"],
+                body=base64.b64decode(data["body"]),
+                metadata=data["metadata"],
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"ignoring unreadable state cache entry for {name}: {e}")
+            return None
+        self._remember(name, obj)
+        return obj
+
+    def set(self, bucket: str, key: str, obj: CachedStateObject) -> None:
+        name = f"{bucket}/{key}"
+        self._remember(name, obj)
+        if self._local is None:
+            return
+        data = json.dumps({
+            "etag": obj.etag,
+            "body": base64.b64encode(obj.body).decode("ascii"),
+            "metadata": obj.metadata,
+        })
+        try:
+            self._local.write(self._file_name(name), data.encode("utf-8"))
+        except OSError as e:
+            logging.warning(f"could not write state cache entry for {name}: {e}")
+
+    def delete(self, bucket: str, key: str) -> None:
+        name = f"{bucket}/{key}"
+        self._forget(name)
+        if self._local is not None:
+            self._local.remove(self._file_name(name))
+
+
+@cache
+def get_state_object_cache() -> StateObjectCache | None:
+    """Returns the state object cache shared by all States of this process,
+    None if caching is not enabled."""
+    if not STATE_CACHE_ENABLED:
+        return None
+    return StateObjectCache(directory=STATE_CACHE_DIR)
@@ -124,8 +124,9 @@ class VaultClient:
         self._read_all_v2 = lru_cache(maxsize=2048)(self.__read_all_v2)
 
         session = requests.Session()
-        # There are at most 10 working threads in reconcile, plus 1 daemon thread for auto refresh
-        adapter = HTTPAdapter(pool_maxsize=11)
+        # There are at most 20 working threads in reconcile (see
+        # VAULT_SECRETS_PREFETCH_THREAD_POOL_SIZE), plus 1 daemon thread for auto refresh
+        adapter = HTTPAdapter(pool_maxsize=21)
         session.mount("https://", adapter)
         self._client = hvac.Client(url=server, session=session)
         self._close_lock = threading.Lock()